@@ -8,18 +8,24 @@ This application includes authentication, content management, quiz functionality
 from __future__ import annotations
 
 # Standard library imports
+import atexit
 import csv
+import hashlib
 import io
 import json
 import logging
+import mimetypes
 import os
 import re
+import select
 import tempfile
 import time
-from collections import defaultdict
-from datetime import datetime
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
 from functools import wraps
-from typing import Any, Dict, List, Optional, Tuple, Callable
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 from datetime import datetime, timedelta
 from flask import Flask, request, render_template, redirect, url_for, flash, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -29,13 +35,20 @@ import logging
 from dotenv import load_dotenv
 from flask import (
     Flask,
+    Response,
+    after_this_request,
     flash,
+    g,
+    has_request_context,
     jsonify,
     redirect,
     render_template,
     request,
     send_file,
     session,
+    stream_with_context,
+    template_rendered,
+    before_render_template,
     url_for,
 )
 from flask_mail import Mail, Message
@@ -43,7 +56,7 @@ from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 import psycopg2
 from werkzeug.security import check_password_hash, generate_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.utils import safe_join, secure_filename
 import secrets
 import string
 import random
@@ -51,7 +64,14 @@ import threading
 import zipfile
 
 # Local application imports
-from qa import initialize_qa, get_qa_system, get_system_status
+from qa import (
+    initialize_qa,
+    get_qa_system,
+    get_system_status,
+    index_document,
+    unindex_document,
+    sync_qa_documents,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -134,8 +154,9 @@ mail = Mail(app)
 
 _qa_instance = None
 
-# Global database connection pool
-db_connection_pool: Optional[pool.SimpleConnectionPool] = None
+# Global database connection pool (one per worker process, see init_db_pool)
+db_connection_pool: Optional["ManagedConnectionPool"] = None
+_db_pool_lock = threading.Lock()
 
 app_metrics = {
     "qa_requests": 0,
@@ -603,31 +624,265 @@ TRANSLATIONS = {
 # ==============================================
 
 
+class ManagedConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool for one worker process.
+
+    Wraps psycopg2's ThreadedConnectionPool with:
+    - blocking checkout: callers wait up to wait_timeout for a free connection
+      instead of failing immediately when all are in use
+    - health checks: a connection idle longer than healthcheck_after is pinged
+      with SELECT 1 before being handed out, and replaced if it is dead
+    - max-lifetime recycling: connections older than max_lifetime are closed
+      when returned, so server-side resources and stale sessions don't pile up
+    - wait-time metrics for sizing the pool
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        max_lifetime: float,
+        healthcheck_after: float,
+        wait_timeout: float,
+        **connect_kwargs: Any,
+    ) -> None:
+        self.pid = os.getpid()
+        self.maxconn = maxconn
+        self.max_lifetime = max_lifetime
+        self.healthcheck_after = healthcheck_after
+        self.wait_timeout = wait_timeout
+        # Opens minconn connections now; more are opened on demand up to maxconn
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        # psycopg2 only keeps minconn idle connections and closes any others when
+        # they are returned, which would reconnect on most checkouts under load.
+        # Keep every returned connection; lifetime recycling closes old ones instead.
+        self._pool.minconn = maxconn
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._created: Dict[int, float] = {}
+        self._last_used: Dict[int, float] = {}
+        self._checked_out: set = set()
+        self.stats = {
+            "checkouts": 0,
+            "wait_total_ms": 0.0,
+            "wait_max_ms": 0.0,
+            "waited": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "recycled": 0,
+        }
+
+    @property
+    def closed(self) -> bool:
+        return self._pool.closed
+
+    def owns(self, conn: psycopg2.extensions.connection) -> bool:
+        """Whether a connection is currently checked out from this pool."""
+        return id(conn) in self._checked_out
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """Check out a healthy connection, waiting for one if all are in use."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise pool.PoolError(
+                f"Timed out after {self.wait_timeout}s waiting for a database connection"
+            )
+        wait_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            for _ in range(self.maxconn + 1):
+                conn = self._pool.getconn()
+                now = time.time()
+                with self._lock:
+                    self._created.setdefault(id(conn), now)
+                    idle = now - self._last_used.get(id(conn), now)
+                if self._is_healthy(conn, idle):
+                    break
+                with self._lock:
+                    self.stats["health_check_failures"] += 1
+                self._discard(conn)
+            else:
+                raise psycopg2.OperationalError("No healthy database connection available")
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checked_out.add(id(conn))
+            self.stats["checkouts"] += 1
+            self.stats["wait_total_ms"] += wait_ms
+            self.stats["wait_max_ms"] = max(self.stats["wait_max_ms"], wait_ms)
+            if wait_ms >= 1:
+                self.stats["waited"] += 1
+        return conn
+
+    def putconn(self, conn: psycopg2.extensions.connection) -> None:
+        """Return a connection, closing it if it is broken or past its lifetime."""
+        try:
+            now = time.time()
+            with self._lock:
+                self._checked_out.discard(id(conn))
+                expired = now - self._created.get(id(conn), now) > self.max_lifetime
+                self._last_used[id(conn)] = now
+            if conn.closed or expired:
+                if expired and not conn.closed:
+                    with self._lock:
+                        self.stats["recycled"] += 1
+                self._discard(conn)
+            else:
+                # ThreadedConnectionPool rolls back any open transaction, and
+                # closes the connection if the server side was lost
+                self._pool.putconn(conn)
+                if conn.closed:
+                    self._forget(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        """Close every connection; only called at process shutdown."""
+        self._pool.closeall()
+        with self._lock:
+            self._created.clear()
+            self._last_used.clear()
+            self._checked_out.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool size and checkout/wait counters."""
+        with self._lock:
+            checkouts = self.stats["checkouts"]
+            return {
+                **self.stats,
+                "wait_total_ms": round(self.stats["wait_total_ms"], 1),
+                "wait_max_ms": round(self.stats["wait_max_ms"], 1),
+                "wait_avg_ms": round(self.stats["wait_total_ms"] / checkouts, 2)
+                if checkouts
+                else 0.0,
+                "in_use": len(self._checked_out),
+                "open": len(self._created),
+                "max": self.maxconn,
+            }
+
+    def _is_healthy(self, conn: psycopg2.extensions.connection, idle: float) -> bool:
+        """Cheap checks always; a round-trip ping only after the connection sat idle."""
+        if conn.closed:
+            return False
+        if idle < self.healthcheck_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding dead database connection: {str(e)}")
+            return False
+
+    def _forget(self, conn: psycopg2.extensions.connection) -> None:
+        """Stop tracking a closed connection."""
+        with self._lock:
+            self._created.pop(id(conn), None)
+            self._last_used.pop(id(conn), None)
+
+    def _discard(self, conn: psycopg2.extensions.connection) -> None:
+        """Close a connection and free its place in the pool."""
+        self._forget(conn)
+        try:
+            self._pool.putconn(conn, close=True)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
 def init_db_pool() -> None:
-    """Initialize the database connection pool."""
+    """
+    Create this process's database connection pool if it doesn't exist yet.
+
+    The pool lives for the whole worker process and is closed at exit
+    (close_db_pool). A pool inherited across fork() is replaced, since
+    connections can't be shared between processes.
+    """
     global db_connection_pool
-    try:
-        if db_connection_pool is None or db_connection_pool.closed:
-            db_connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1,  # minconn
-                10,  # maxconn
+    with _db_pool_lock:
+        if (
+            db_connection_pool is not None
+            and not db_connection_pool.closed
+            and db_connection_pool.pid == os.getpid()
+        ):
+            return
+        try:
+            db_connection_pool = ManagedConnectionPool(
+                int(os.getenv("DB_POOL_MIN", "1")),
+                int(os.getenv("DB_POOL_MAX", "10")),
+                max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+                healthcheck_after=float(os.getenv("DB_POOL_HEALTHCHECK_AFTER", "30")),
+                wait_timeout=float(os.getenv("DB_POOL_WAIT_TIMEOUT", "10")),
                 host=os.getenv("DB_HOST", "localhost"),
                 port=os.getenv("DB_PORT", "5432"),
                 database=os.getenv("DB_NAME", "fiftyone_learning"),
                 user=os.getenv("DB_USER", "admin"),
                 password=os.getenv("DB_PASSWORD", "admin123"),
+                connection_factory=CountingConnection,
             )
-            logger.info("PostgreSQL connection pool established successfully")
-    except Exception as e:
-        logger.error(f"Failed to create database connection pool: {str(e)}")
-        db_connection_pool = None
+            logger.info(
+                f"PostgreSQL connection pool established (pid {os.getpid()}, "
+                f"max {db_connection_pool.maxconn})"
+            )
+        except Exception as e:
+            logger.error(f"Failed to create database connection pool: {str(e)}")
+            db_connection_pool = None
 
 
-def get_db_connection() -> psycopg2.extensions.connection:
-    """Get a database connection from the pool."""
-    global db_connection_pool
+class CountingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that counts the statements executed through its cursors."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.query_count = 0
+
+    def cursor(self, *args: Any, **kwargs: Any) -> psycopg2.extensions.cursor:
+        base = (
+            kwargs.get("cursor_factory")
+            or self.cursor_factory
+            or psycopg2.extensions.cursor
+        )
+        kwargs["cursor_factory"] = _counting_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
 
-    if db_connection_pool is None or db_connection_pool.closed:
+_counting_cursor_classes: Dict[type, type] = {}
+
+
+def _counting_cursor_class(base: type) -> type:
+    """Subclass of a cursor class (plain, RealDictCursor, ...) that counts queries."""
+    cls = _counting_cursor_classes.get(base)
+    if cls is None:
+
+        class CountingCursor(base):
+            def execute(self, query, vars=None):
+                self.connection.query_count += 1
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                self.connection.query_count += 1
+                return super().executemany(query, vars_list)
+
+        CountingCursor.__name__ = f"Counting{base.__name__}"
+        cls = _counting_cursor_classes.setdefault(base, CountingCursor)
+    return cls
+
+
+def _checkout_db_connection() -> psycopg2.extensions.connection:
+    """Check a connection out of the pool, or connect directly if there is none."""
+    if (
+        db_connection_pool is None
+        or db_connection_pool.closed
+        or db_connection_pool.pid != os.getpid()
+    ):
         init_db_pool()
 
     try:
@@ -642,6 +897,7 @@ def get_db_connection() -> psycopg2.extensions.connection:
                 database=os.getenv("DB_NAME", "fiftyone_learning"),
                 user=os.getenv("DB_USER", "admin"),
                 password=os.getenv("DB_PASSWORD", "admin123"),
+                connection_factory=CountingConnection,
             )
             return conn
     except Exception as e:
@@ -649,15 +905,10 @@ def get_db_connection() -> psycopg2.extensions.connection:
         raise
 
 
-def release_db_connection(conn: Optional[psycopg2.extensions.connection]) -> None:
-    """Return a connection to the pool."""
-    global db_connection_pool
-
-    if conn is None:
-        return
-
+def _return_db_connection(conn: psycopg2.extensions.connection) -> None:
+    """Give a connection back to the pool, or close it if it didn't come from there."""
     try:
-        if db_connection_pool is not None and not db_connection_pool.closed:
+        if db_connection_pool is not None and db_connection_pool.owns(conn):
             db_connection_pool.putconn(conn)
         else:
             conn.close()
@@ -669,6 +920,134 @@ def release_db_connection(conn: Optional[psycopg2.extensions.connection]) -> Non
             pass
 
 
+def get_db_connection(read_only: bool = False) -> psycopg2.extensions.connection:
+    """
+    Get a database connection.
+
+    Inside a request, callers that run one after another share one connection
+    held on flask.g, so a page that runs a dozen helpers checks out from the
+    pool once. It goes back to the pool when the request ends
+    (release_request_db_connection).
+
+    A caller that asks while the shared connection is still held further up
+    the stack gets its own pooled connection, so its commit() or rollback()
+    can never touch the holder's transaction. Only read-only helpers
+    (read_only=True, which never commit or roll back) share it in that case,
+    inside a savepoint so a failed query doesn't abort the holder's
+    transaction. Outside a request (startup, background threads) each call
+    checks out its own connection from the pool.
+
+    Args:
+        read_only: The caller only reads and never commits or rolls back.
+    """
+    if not has_request_context():
+        return _checkout_db_connection()
+
+    conn = g.get("db_conn")
+    if conn is None or conn.closed:
+        conn = _checkout_db_connection()
+        conn.query_count = 0
+        g.db_conn = conn
+        g.db_conn_depth = 0
+        g.db_savepoints = []
+
+    if g.db_conn_depth == 0:
+        g.db_conn_depth = 1
+        return conn
+
+    status = conn.get_transaction_status()
+    if read_only and status != psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        savepoint = None
+        if status == psycopg2.extensions.TRANSACTION_STATUS_INTRANS:
+            savepoint = f"shared_read_{len(g.db_savepoints)}"
+            cursor = conn.cursor()
+            cursor.execute(f"SAVEPOINT {savepoint}")
+            cursor.close()
+        g.db_savepoints.append(savepoint)
+        g.db_conn_depth += 1
+        return conn
+
+    nested = _checkout_db_connection()
+    nested.query_count = 0
+    return nested
+
+
+def release_db_connection(conn: Optional[psycopg2.extensions.connection]) -> None:
+    """
+    Release a connection obtained from get_db_connection.
+
+    The request's shared connection stays checked out. A read-only helper's
+    savepoint is rolled back if its queries failed and released otherwise.
+    Once the outermost holder releases it, any transaction left open is
+    rolled back, just as returning it to the pool would, so uncommitted work
+    never leaks into the next caller and the connection doesn't sit idle in
+    a transaction during slow work such as LLM calls.
+    """
+    if conn is None:
+        return
+
+    if has_request_context() and conn is g.get("db_conn"):
+        if conn.closed:
+            g.pop("db_conn", None)
+            return
+        try:
+            status = conn.get_transaction_status()
+            if g.db_conn_depth > 1:
+                savepoint = g.db_savepoints.pop() if g.db_savepoints else None
+                if status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+                    # No savepoint means the holder had no transaction open
+                    # when this read started, so there is nothing to keep
+                    if savepoint:
+                        cursor = conn.cursor()
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                        cursor.close()
+                    else:
+                        conn.rollback()
+                elif savepoint and status == psycopg2.extensions.TRANSACTION_STATUS_INTRANS:
+                    cursor = conn.cursor()
+                    cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+                    cursor.close()
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception as e:
+            logger.error(f"Failed to reset request connection: {str(e)}")
+            g.pop("db_conn", None)
+            _return_db_connection(conn)
+            return
+        g.db_conn_depth = max(g.db_conn_depth - 1, 0)
+        return
+
+    if has_request_context() and "db_conn" in g:
+        # A nested caller's own connection; keep the request's query count whole
+        g.db_nested_query_count = g.get("db_nested_query_count", 0) + getattr(
+            conn, "query_count", 0
+        )
+    _return_db_connection(conn)
+
+
+def release_request_db_connection() -> None:
+    """Return the request's shared connection to the pool, if it checked one out."""
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        _return_db_connection(conn)
+
+
+def get_request_query_count() -> int:
+    """Number of SQL statements executed for the current request."""
+    if not has_request_context():
+        return 0
+    conn = g.get("db_conn")
+    shared = getattr(conn, "query_count", 0) if conn is not None else 0
+    return shared + g.get("db_nested_query_count", 0)
+
+
+def get_db_pool_stats() -> Optional[Dict[str, Any]]:
+    """Connection pool counters for this worker, or None if there is no pool."""
+    if db_connection_pool is None or db_connection_pool.pid != os.getpid():
+        return None
+    return db_connection_pool.get_stats()
+
+
 def safely_parse_options(options_data):
     """Safely parse quiz options regardless of whether they're stored as JSON string or list"""
     if options_data is None:
@@ -882,6 +1261,154 @@ def get_quiz_attempt_info(user_id: int, unit_id: int) -> Optional[Dict[str, Any]
         return None
 
 
+# Percentage needed to pass a quiz, and team points awarded for passing
+QUIZ_PASS_SCORE = 70
+QUIZ_PASS_TEAM_POINTS = 10
+
+
+def grade_quiz_answers(
+    questions: List[Dict[str, Any]], answers: Dict[int, Optional[int]]
+) -> Dict[str, Any]:
+    """
+    Score a quiz submission without touching the database.
+
+    Args:
+        questions: Quiz rows with id and correct_answer.
+        answers: Chosen option index per question id (None if unanswered).
+
+    Returns:
+        Dict with correct, total, score (rounded percentage), passed, and
+        responses as (question_id, user_answer, is_correct) tuples.
+    """
+    responses = []
+    for question in questions:
+        user_answer = answers.get(question["id"])
+        is_correct = user_answer is not None and user_answer == question["correct_answer"]
+        responses.append((question["id"], user_answer, is_correct))
+
+    total = len(responses)
+    correct = sum(1 for _, _, is_correct in responses if is_correct)
+    score = round(correct / total * 100) if total > 0 else 0
+    return {
+        "correct": correct,
+        "total": total,
+        "score": score,
+        "passed": score >= QUIZ_PASS_SCORE,
+        "responses": responses,
+    }
+
+
+def record_quiz_submission(
+    cursor: Any, user_id: int, unit_id: int, grade: Dict[str, Any]
+) -> int:
+    """
+    Write a graded quiz submission in a single statement.
+
+    One round trip inserts the attempt with its final score, all responses
+    (unnested from arrays), upserts the unit's progress and, on a pass,
+    credits the user's team. Runs on the caller's cursor; the caller commits.
+
+    Args:
+        cursor: Cursor of the submitting transaction.
+        user_id: Submitting user.
+        unit_id: Unit of the quiz.
+        grade: Result of grade_quiz_answers.
+
+    Returns:
+        ID of the new quiz_attempts row.
+    """
+    question_ids = [r[0] for r in grade["responses"]]
+    user_answers = [r[1] for r in grade["responses"]]
+    correctness = [r[2] for r in grade["responses"]]
+    cursor.execute(
+        """
+        WITH attempt AS (
+            INSERT INTO quiz_attempts (user_id, unit_id, attempted_at, score, passed)
+            VALUES (%(user_id)s, %(unit_id)s, CURRENT_TIMESTAMP, %(score)s, %(passed)s)
+            RETURNING id
+        ),
+        responses AS (
+            INSERT INTO quiz_responses (attempt_id, question_id, user_answer, is_correct)
+            SELECT attempt.id, r.question_id, r.user_answer, r.is_correct
+            FROM attempt,
+                 unnest(%(question_ids)s::int[], %(user_answers)s::int[], %(correctness)s::bool[])
+                     AS r(question_id, user_answer, is_correct)
+        ),
+        progress_row AS (
+            INSERT INTO progress (user_id, unit_number, quiz_score, completed)
+            VALUES (%(user_id)s, %(unit_id)s, %(score)s, %(completed)s)
+            ON CONFLICT (user_id, unit_number)
+            DO UPDATE SET quiz_score = EXCLUDED.quiz_score,
+                          completed = CASE WHEN EXCLUDED.quiz_score >= %(pass_score)s
+                                           THEN 1 ELSE progress.completed END
+        ),
+        team_score AS (
+            INSERT INTO team_scores (team_id, score)
+            SELECT tm.team_id, %(team_points)s FROM team_members tm
+            WHERE tm.user_id = %(user_id)s AND %(passed)s
+            LIMIT 1
+            ON CONFLICT (team_id)
+            DO UPDATE SET score = team_scores.score + EXCLUDED.score,
+                          updated_at = CURRENT_TIMESTAMP
+        )
+        SELECT id FROM attempt
+    """,
+        {
+            "user_id": user_id,
+            "unit_id": unit_id,
+            "score": grade["score"],
+            "passed": grade["passed"],
+            "completed": 1 if grade["passed"] else 0,
+            "pass_score": QUIZ_PASS_SCORE,
+            "team_points": QUIZ_PASS_TEAM_POINTS,
+            "question_ids": question_ids,
+            "user_answers": user_answers,
+            "correctness": correctness,
+        },
+    )
+    row = cursor.fetchone()
+    return row["id"] if isinstance(row, dict) else row[0]
+
+
+def get_quiz_attempts_map(user_id: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Latest scored quiz attempt of a user for every unit, in one query.
+
+    Returns:
+        Map of unit_id to the same dict get_quiz_attempt_info returns; units
+        without a scored attempt are absent.
+    """
+    conn = None
+    try:
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(
+            """
+            SELECT DISTINCT ON (unit_id) unit_id, score, attempted_at, passed
+            FROM quiz_attempts
+            WHERE user_id = %s AND score IS NOT NULL
+            ORDER BY unit_id, attempted_at DESC
+        """,
+            (user_id,),
+        )
+        attempts = {
+            row["unit_id"]: {
+                "score": row["score"],
+                "attempted_at": row["attempted_at"],
+                "passed": row["passed"],
+            }
+            for row in cursor.fetchall()
+        }
+        cursor.close()
+        return attempts
+    except Exception as e:
+        logger.error(f"Error in get_quiz_attempts_map: {str(e)}")
+        return {}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+
 def can_take_quiz(user_id: int, unit_id: int) -> bool:
     """Check if a user can take a quiz (hasn't attempted it yet).
     Returns False if user has already attempted, regardless of pass/fail."""
@@ -911,19 +1438,122 @@ def get_quiz_status(user_id: int, unit_id: int) -> Dict[str, Any]:
         }
 
 
-def get_user_camp(user_id: int) -> Optional[str]:
-    """Get user's camp."""
+class UserProfileCache:
+    """
+    Short-lived per-worker cache of user profiles (camp, language, cohort, tags).
+
+    Decorators, hooks and template helpers look these up many times per page.
+    Routes that change a profile call invalidate() after committing; changes
+    made by another worker are picked up once the entry's ttl runs out.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() > entry[0]:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: int, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user's profile, or every profile when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+user_profile_cache = UserProfileCache(
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "30")),
+    max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "5000")),
+)
+
+
+def get_user_profile(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get a user's camp, language, cohort and active tags in one cached lookup.
+
+    Args:
+        user_id: User to look up.
+
+    Returns:
+        Dict with camp, language, cohort_id, cohort_name, student_type and
+        tags (dicts with group_name, tag_name and tag_id, as get_user_tags
+        returns them), or None if the user doesn't exist or the query failed.
+        The dict is shared with other requests; don't modify it.
+    """
+    profile = user_profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT camp FROM users WHERE id = %s", (user_id,))
-        result = cursor.fetchone()
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(
+            """
+            SELECT u.camp, u.language, u.cohort_id, u.cohort_name, u.student_type,
+                   COALESCE(
+                       json_agg(
+                           json_build_object(
+                               'group_name', tg.name, 'tag_name', t.name, 'tag_id', t.id
+                           )
+                           ORDER BY tg.name, t.name
+                       ) FILTER (WHERE tg.id IS NOT NULL),
+                       '[]'
+                   ) AS tags
+            FROM users u
+            LEFT JOIN user_tags ut ON ut.user_id = u.id
+            LEFT JOIN tags t ON ut.tag_id = t.id AND t.is_active = TRUE
+            LEFT JOIN tag_groups tg ON t.tag_group_id = tg.id
+            WHERE u.id = %s
+            GROUP BY u.id
+        """,
+            (user_id,),
+        )
+        row = cursor.fetchone()
         cursor.close()
-        release_db_connection(conn)
-        return result[0] if result else None
     except Exception as e:
-        logger.error(f"Error getting user camp: {str(e)}")
+        logger.error(f"Error getting user profile: {str(e)}")
+        return None
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+    if row is None:
         return None
+    profile = dict(row)
+    if user_profile_cache.ttl > 0:
+        user_profile_cache.put(user_id, profile)
+    return profile
+
+
+def invalidate_user_profile(user_id: Optional[int] = None) -> None:
+    """Forget cached profiles after a change; None forgets every user's."""
+    user_profile_cache.invalidate(int(user_id) if user_id is not None else None)
+
+
+def get_user_camp(user_id: int) -> Optional[str]:
+    """Get user's camp."""
+    profile = get_user_profile(user_id)
+    return profile["camp"] if profile else None
 
 
 def camp_required(f: Callable) -> Callable:
@@ -1061,64 +1691,6 @@ def generate_csv_file(
         return None
 
 
-def update_team_score(user_id: int, score_to_add: int) -> None:
-    """Update a team's score based on user activity."""
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            SELECT tm.team_id
-            FROM team_members tm
-            WHERE tm.user_id = %s
-        """,
-            (user_id,),
-        )
-
-        result = cursor.fetchone()
-        if not result:
-            return
-
-        team_id = result[0]
-
-        cursor.execute(
-            """
-            SELECT id FROM team_scores WHERE team_id = %s
-        """,
-            (team_id,),
-        )
-
-        if cursor.fetchone():
-            cursor.execute(
-                """
-                UPDATE team_scores
-                SET score = score + %s, updated_at = CURRENT_TIMESTAMP
-                WHERE team_id = %s
-            """,
-                (score_to_add, team_id),
-            )
-        else:
-            cursor.execute(
-                """
-                INSERT INTO team_scores (team_id, score)
-                VALUES (%s, %s)
-            """,
-                (team_id, score_to_add),
-            )
-
-        conn.commit()
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        logger.error(f"Error updating team score: {str(e)}")
-    finally:
-        if conn:
-            cursor.close()
-            release_db_connection(conn)
-
-
 def get_document_list() -> List[Dict[str, Any]]:
     """Get a list of documents available for Q&A."""
     documents = []
@@ -1362,6 +1934,7 @@ def metrics():
             # System metrics
             "qa_system_status": qa_system_status,
             "document_count": document_count,
+            "db_pool": get_db_pool_stats(),
             # Timestamp
             "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
         }
@@ -1724,18 +2297,11 @@ def before_request() -> None:
     if "language" not in session:
         if "user_id" in session:
             try:
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT language FROM users WHERE id = %s", (session["user_id"],)
-                )
-                result = cursor.fetchone()
-                cursor.close()
-                release_db_connection(conn)
-                if result and result[0]:
-                    session["language"] = result[0]
+                profile = get_user_profile(session["user_id"])
+                if profile and profile["language"]:
+                    session["language"] = profile["language"]
                     logger.info(
-                        f"Setting language to {result[0]} from database for user {session['user_id']}"
+                        f"Setting language to {profile['language']} from database for user {session['user_id']}"
                     )
                 else:
                     session["language"] = "en"
@@ -1750,7 +2316,14 @@ def before_request() -> None:
 
 @app.after_request
 def add_header(response: Any) -> Any:
-    """Add headers to prevent caching."""
+    """
+    Add headers to prevent caching.
+
+    Stored-file responses carrying a content-hash ETag keep the
+    Cache-Control their route chose.
+    """
+    if request.endpoint in CACHEABLE_FILE_ENDPOINTS and response.headers.get("ETag"):
+        return response
     response.headers["Cache-Control"] = (
         "no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0"
     )
@@ -1759,30 +2332,105 @@ def add_header(response: Any) -> Any:
     return response
 
 
-@app.context_processor
-def inject_globals() -> Dict[str, Any]:
-    """Make important variables available to all templates."""
-    return {
-        "LANGUAGES": LANGUAGES,
-        "get_text": get_text,
-        "current_language": session.get("language", "en"),
-        "get_quiz_attempt_info": get_quiz_attempt_info,
-        "has_attempted_quiz": has_attempted_quiz,
-        "can_take_quiz": can_take_quiz,
-        "get_content_tags": get_content_tags,  # Add this line
-        "get_user_tags": get_user_tags,  # Add this line
-        "user_has_tag": user_has_tag,  # Add this line
-    }
+def db_profiling_enabled() -> bool:
+    """Whether per-request and per-template query counts are reported."""
+    return app.debug or os.getenv("DB_PROFILE", "false").lower() == "true"
 
 
-@app.context_processor
-def inject_camps() -> Dict[str, Any]:
-    """Make camps available to all templates."""
-    return {
-        "CAMPS": CAMPS,
-        "get_user_camp": get_user_camp,
-        "user_camp": session.get("user_camp"),
-    }
+@app.after_request
+def add_query_count_header(response: Any) -> Any:
+    """Expose the request's SQL statement count for profiling (debug or DB_PROFILE)."""
+    if db_profiling_enabled():
+        query_count = get_request_query_count()
+        response.headers["X-DB-Queries"] = str(query_count)
+        logger.debug(f"🗄️ {request.method} {request.path}: {query_count} queries")
+    return response
+
+
+@before_render_template.connect_via(app)
+def record_template_start(sender: Any, template: Any, **extra: Any) -> None:
+    """Remember the request's query count when a template starts rendering."""
+    if db_profiling_enabled():
+        g.setdefault("template_query_marks", []).append(get_request_query_count())
+
+
+@template_rendered.connect_via(app)
+def log_template_queries(sender: Any, template: Any, **extra: Any) -> None:
+    """Log how many queries a template's helpers ran while it rendered."""
+    marks = g.get("template_query_marks")
+    if db_profiling_enabled() and marks:
+        queries = get_request_query_count() - marks.pop()
+        logger.debug(f"🧩 Template {template.name}: {queries} queries while rendering")
+
+
+@app.teardown_appcontext
+def teardown_db_connection(exception: Optional[BaseException]) -> None:
+    """Return the request's shared database connection to the pool."""
+    release_request_db_connection()
+
+
+def _request_memo(key: Tuple[Any, ...], loader: Callable[[], Any]) -> Any:
+    """Load a value once per request, e.g. a batched map used by many template calls."""
+    memo = g.setdefault("template_memo", {})
+    if key not in memo:
+        memo[key] = loader()
+    return memo[key]
+
+
+def template_quiz_attempt_info(user_id: int, unit_id: int) -> Optional[Dict[str, Any]]:
+    """get_quiz_attempt_info for templates: every unit's attempt loaded in one query."""
+    attempts = _request_memo(
+        ("quiz_attempts", user_id), lambda: get_quiz_attempts_map(user_id)
+    )
+    return attempts.get(unit_id)
+
+
+def template_has_attempted_quiz(user_id: int, unit_id: int) -> bool:
+    return template_quiz_attempt_info(user_id, unit_id) is not None
+
+
+def template_can_take_quiz(user_id: int, unit_id: int) -> bool:
+    return template_quiz_attempt_info(user_id, unit_id) is None
+
+
+def template_content_tags(content_type: str, content_id: int) -> List[str]:
+    """Tag names for one content item, with the whole type's tags loaded in one query."""
+    tags = _request_memo(
+        ("content_tags", content_type), lambda: get_content_tags_map(content_type)
+    )
+    return tags.get(content_id, [])
+
+
+@app.context_processor
+def inject_globals() -> Dict[str, Any]:
+    """
+    Make important variables available to all templates.
+
+    The lookup helpers are batched per request: the first call loads the
+    whole map (all of a user's quiz attempts, all tags of a content type) and
+    later calls in loops are dictionary lookups.
+    """
+    return {
+        "LANGUAGES": LANGUAGES,
+        "get_text": get_text,
+        "current_language": session.get("language", "en"),
+        "get_quiz_attempt_info": template_quiz_attempt_info,
+        "has_attempted_quiz": template_has_attempted_quiz,
+        "can_take_quiz": template_can_take_quiz,
+        "get_content_tags": template_content_tags,
+        "get_user_tags": get_user_tags,
+        "user_has_tag": user_has_tag,
+    }
+
+
+@app.context_processor
+def inject_camps() -> Dict[str, Any]:
+    """Make camps available to all templates."""
+    return {
+        "CAMPS": CAMPS,
+        "get_user_camp": get_user_camp,
+        "user_camp": session.get("user_camp"),
+    }
 
 
 @app.context_processor
@@ -1814,12 +2462,15 @@ def initialize_tag_system():
         logger.error(f"Failed to initialize tag system: {str(e)}")
 
 
-@app.teardown_appcontext
-def close_db_pool(e: Optional[Exception] = None) -> None:
-    """Close the database connection pool when the application context ends."""
-    global db_connection_pool
+@atexit.register
+def close_db_pool() -> None:
+    """Close the database connection pool when the worker process exits."""
     try:
-        if db_connection_pool and not db_connection_pool.closed:
+        if (
+            db_connection_pool
+            and not db_connection_pool.closed
+            and db_connection_pool.pid == os.getpid()
+        ):
             db_connection_pool.closeall()
             logger.info("Connection pool closed")
     except Exception as e:
@@ -2108,8 +2759,10 @@ def register_cohort_selection() -> Any:
             if cohort_info:
                 tags_to_assign.append(cohort_info[0])  # cohort name
 
-            # Assign tags
-            assign_user_tags_by_names(user_id, tags_to_assign, "registration")
+            # Assign tags in the same transaction, so a failure undoes the new user too
+            assign_user_tags_by_names(
+                user_id, tags_to_assign, "registration", cursor=cursor
+            )
 
             conn.commit()
 
@@ -2425,6 +3078,7 @@ def select_camp() -> Any:
             cursor = conn.cursor()
             cursor.execute("UPDATE users SET camp = %s WHERE id = %s", (camp, user_id))
             conn.commit()
+            invalidate_user_profile(user_id)
             cursor.close()
 
             session["user_camp"] = camp
@@ -2481,55 +3135,144 @@ def create_fallback_words_mindmap(words, unit_id):
 
 def get_user_tags(user_id: int) -> List[Dict[str, Any]]:
     """Get all tags assigned to a user."""
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(
-            """
-            SELECT tg.name as group_name, t.name as tag_name, t.id as tag_id
-            FROM user_tags ut
-            JOIN tags t ON ut.tag_id = t.id
-            JOIN tag_groups tg ON t.tag_group_id = tg.id
-            WHERE ut.user_id = %s AND t.is_active = TRUE
-            ORDER BY tg.name, t.name
-        """,
-            (user_id,),
-        )
-        return cursor.fetchall()
-    except Exception as e:
-        logger.error(f"Error getting user tags: {str(e)}")
-        return []
-    finally:
-        if conn:
-            cursor.close()
-            release_db_connection(conn)
+    profile = get_user_profile(user_id)
+    return list(profile["tags"]) if profile else []
 
 
 def user_has_tag(user_id: int, tag_name: str) -> bool:
     """Check if user has a specific tag."""
+    profile = get_user_profile(user_id)
+    return bool(profile) and any(
+        tag["tag_name"] == tag_name for tag in profile["tags"]
+    )
+
+
+# Content type -> table holding it
+CONTENT_TABLES = {
+    "material": "materials",
+    "video": "videos",
+    "project": "projects",
+    "quiz": "quizzes",
+    "word": "words",
+}
+
+
+# ==============================================
+# CONTENT VISIBILITY INDEX
+# ==============================================
+#
+# content_visibility holds one row per (content item, camp that may see it):
+# the item's own camp column plus the name of every 'Bootcamp Type' tag on it.
+# Student pages join against it instead of re-deriving the rule through
+# content_tags -> tags -> tag_groups on every read. It is kept current by
+# refresh_content_visibility() in the same transaction as each content or tag
+# assignment change, and rebuilt whole when tags themselves change.
+
+CONTENT_VISIBILITY_DDL = """
+    CREATE TABLE IF NOT EXISTS content_visibility (
+        content_type VARCHAR(20) NOT NULL,
+        content_id INTEGER NOT NULL,
+        camp VARCHAR(50) NOT NULL,
+        PRIMARY KEY (content_type, content_id, camp)
+    )
+"""
+
+_content_visibility_initialized = False
+_content_visibility_lock = threading.Lock()
+
+
+def refresh_content_visibility(
+    cursor: Any, content_type: str, content_id: Optional[int] = None
+) -> None:
+    """
+    Recompute the content_visibility rows of one content item, or of a whole type.
+
+    Runs on the caller's cursor, so the index commits or rolls back together
+    with the change that made it stale. Deleted items simply lose their rows.
+    Callers invalidate cached unit content themselves (content_changed), once
+    per transaction.
+
+    Args:
+        cursor: Cursor of the transaction that changed the content or its tags.
+        content_type: One of CONTENT_TABLES.
+        content_id: Item to refresh; None refreshes every item of the type.
+    """
+    table_name = CONTENT_TABLES[content_type]
+    if content_id is None:
+        item_filter, item_params = "", ()
+    else:
+        item_filter, item_params = "AND c.id = %s", (content_id,)
+
+    cursor.execute(
+        "DELETE FROM content_visibility WHERE content_type = %s"
+        + ("" if content_id is None else " AND content_id = %s"),
+        (content_type,) + item_params,
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO content_visibility (content_type, content_id, camp)
+        SELECT %s, c.id, c.camp FROM {table_name} c
+        WHERE c.camp IS NOT NULL {item_filter}
+        UNION
+        SELECT %s, c.id, t.name FROM {table_name} c
+        JOIN content_tags ct ON ct.content_type = %s AND ct.content_id = c.id
+        JOIN tags t ON ct.tag_id = t.id
+        JOIN tag_groups tg ON t.tag_group_id = tg.id
+        WHERE tg.name = 'Bootcamp Type' {item_filter}
+        ON CONFLICT DO NOTHING
+        """,
+        (content_type,) + item_params + (content_type, content_type) + item_params,
+    )
+
+
+def rebuild_content_visibility() -> bool:
+    """
+    Create content_visibility if needed and recompute it for all content.
+
+    Used on a worker's first request and after tags or tag groups are renamed
+    or deleted, which can change the visibility of any number of items.
+    Concurrent rebuilds from several workers are serialized by an advisory lock.
+    """
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT 1 FROM user_tags ut
-            JOIN tags t ON ut.tag_id = t.id
-            WHERE ut.user_id = %s AND t.name = %s AND t.is_active = TRUE
-        """,
-            (user_id, tag_name),
-        )
-        return cursor.fetchone() is not None
+        cursor.execute(CONTENT_VISIBILITY_DDL)
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('content_visibility'))")
+        for content_type in CONTENT_TABLES:
+            refresh_content_visibility(cursor, content_type)
+        content_changed(cursor)
+        conn.commit()
+        cursor.close()
+        logger.info("Content visibility index rebuilt")
+        return True
     except Exception as e:
-        logger.error(f"Error checking user tag: {str(e)}")
+        if conn:
+            conn.rollback()
+        logger.error(f"Error rebuilding content visibility index: {str(e)}")
         return False
     finally:
         if conn:
-            cursor.close()
             release_db_connection(conn)
 
 
+@app.before_request
+def initialize_content_visibility() -> None:
+    """
+    Build the content visibility index on a worker's first request.
+
+    Concurrent first requests wait for the build instead of querying a
+    missing or half-filled table, and a failed build is retried on the next
+    request.
+    """
+    global _content_visibility_initialized
+    if _content_visibility_initialized:
+        return
+    with _content_visibility_lock:
+        if not _content_visibility_initialized:
+            _content_visibility_initialized = rebuild_content_visibility()
+
+
 def get_content_with_tag_filtering(content_type: str, unit_id: int, user_id: int):
     """FIXED content filtering - shows content if user's camp matches ANY of the content's assigned camps"""
     conn = None
@@ -2537,10 +3280,7 @@ def get_content_with_tag_filtering(content_type: str, unit_id: int, user_id: int
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-        # Get user's camp
-        cursor.execute("SELECT camp FROM users WHERE id = %s", (user_id,))
-        user_result = cursor.fetchone()
-        user_camp = user_result["camp"] if user_result else None
+        user_camp = get_user_camp(user_id)
 
         logger.info(f"FIXED FILTERING: User {user_id} has camp: {user_camp}")
 
@@ -2550,43 +3290,22 @@ def get_content_with_tag_filtering(content_type: str, unit_id: int, user_id: int
             )
             return []
 
-        # FIXED: Use correct table names
-        table_mapping = {
-            "material": "materials",
-            "video": "videos", 
-            "project": "projects",
-            "quiz": "quizzes",  # FIXED: was "quiz_questions"
-            "word": "words"
-        }
-        
-        table_name = table_mapping.get(content_type)
+        table_name = CONTENT_TABLES.get(content_type)
         if not table_name:
             logger.error(f"Unknown content type: {content_type}")
             return []
 
-        # Check if user's camp matches ANY of the content's bootcamp tags OR the main camp field
+        # Visible if the user's camp matches the content's camp field or any of
+        # its bootcamp type tags, as precomputed in content_visibility
         cursor.execute(
             f"""
-            SELECT DISTINCT c.* FROM {table_name} c
-            WHERE c.unit_id = %s 
-            AND (
-                -- Match main camp field (backward compatibility)
-                c.camp = %s 
-                OR 
-                -- Match any bootcamp type tag assigned to this content
-                EXISTS (
-                    SELECT 1 FROM content_tags ct
-                    JOIN tags t ON ct.tag_id = t.id
-                    JOIN tag_groups tg ON t.tag_group_id = tg.id
-                    WHERE ct.content_type = %s 
-                    AND ct.content_id = c.id
-                    AND tg.name = 'Bootcamp Type'
-                    AND t.name = %s
-                )
-            )
+            SELECT c.* FROM {table_name} c
+            JOIN content_visibility cv
+                ON cv.content_type = %s AND cv.content_id = c.id AND cv.camp = %s
+            WHERE c.unit_id = %s
             ORDER BY c.id
             """,
-            (unit_id, user_camp, content_type, user_camp),
+            (content_type, user_camp, unit_id),
         )
 
         content = cursor.fetchall()
@@ -2606,6 +3325,304 @@ def get_content_with_tag_filtering(content_type: str, unit_id: int, user_id: int
             release_db_connection(conn)
 
 
+@dataclass
+class UnitContent:
+    """Content of one unit visible to one user, grouped by type and ordered by id."""
+
+    camp: Optional[str]
+    materials: List[Dict[str, Any]] = field(default_factory=list)
+    videos: List[Dict[str, Any]] = field(default_factory=list)
+    projects: List[Dict[str, Any]] = field(default_factory=list)
+    words: List[Dict[str, Any]] = field(default_factory=list)
+    quizzes: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def project(self) -> Optional[Dict[str, Any]]:
+        """The unit's project; units have at most one."""
+        return self.projects[0] if self.projects else None
+
+    @property
+    def quiz_id(self) -> Optional[int]:
+        return self.quizzes[0]["id"] if self.quizzes else None
+
+
+# Rows come back through to_jsonb, which turns these columns into ISO strings
+_CONTENT_TIMESTAMP_FIELDS = ("created_at", "updated_at")
+_CONTENT_DATE_FIELDS = ("deadline",)
+
+
+def _content_row_from_json(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore the date/time columns of a to_jsonb content row to Python types."""
+    for key in _CONTENT_TIMESTAMP_FIELDS:
+        if isinstance(row.get(key), str):
+            row[key] = datetime.fromisoformat(row[key])
+    for key in _CONTENT_DATE_FIELDS:
+        if isinstance(row.get(key), str):
+            row[key] = date.fromisoformat(row[key])
+    return row
+
+
+def load_unit_content(
+    unit_id: int, user_id: int, user_camp: Optional[str] = None
+) -> Optional[UnitContent]:
+    """
+    Load every content type of a unit that a user's camp may see, in one query.
+
+    Applies the same rule as get_content_with_tag_filtering (content_visibility
+    lists the user's camp for the item), but resolves the camp once and fetches materials, videos, projects, words and quizzes
+    with a single UNION ALL instead of one camp lookup and one query per type.
+
+    Args:
+        unit_id: Unit to load.
+        user_id: Viewer whose camp decides visibility.
+        user_camp: The viewer's camp, if the caller already knows it; looked
+            up inside the same query otherwise.
+
+    Returns:
+        UnitContent, empty if the user has no camp; None if the query fails.
+    """
+    selects = []
+    params: List[Any] = [user_camp, user_id]
+    for content_type, table_name in CONTENT_TABLES.items():
+        selects.append(
+            f"""
+            SELECT %s AS content_type, c.id, v.camp, to_jsonb(c) AS row
+            FROM {table_name} c
+            JOIN viewer v ON TRUE
+            JOIN content_visibility cv
+                ON cv.content_type = %s AND cv.content_id = c.id AND cv.camp = v.camp
+            WHERE c.unit_id = %s"""
+        )
+        params.extend([content_type, content_type, unit_id])
+
+    query = (
+        """
+        WITH viewer AS (
+            SELECT COALESCE(%s::varchar, (SELECT camp FROM users WHERE id = %s)) AS camp
+        )"""
+        + "\n            UNION ALL".join(selects)
+        + "\n        ORDER BY content_type, id"
+    )
+
+    content = UnitContent(camp=user_camp)
+    conn = None
+    try:
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    except Exception as e:
+        logger.error(f"Error loading content for unit {unit_id}: {str(e)}")
+        return None
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+    by_type = {
+        "material": content.materials,
+        "video": content.videos,
+        "project": content.projects,
+        "word": content.words,
+        "quiz": content.quizzes,
+    }
+    for content_type, _, camp, row in rows:
+        content.camp = camp
+        by_type[content_type].append(_content_row_from_json(row))
+
+    logger.info(
+        f"Loaded unit {unit_id} content for {content.camp} camp: "
+        f"{len(content.materials)} materials, {len(content.videos)} videos, "
+        f"{len(content.projects)} projects, {len(content.words)} words, "
+        f"{len(content.quizzes)} quizzes"
+    )
+    return content
+
+
+class UnitContentCache:
+    """
+    Per-worker cache of load_unit_content results, keyed by (unit_id, camp).
+
+    Unit content only changes when an admin edits it, so a cohort opening the
+    same units is served from memory. Every entry records the cache
+    generation it was loaded in; invalidate() bumps the generation, which
+    makes all older entries misses at once. Entries also expire after ttl
+    seconds, which bounds staleness when another worker made the change and
+    LISTEN/NOTIFY invalidation (CONTENT_CACHE_NOTIFY) is off.
+
+    Cached UnitContent objects are shared between requests and must not be
+    modified by callers.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: OrderedDict[Tuple[int, str], Tuple[int, float, UnitContent]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, unit_id: int, camp: str) -> Optional[UnitContent]:
+        key = (unit_id, camp)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry[0] != self.generation
+                or time.monotonic() - entry[1] > self.ttl
+            ):
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def put(self, unit_id: int, camp: str, content: UnitContent, generation: int) -> None:
+        """Store content loaded while the cache was at `generation`."""
+        with self._lock:
+            if generation != self.generation:
+                # Invalidated while loading; the result may already be stale
+                return
+            self._entries[(unit_id, camp)] = (generation, time.monotonic(), content)
+            self._entries.move_to_end((unit_id, camp))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.stats["invalidations"] += 1
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "generation": self.generation,
+            }
+
+
+CONTENT_CHANNEL = "content_changed"
+
+unit_content_cache = UnitContentCache(
+    ttl=float(os.getenv("CONTENT_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", "2000")),
+)
+_content_listener_pid: Optional[int] = None
+_content_listener_lock = threading.Lock()
+
+
+def content_notify_enabled() -> bool:
+    return os.getenv("CONTENT_CACHE_NOTIFY", "false").lower() == "true"
+
+
+def get_unit_content(unit_id: int, user_id: int, user_camp: str) -> UnitContent:
+    """
+    Unit content visible to a camp, from the worker's cache when possible.
+
+    Args:
+        unit_id: Unit to load.
+        user_id: Viewer, passed through to load_unit_content.
+        user_camp: The viewer's camp; content is cached per camp, not per user.
+
+    Returns:
+        UnitContent shared with other requests; treat it as read-only. Empty,
+        and not cached, if loading failed.
+    """
+    if unit_content_cache.ttl > 0:
+        if content_notify_enabled():
+            start_content_change_listener()
+        content = unit_content_cache.get(unit_id, user_camp)
+        if content is not None:
+            return content
+
+    generation = unit_content_cache.generation
+    content = load_unit_content(unit_id, user_id, user_camp)
+    if content is None:
+        # A transient database error must not show an empty unit until the ttl runs out
+        return UnitContent(camp=user_camp)
+    if unit_content_cache.ttl > 0:
+        unit_content_cache.put(unit_id, user_camp, content, generation)
+    return content
+
+
+def content_changed(cursor: Any) -> None:
+    """
+    Invalidate cached unit content after the current transaction's change.
+
+    Inside a request the local cache is cleared once the view has returned,
+    i.e. after the route committed, so a concurrent page load can't re-cache
+    the old rows in between. With CONTENT_CACHE_NOTIFY on, a NOTIFY is queued
+    on the same transaction; Postgres delivers it to every worker's listener
+    only if the transaction commits.
+    """
+    if content_notify_enabled():
+        cursor.execute(f"NOTIFY {CONTENT_CHANNEL}")
+
+    if not has_request_context():
+        unit_content_cache.invalidate()
+    elif not g.get("content_changed"):
+        g.content_changed = True
+
+        @after_this_request
+        def invalidate_unit_content(response: Any) -> Any:
+            unit_content_cache.invalidate()
+            return response
+
+
+def start_content_change_listener() -> None:
+    """Start this worker's LISTEN thread for content changes, once per process."""
+    global _content_listener_pid
+    if _content_listener_pid == os.getpid():
+        return
+    with _content_listener_lock:
+        if _content_listener_pid == os.getpid():
+            return
+        _content_listener_pid = os.getpid()
+        threading.Thread(
+            target=_listen_for_content_changes, name="content-listener", daemon=True
+        ).start()
+
+
+def _listen_for_content_changes() -> None:
+    """Clear the unit content cache whenever another worker commits a content change."""
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(
+                host=os.getenv("DB_HOST", "localhost"),
+                port=os.getenv("DB_PORT", "5432"),
+                database=os.getenv("DB_NAME", "fiftyone_learning"),
+                user=os.getenv("DB_USER", "admin"),
+                password=os.getenv("DB_PASSWORD", "admin123"),
+            )
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CONTENT_CHANNEL}")
+            # Changes may have been missed while not listening
+            unit_content_cache.invalidate()
+            logger.info(f"👂 Listening for content changes (pid {os.getpid()})")
+
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    unit_content_cache.invalidate()
+        except Exception as e:
+            logger.warning(f"Content change listener lost its connection: {str(e)}")
+            time.sleep(5)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
 def get_content_no_filtering(content_type: str, unit_id: int):
     """Get ALL content for a unit without any tag filtering - for testing"""
     conn = None
@@ -2661,6 +3678,8 @@ def assign_content_tags(content_type: str, content_id: int, tag_ids: List[int])
             """,
                 (content_type, content_id, tag_id),
             )
+        refresh_content_visibility(cursor, content_type, content_id)
+        content_changed(cursor)
         conn.commit()
         return True
     except Exception as e:
@@ -2678,7 +3697,7 @@ def get_available_tags_grouped() -> Dict[str, List[Dict[str, Any]]]:
     """Get all available tags grouped by tag group."""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         cursor.execute(
             """
@@ -2720,7 +3739,7 @@ def get_all_cohorts() -> List[Dict[str, Any]]:
     """Get all active cohorts."""
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         cursor.execute(
             """
@@ -2807,63 +3826,109 @@ def ensure_default_tags():
             release_db_connection(conn)
 
 
-def get_content_tags(content_type: str, content_id: int) -> List[str]:
-    """Get tag names for content."""
+def get_content_tags_map(
+    content_type: str, content_ids: Optional[List[int]] = None
+) -> Dict[int, List[str]]:
+    """
+    Tag names for many content items of one type, in one query.
+
+    Args:
+        content_type: One of CONTENT_TABLES.
+        content_ids: Items to look up; None loads every item of the type.
+
+    Returns:
+        Map of content_id to its tag names; untagged items are absent.
+    """
+    if content_ids is not None and not content_ids:
+        return {}
+
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT t.name FROM content_tags ct
+        query = """
+            SELECT ct.content_id, t.name FROM content_tags ct
             JOIN tags t ON ct.tag_id = t.id
-            WHERE ct.content_type = %s AND ct.content_id = %s
-        """,
-            (content_type, content_id),
-        )
-        return [row[0] for row in cursor.fetchall()]
+            WHERE ct.content_type = %s
+        """
+        params: List[Any] = [content_type]
+        if content_ids is not None:
+            query += " AND ct.content_id = ANY(%s)"
+            params.append(list(content_ids))
+        cursor.execute(query + " ORDER BY ct.content_id, ct.id", params)
+
+        tags: Dict[int, List[str]] = defaultdict(list)
+        for content_id, name in cursor.fetchall():
+            tags[content_id].append(name)
+        cursor.close()
+        return dict(tags)
     except Exception as e:
         logger.error(f"Error getting content tags: {str(e)}")
-        return []
+        return {}
     finally:
         if conn:
-            cursor.close()
             release_db_connection(conn)
 
 
-def assign_user_tags_by_names(
-    user_id: int, tag_names: List[str], assigned_by: str = "admin"
-) -> bool:
-    """Assign tags to user by tag names."""
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+def _replace_user_tags_by_names(
+    cursor: Any, user_id: int, tag_names: List[str], assigned_by: str
+) -> None:
+    """Replace a user's tags with the named ones on the caller's cursor."""
+    # Remove existing tags first
+    cursor.execute("DELETE FROM user_tags WHERE user_id = %s", (user_id,))
 
-        # Remove existing tags first
-        cursor.execute("DELETE FROM user_tags WHERE user_id = %s", (user_id,))
+    # Add new tags
+    for tag_name in tag_names:
+        cursor.execute(
+            """
+            SELECT id FROM tags WHERE name = %s AND is_active = TRUE
+        """,
+            (tag_name,),
+        )
+        tag_result = cursor.fetchone()
 
-        # Add new tags
-        for tag_name in tag_names:
+        if tag_result:
             cursor.execute(
                 """
-                SELECT id FROM tags WHERE name = %s AND is_active = TRUE
+                INSERT INTO user_tags (user_id, tag_id, assigned_by)
+                VALUES (%s, %s, %s)
+                ON CONFLICT DO NOTHING
             """,
-                (tag_name,),
+                (user_id, tag_result[0], assigned_by),
             )
-            tag_result = cursor.fetchone()
 
-            if tag_result:
-                cursor.execute(
-                    """
-                    INSERT INTO user_tags (user_id, tag_id, assigned_by)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """,
-                    (user_id, tag_result[0], assigned_by),
-                )
 
+def assign_user_tags_by_names(
+    user_id: int,
+    tag_names: List[str],
+    assigned_by: str = "admin",
+    cursor: Optional[Any] = None,
+) -> bool:
+    """
+    Assign tags to user by tag names.
+
+    Args:
+        user_id: User to tag.
+        tag_names: Names of the tags the user should have.
+        assigned_by: Recorded in user_tags.assigned_by.
+        cursor: Run inside the caller's transaction instead of committing;
+            errors are raised so the caller can roll back everything.
+
+    Returns:
+        True if the tags were assigned.
+    """
+    if cursor is not None:
+        _replace_user_tags_by_names(cursor, user_id, tag_names, assigned_by)
+        invalidate_user_profile(user_id)
+        return True
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        _replace_user_tags_by_names(cursor, user_id, tag_names, assigned_by)
         conn.commit()
+        invalidate_user_profile(user_id)
         return True
     except Exception as e:
         if conn:
@@ -2897,10 +3962,7 @@ def dashboard() -> Any:
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-        # Get user's camp
-        cursor.execute("SELECT camp FROM users WHERE id = %s", (user_id,))
-        user_result = cursor.fetchone()
-        user_camp = user_result["camp"] if user_result else None
+        user_camp = get_user_camp(user_id)
 
         # Get completed units count
         cursor.execute(
@@ -2987,6 +4049,7 @@ def set_language(language: str) -> Any:
                     (language, session["user_id"]),
                 )
                 conn.commit()
+                invalidate_user_profile(session["user_id"])
                 logger.info(
                     f"Language updated to {language} for user {session['user_id']}"
                 )
@@ -3022,9 +4085,7 @@ def unit(unit_id: int) -> Any:
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-        cursor.execute("SELECT camp FROM users WHERE id = %s", (user_id,))
-        result = cursor.fetchone()
-        user_camp = result["camp"] if result else None
+        user_camp = get_user_camp(user_id)
 
         if not user_camp:
             flash("Please contact admin to set your camp.", "error")
@@ -3069,14 +4130,7 @@ def unit(unit_id: int) -> Any:
                 flash("Error submitting project. Please try again.", "error")
 
         # Get content for the unit
-        materials = get_content_with_tag_filtering("material", unit_id, user_id)
-        videos = get_content_with_tag_filtering("video", unit_id, user_id)
-        projects_list = get_content_with_tag_filtering("project", unit_id, user_id)
-        words = get_content_with_tag_filtering("word", unit_id, user_id)
-        quizzes = get_content_with_tag_filtering("quiz", unit_id, user_id)
-
-        # Convert projects list to single project (backward compatibility)
-        project = projects_list[0] if projects_list else None
+        content = get_unit_content(unit_id, user_id, user_camp)
 
         # Get user progress
         progress = get_progress(user_id, unit_id)
@@ -3085,7 +4139,6 @@ def unit(unit_id: int) -> Any:
         quiz_attempt_info = None
         if quiz_attempted:
             quiz_attempt_info = get_quiz_attempt_info(user_id, unit_id)
-        quiz_id = quizzes[0]["id"] if quizzes else None
 
         cursor.close()
 
@@ -3093,14 +4146,17 @@ def unit(unit_id: int) -> Any:
             "unit.html",
             username=username,
             unit_id=unit_id,
-            project=project,
-            materials=materials,
-            videos=videos,
-            words=words,
+            project=content.project,
+            materials=content.materials,
+            material_urls=stored_file_urls(
+                [m["file_path"] for m in content.materials if m.get("file_path")]
+            ),
+            videos=content.videos,
+            words=content.words,
             project_completed=project_completed,
             quiz_attempted=quiz_attempted,
             quiz_attempt_info=quiz_attempt_info,
-            quiz_id=quiz_id,
+            quiz_id=content.quiz_id,
             user_camp=user_camp,
         )
 
@@ -3150,25 +4206,20 @@ def quiz(unit_id: int) -> Any:
         # Get quiz questions for this unit
         cursor.execute(
             """
-            SELECT DISTINCT q.* FROM quizzes q
-            WHERE q.unit_id = %s 
+            SELECT q.* FROM quizzes q
+            WHERE q.unit_id = %s
             AND (
-                q.camp = %s 
-                OR q.camp = 'both'
-                OR 
-                EXISTS (
-                    SELECT 1 FROM content_tags ct
-                    JOIN tags t ON ct.tag_id = t.id
-                    JOIN tag_groups tg ON t.tag_group_id = tg.id
-                    WHERE ct.content_type = 'quiz' 
-                    AND ct.content_id = q.id
-                    AND tg.name = 'Bootcamp Type'
-                    AND t.name = %s
+                q.camp = 'both'
+                OR EXISTS (
+                    SELECT 1 FROM content_visibility cv
+                    WHERE cv.content_type = 'quiz'
+                    AND cv.content_id = q.id
+                    AND cv.camp = %s
                 )
             )
             ORDER BY q.id
             """,
-            (unit_id, user_camp, user_camp),
+            (unit_id, user_camp),
         )
         
         quizzes = cursor.fetchall()
@@ -3204,81 +4255,17 @@ def quiz(unit_id: int) -> Any:
 
                 logger.info(f"Processed user answers: {user_answers}")
 
-                # Calculate score
-                correct_answers = 0
-                total_questions = len(quizzes)
-                
-                # Create quiz attempt record
-                cursor.execute(
-                    """
-                    INSERT INTO quiz_attempts (user_id, unit_id, attempted_at, score, passed)
-                    VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s)
-                    RETURNING id
-                """,
-                    (user_id, unit_id, 0, False),  # Temporary values, will update later
-                )
-                attempt_id = cursor.fetchone()['id']
-                logger.info(f"Created quiz attempt with ID: {attempt_id}")
+                # Grade in memory, then write everything in one statement
+                grade = grade_quiz_answers(quizzes, user_answers)
+                score = grade["score"]
+                passed = grade["passed"]
+                correct_answers = grade["correct"]
+                total_questions = grade["total"]
 
-                # Process each question and save responses
-                for quiz_question in quizzes:
-                    question_id = quiz_question['id']
-                    correct_answer = quiz_question['correct_answer']
-                    user_answer = user_answers.get(question_id)
-                    
-                    logger.info(f"Question {question_id}: User answer: {user_answer}, Correct: {correct_answer}")
-                    
-                    is_correct = False
-                    if user_answer is not None:
-                        is_correct = (user_answer == correct_answer)
-                        if is_correct:
-                            correct_answers += 1
-                            logger.info(f"Question {question_id}: CORRECT!")
-                        else:
-                            logger.info(f"Question {question_id}: Wrong - user said {user_answer}, correct is {correct_answer}")
-                    else:
-                        logger.info(f"Question {question_id}: No answer provided")
-
-                    # Save individual question response
-                    cursor.execute(
-                        """
-                        INSERT INTO quiz_responses (attempt_id, question_id, user_answer, is_correct)
-                        VALUES (%s, %s, %s, %s)
-                    """,
-                        (attempt_id, question_id, user_answer, is_correct),
-                    )
-
-                # Calculate final score and pass status
-                score = round((correct_answers / total_questions) * 100) if total_questions > 0 else 0
-                passed = score >= 70  # 70% passing grade
-                
                 logger.info(f"Final score: {correct_answers}/{total_questions} = {score}% (passed: {passed})")
 
-                # Update quiz attempt with final score
-                cursor.execute(
-                    """
-                    UPDATE quiz_attempts 
-                    SET score = %s, passed = %s 
-                    WHERE id = %s
-                """,
-                    (score, passed, attempt_id),
-                )
-
-                # Update user progress
-                cursor.execute(
-                    """
-                    INSERT INTO progress (user_id, unit_number, quiz_score, completed)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (user_id, unit_number) 
-                    DO UPDATE SET quiz_score = EXCLUDED.quiz_score, 
-                                  completed = CASE WHEN EXCLUDED.quiz_score >= 70 THEN 1 ELSE progress.completed END
-                """,
-                    (user_id, unit_id, score, 1 if passed else 0),
-                )
-
-                # Update team score if user is part of a team
-                if passed:
-                    update_team_score(user_id, 10)  # Award 10 points for passing quiz
+                attempt_id = record_quiz_submission(cursor, user_id, unit_id, grade)
+                logger.info(f"Created quiz attempt with ID: {attempt_id}")
 
                 conn.commit()
                 logger.info("Quiz submission completed successfully")
@@ -3504,6 +4491,7 @@ def admin_fix_all_user_tags():
             fixed_count += 1
 
     conn.commit()
+    invalidate_user_profile()
     cursor.close()
     release_db_connection(conn)
 
@@ -3594,6 +4582,7 @@ def admin_emergency_fix_all_tags():
                 errors.append(f"❌ {username}: {str(user_error)}")
 
         conn.commit()
+        invalidate_user_profile()
         cursor.close()
 
         result_html = f"""
@@ -3675,7 +4664,557 @@ def feedback() -> Any:
                 if conn:
                     release_db_connection(conn)
 
-    return render_template("feedback.html", username=username)
+    return render_template("feedback.html", username=username)
+
+
+# ==============================================
+# STORED DOCUMENT STREAMING
+# ==============================================
+
+# Metadata of a stored_documents row, without reading its content.
+# size_bytes and content_hash are recorded at upload; octet_length() on a
+# TOASTed bytea reads only the header for rows that predate size_bytes.
+STORED_DOCUMENT_INFO_COLUMNS = (
+    "id, filename, content_type, COALESCE(size_bytes, octet_length(content)) AS size, "
+    "upload_date, content_hash"
+)
+
+# Content-addressed URLs never change meaning, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Endpoints whose file responses set their own Cache-Control (see add_header)
+CACHEABLE_FILE_ENDPOINTS = {
+    "download_file_from_db",
+    "serve_static_upload",
+    "download_material",
+    "serve_blob",
+    "serve_video",
+}
+
+_CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class StoredDocumentAliasCache:
+    """
+    Per-worker map from requested file names to stored_documents ids.
+
+    Pages ask for the same few names over and over, including names that
+    only fuzzy-match a stored file and names that match nothing at all, so
+    both outcomes are cached: a found id for ttl seconds, a miss for
+    negative_ttl seconds. Uploads and deletes in this worker call
+    invalidate(); the ttls bound staleness for changes made elsewhere.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: OrderedDict[str, Tuple[float, Optional[int]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+    def lookup(self, name: str) -> Tuple[bool, Optional[int]]:
+        """
+        Returns:
+            (cached, doc_id); doc_id is None for a cached miss.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or time.monotonic() > entry[0]:
+                self.stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(name)
+            self.stats["hits" if entry[1] is not None else "negative_hits"] += 1
+            return True, entry[1]
+
+    def put(self, name: str, doc_id: Optional[int], generation: int) -> None:
+        """Record a resolution made while the cache was at `generation`."""
+        ttl = self.ttl if doc_id is not None else self.negative_ttl
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[name] = (time.monotonic() + ttl, doc_id)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+stored_document_aliases = StoredDocumentAliasCache(
+    ttl=float(os.getenv("FILE_ALIAS_CACHE_TTL", "300")),
+    negative_ttl=float(os.getenv("FILE_ALIAS_NEGATIVE_TTL", "30")),
+    max_entries=int(os.getenv("FILE_ALIAS_CACHE_MAX_ENTRIES", "10000")),
+)
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _resolve_stored_document(cursor: Any, name: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Find the stored document best matching a requested file name.
+
+    Tried in order, first match wins: exact name, case-insensitive name,
+    same ending as the part after the last underscore (timestamped upload
+    names like "unit_1_Chinese_20250714_141026_deck.pdf"), and finally any
+    name containing one of the underscore-separated parts. The first three
+    are one statement over the unique, filename_normalized and
+    filename_suffix indexes; the last only runs when they all miss.
+
+    Returns:
+        Row selected with STORED_DOCUMENT_INFO_COLUMNS, or None.
+    """
+    lowered = name.lower()
+    base_name = lowered.split("_")[-1]
+    cursor.execute(
+        f"""
+        SELECT {STORED_DOCUMENT_INFO_COLUMNS} FROM stored_documents
+        WHERE filename = %(name)s
+           OR filename_normalized = %(lowered)s
+           OR filename_suffix LIKE %(suffix)s
+        ORDER BY CASE
+                     WHEN filename = %(name)s THEN 0
+                     WHEN filename_normalized = %(lowered)s THEN 1
+                     ELSE 2
+                 END,
+                 id
+        LIMIT 1
+        """,
+        {
+            "name": name,
+            "lowered": lowered,
+            "suffix": _like_escape(base_name[::-1]) + "%",
+        },
+    )
+    result = cursor.fetchone()
+    if result:
+        return result
+
+    stem, ext = os.path.splitext(lowered)
+    if ext not in (".pdf", ".ppt", ".pptx"):
+        stem = lowered
+    patterns = [f"%{_like_escape(part)}%" for part in stem.split("_") if len(part) > 3]
+    if not patterns:
+        return None
+    cursor.execute(
+        f"""
+        SELECT {STORED_DOCUMENT_INFO_COLUMNS}
+        FROM stored_documents,
+             LATERAL (
+                 SELECT min(p.ord) AS part_rank
+                 FROM unnest(%s::text[]) WITH ORDINALITY AS p(pattern, ord)
+                 WHERE filename_normalized LIKE p.pattern
+             ) matched
+        WHERE matched.part_rank IS NOT NULL
+        ORDER BY matched.part_rank, id
+        LIMIT 1
+        """,
+        (patterns,),
+    )
+    return cursor.fetchone()
+
+
+def find_stored_document(cursor: Any, name: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Metadata of the stored document a requested file name resolves to.
+
+    Resolutions, including misses, are cached in stored_document_aliases,
+    so a repeat request is one primary-key lookup (or none for a miss).
+
+    Args:
+        cursor: Database cursor.
+        name: Requested file name, without any path.
+
+    Returns:
+        Row selected with STORED_DOCUMENT_INFO_COLUMNS, or None.
+    """
+    cached, doc_id = stored_document_aliases.lookup(name)
+    if cached:
+        if doc_id is None:
+            return None
+        cursor.execute(
+            f"SELECT {STORED_DOCUMENT_INFO_COLUMNS} FROM stored_documents WHERE id = %s",
+            (doc_id,),
+        )
+        result = cursor.fetchone()
+        if result:
+            return result
+        # Deleted by another worker; resolve again
+        stored_document_aliases.forget(name)
+
+    generation = stored_document_aliases.generation
+    result = _resolve_stored_document(cursor, name)
+    stored_document_aliases.put(name, result[0] if result else None, generation)
+    return result
+
+
+def get_blob_chunk_size() -> int:
+    """Bytes fetched from stored_documents.content per query while streaming."""
+    return max(int(os.getenv("BLOB_CHUNK_SIZE", str(1024 * 1024))), 64 * 1024)
+
+
+def iter_stored_document(
+    doc_id: int, start: int, end: int, content_hash: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Yield bytes [start, end) of a stored document, one substring() window at a time.
+
+    Each window is a separate short query on a pooled connection that is
+    returned straight away, so memory per download is bounded by the chunk
+    size and a slow client doesn't pin a connection. This runs while the
+    response is sent, after the request context is gone.
+
+    With content_hash, every window also requires the row to still hold that
+    content, so a re-upload mid-download ends the stream instead of splicing
+    the new file's bytes under the old ETag.
+    """
+    chunk_size = get_blob_chunk_size()
+    offset = start
+    while offset < end:
+        length = min(chunk_size, end - offset)
+        conn = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            if content_hash:
+                cursor.execute(
+                    "SELECT substring(content FROM %s FOR %s) FROM stored_documents "
+                    "WHERE id = %s AND content_hash = %s",
+                    (offset + 1, length, doc_id, content_hash),
+                )
+            else:
+                cursor.execute(
+                    "SELECT substring(content FROM %s FOR %s) FROM stored_documents WHERE id = %s",
+                    (offset + 1, length, doc_id),
+                )
+            row = cursor.fetchone()
+            cursor.close()
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+        if not row or not row[0]:
+            logger.warning(
+                f"Stored document {doc_id} changed or disappeared at byte {offset}"
+            )
+            return
+        chunk = bytes(row[0])
+        offset += len(chunk)
+        yield chunk
+
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    """Content-Disposition value that survives non-ASCII file names."""
+    try:
+        filename.encode("latin-1")
+        return f'{disposition}; filename="{filename}"'
+    except UnicodeEncodeError:
+        ascii_name = filename.encode("ascii", "ignore").decode() or "download"
+        return (
+            f'{disposition}; filename="{ascii_name}"; '
+            f"filename*=UTF-8''{quote(filename)}"
+        )
+
+
+def get_stored_document_hashes(filenames: List[str]) -> Dict[str, str]:
+    """
+    Map stored documents' filenames to their content hashes.
+
+    Args:
+        filenames: Names to look up, e.g. one unit's material files.
+
+    Returns:
+        {filename: sha256 hex} for the names that are stored; empty if the
+        lookup fails.
+    """
+    if not filenames:
+        return {}
+    conn = None
+    try:
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT filename, content_hash FROM stored_documents
+            WHERE filename = ANY(%s) AND content_hash IS NOT NULL
+            """,
+            (list(filenames),),
+        )
+        hashes = dict(cursor.fetchall())
+        cursor.close()
+        return hashes
+    except Exception as e:
+        logger.error(f"Error loading stored document hashes: {str(e)}")
+        return {}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+
+def stored_file_url(filename: str, content_hash: Optional[str]) -> str:
+    """
+    URL for displaying an uploaded file.
+
+    Stored documents get a content-addressed /blob/ URL that can be cached
+    forever; a re-upload changes the hash and therefore the URL. Files only
+    on disk keep their /static/uploads/ URL.
+    """
+    if content_hash:
+        return url_for(
+            "serve_blob", content_hash=content_hash, filename=os.path.basename(filename)
+        )
+    return url_for("static", filename="uploads/" + filename)
+
+
+def stored_file_urls(file_paths: List[str]) -> Dict[str, str]:
+    """
+    stored_file_url for several files, with their hashes looked up in one query.
+
+    Args:
+        file_paths: Upload paths, e.g. the file_path of a unit's materials.
+
+    Returns:
+        {file_path: URL}
+    """
+    hashes = get_stored_document_hashes(
+        sorted({os.path.basename(path) for path in file_paths})
+    )
+    return {
+        path: stored_file_url(path, hashes.get(os.path.basename(path)))
+        for path in file_paths
+    }
+
+
+def _requested_byte_range(
+    size: int, last_modified: Optional[datetime], etag: Optional[str] = None
+) -> Any:
+    """
+    The byte range to send for the current request.
+
+    Returns:
+        None to send the whole file, (start, end) for a satisfiable Range
+        header, or False if the range can't be satisfied.
+    """
+    byte_range = request.range
+    if byte_range is None:
+        return None
+
+    # If-Range: only honour the Range if the client's copy is still current
+    if_range = request.if_range
+    if if_range.etag:
+        if not etag or if_range.etag != etag:
+            return None
+    elif if_range.date:
+        if not (
+            last_modified
+            and last_modified.replace(microsecond=0) <= if_range.date.replace(tzinfo=None)
+        ):
+            return None
+
+    requested = byte_range.range_for_length(size)
+    return requested if requested else False
+
+
+def stored_document_response(
+    doc: Tuple[Any, ...],
+    download_name: str,
+    as_attachment: bool,
+    mimetype: Optional[str] = None,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """
+    Stream a stored_documents row to the client, honouring conditional and
+    Range requests.
+
+    The content hash is the strong ETag, so a client revalidating a copy it
+    already has gets a 304 from the metadata row alone.
+
+    Args:
+        doc: Row selected with STORED_DOCUMENT_INFO_COLUMNS.
+        download_name: File name offered to the browser.
+        as_attachment: Download (attachment) rather than display (inline).
+        mimetype: Overrides the stored content type.
+        cache_control: Cache-Control header value, if any.
+
+    Returns:
+        200 with the whole file, 206 with the requested range, 304, or 416.
+    """
+    doc_id, _, content_type, size, upload_date, content_hash = doc
+    size = size or 0
+
+    headers = {}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if content_hash:
+        headers["ETag"] = f'"{content_hash}"'
+
+    if content_hash and request.if_none_match.contains(content_hash):
+        response = Response(status=304, headers=headers)
+        if upload_date:
+            response.last_modified = upload_date
+        return response
+
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Disposition"] = _content_disposition(
+        "attachment" if as_attachment else "inline", download_name
+    )
+
+    byte_range = _requested_byte_range(size, upload_date, content_hash)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    status = 200
+    start, end = 0, size
+    if byte_range:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+
+    response = Response(
+        iter_stored_document(doc_id, start, end, content_hash),
+        status=status,
+        mimetype=mimetype or content_type or "application/octet-stream",
+        headers=headers,
+        direct_passthrough=True,
+    )
+    if upload_date:
+        response.last_modified = upload_date
+    return response
+
+
+def get_media_read_size() -> int:
+    """Bytes read from disk per chunk when the app streams a media file itself."""
+    return max(int(os.getenv("MEDIA_READ_SIZE", str(512 * 1024))), 64 * 1024)
+
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yield bytes [start, end) of a file on disk.
+
+    The file is opened inside the generator, so it is still open while the
+    response is being sent and is closed when sending finishes or stops.
+    """
+    read_size = get_media_read_size()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(read_size, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+def media_file_response(
+    directory: str,
+    filename: str,
+    as_attachment: bool = False,
+    mimetype: Optional[str] = None,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """
+    Serve a file from disk with validators, Range support and optional
+    proxy offload.
+
+    The ETag and Last-Modified come from the file's size and mtime, so
+    If-None-Match / If-Modified-Since get a 304 without opening the file.
+    With MEDIA_SENDFILE set to "x-sendfile" (Apache/lighttpd) or
+    "x-accel-redirect" (nginx, files exposed under MEDIA_ACCEL_PREFIX as an
+    internal location) the proxy sends the bytes and handles Range itself;
+    otherwise the app streams the requested range in MEDIA_READ_SIZE reads.
+
+    Args:
+        directory: Directory the file must be inside.
+        filename: Path relative to directory.
+        as_attachment: Download (attachment) rather than display (inline).
+        mimetype: Content type; guessed from the file name if not given.
+        cache_control: Cache-Control header value, if any.
+
+    Returns:
+        200, 206, 304 or 416 response; 404 if the file doesn't exist.
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        return Response("File not found", status=404)
+
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = datetime.utcfromtimestamp(int(stat.st_mtime))
+    etag = f"{stat.st_mtime_ns:x}-{size:x}"
+
+    headers = {"ETag": f'"{etag}"'}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and last_modified <= since.replace(tzinfo=None)
+    if not_modified:
+        response = Response(status=304, headers=headers)
+        response.last_modified = last_modified
+        return response
+
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Disposition"] = _content_disposition(
+        "attachment" if as_attachment else "inline", os.path.basename(path)
+    )
+    mimetype = (
+        mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    )
+
+    offload = os.getenv("MEDIA_SENDFILE", "").lower()
+    if offload == "x-sendfile":
+        headers["X-Sendfile"] = os.path.abspath(path)
+    elif offload == "x-accel-redirect":
+        relative = os.path.relpath(path, UPLOAD_FOLDER).replace(os.sep, "/")
+        prefix = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-uploads/")
+        headers["X-Accel-Redirect"] = quote(prefix.rstrip("/") + "/" + relative)
+    if offload in ("x-sendfile", "x-accel-redirect"):
+        response = Response(mimetype=mimetype, headers=headers)
+        response.last_modified = last_modified
+        return response
+
+    byte_range = _requested_byte_range(size, last_modified, etag)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    status = 200
+    start, end = 0, size
+    if byte_range:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+
+    response = Response(
+        iter_file_range(path, start, end),
+        status=status,
+        mimetype=mimetype,
+        headers=headers,
+        direct_passthrough=True,
+    )
+    response.last_modified = last_modified
+    return response
 
 
 @app.route("/download_file/<filename>")
@@ -3690,9 +5229,9 @@ def download_file_from_db(filename):
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Get file from database
+        # Get file metadata from database; content is streamed in chunks
         cursor.execute(
-            "SELECT content, content_type FROM stored_documents WHERE filename = %s",
+            f"SELECT {STORED_DOCUMENT_INFO_COLUMNS} FROM stored_documents WHERE filename = %s",
             (filename,),
         )
 
@@ -3713,17 +5252,8 @@ def download_file_from_db(filename):
             flash(f"File '{filename}' not found.", "error")
             return redirect(request.referrer or url_for("dashboard"))
 
-        content, content_type = result
-
-        # Create a BytesIO object from the database content
-        file_data = io.BytesIO(content)
-        file_data.seek(0)
-
-        return send_file(
-            file_data,
-            mimetype=content_type or "application/octet-stream",
-            as_attachment=True,
-            download_name=filename,
+        return stored_document_response(
+            result, filename, as_attachment=True, cache_control="private, no-cache"
         )
 
     except Exception as e:
@@ -3747,59 +5277,11 @@ def serve_static_upload(filename):
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Strategy 1: Try exact match
-        cursor.execute(
-            "SELECT content, content_type FROM stored_documents WHERE filename = %s",
-            (clean_filename,),
-        )
-        result = cursor.fetchone()
-
-        if not result:
-            # Strategy 2: Try case-insensitive match
-            cursor.execute(
-                "SELECT content, content_type FROM stored_documents WHERE LOWER(filename) = LOWER(%s)",
-                (clean_filename,),
-            )
-            result = cursor.fetchone()
-
-        if not result:
-            # Strategy 3: Try partial match (remove timestamp prefixes)
-            # Handle filenames like "unit_1_Chinese_20250714_141026_E-51Talk-AI-Unit-one.pdf"
-            # Look for files that end with the same base name
-            base_name = (
-                clean_filename.split("_")[-1]
-                if "_" in clean_filename
-                else clean_filename
-            )
-            cursor.execute(
-                "SELECT content, content_type FROM stored_documents WHERE filename LIKE %s",
-                (f"%{base_name}",),
-            )
-            result = cursor.fetchone()
-
-        if not result:
-            # Strategy 4: Try matching the original file name pattern
-            # Look for files that contain key parts of the requested filename
-            name_parts = (
-                clean_filename.replace(".pdf", "")
-                .replace(".ppt", "")
-                .replace(".pptx", "")
-                .split("_")
-            )
-            for part in name_parts:
-                if len(part) > 3:  # Only use meaningful parts
-                    cursor.execute(
-                        "SELECT content, content_type FROM stored_documents WHERE filename LIKE %s",
-                        (f"%{part}%",),
-                    )
-                    result = cursor.fetchone()
-                    if result:
-                        break
-
+        result = find_stored_document(cursor, clean_filename)
         cursor.close()
 
         if result:
-            content, content_type = result
+            content_type = result[2]
 
             # Determine the correct content type if not set
             if not content_type:
@@ -3810,16 +5292,13 @@ def serve_static_upload(filename):
                 else:
                     content_type = "application/octet-stream"
 
-            # Create response
-            response = app.response_class(
-                content,
+            return stored_document_response(
+                result,
+                clean_filename,
+                as_attachment=False,
                 mimetype=content_type,
-                headers={
-                    "Content-Disposition": f"inline; filename={clean_filename}",
-                    "Cache-Control": "public, max-age=3600",
-                },
+                cache_control="public, max-age=3600",
             )
-            return response
 
     except Exception as e:
         logger.error(f"Database error serving {filename}: {str(e)}")
@@ -3839,6 +5318,53 @@ def serve_static_upload(filename):
     return "File not found", 404
 
 
+@app.route("/blob/<content_hash>/<path:filename>")
+def serve_blob(content_hash: str, filename: str) -> Any:
+    """
+    Serve a stored document by content hash, cacheable for a year.
+
+    The trailing file name is only for the browser. A hash no longer in the
+    table (the file was re-uploaded) falls back to the by-name URL.
+    """
+    if not _CONTENT_HASH_RE.match(content_hash):
+        return "File not found", 404
+
+    # The URL names the content, so a matching validator needs no lookup
+    if request.if_none_match.contains(content_hash):
+        response = Response(status=304)
+        response.set_etag(content_hash)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    conn = None
+    result = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {STORED_DOCUMENT_INFO_COLUMNS} FROM stored_documents "
+            "WHERE content_hash = %s ORDER BY id LIMIT 1",
+            (content_hash,),
+        )
+        result = cursor.fetchone()
+        cursor.close()
+    except Exception as e:
+        logger.error(f"Database error serving blob {content_hash}: {str(e)}")
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+    if not result:
+        return redirect(url_for("serve_static_upload", filename=filename))
+
+    return stored_document_response(
+        result,
+        os.path.basename(filename),
+        as_attachment=False,
+        cache_control=IMMUTABLE_CACHE_CONTROL,
+    )
+
+
 @app.route("/download_material/<path:filename>")
 def download_material(filename: str) -> Any:
     """Handle material file download with database support."""
@@ -3858,7 +5384,7 @@ def download_material(filename: str) -> Any:
         cursor = conn.cursor()
 
         cursor.execute(
-            "SELECT content, content_type FROM stored_documents WHERE filename = %s",
+            f"SELECT {STORED_DOCUMENT_INFO_COLUMNS} FROM stored_documents WHERE filename = %s",
             (clean_filename,),
         )
 
@@ -3866,15 +5392,11 @@ def download_material(filename: str) -> Any:
         cursor.close()
 
         if result:
-            content, content_type = result
-            file_data = io.BytesIO(content)
-            file_data.seek(0)
-
-            return send_file(
-                file_data,
-                mimetype=content_type or "application/octet-stream",
+            return stored_document_response(
+                result,
+                clean_filename,
                 as_attachment=True,
-                download_name=clean_filename,
+                cache_control="private, no-cache",
             )
     except Exception as e:
         logger.error(f"Database download error: {str(e)}")
@@ -4049,13 +5571,143 @@ def ai_assistant() -> Any:
     )
 
 
+# ===============================================
+# AI ASSISTANT API
+# ===============================================
+
+AI_LANGUAGE_PREFIXES = {
+    "en": "",  # No prefix for English
+    "zh": "请用中文回答：",
+    "ar": "يرجى الإجابة باللغة العربية: ",
+}
+
+AI_PERSONALITY_ADDITIONS = {
+    "en": {
+        "greeting": "\n\n💡 *Tip: You can ask me about course materials, explanations, or just chat about learning!*",
+        "general": "\n\n📚 *Feel free to ask me anything else about your studies!*",
+        "document_based": "\n\n📖 *This answer is based on your course materials.*",
+        "no_documents": "\n\n📁 *Once you upload course materials, I'll be able to provide more specific help!*",
+    },
+    "zh": {
+        "greeting": "\n\n💡 *提示：您可以询问课程材料、解释或只是聊聊学习！*",
+        "general": "\n\n📚 *请随时询问其他关于学习的问题！*",
+        "document_based": "\n\n📖 *此答案基于您的课程材料。*",
+        "no_documents": "\n\n📁 *上传课程材料后，我将能够提供更具体的帮助！*",
+    },
+    "ar": {
+        "greeting": "\n\n💡 *نصيحة: يمكنك أن تسألني عن المواد الدراسية أو التفسيرات أو مجرد الدردشة حول التعلم!*",
+        "general": "\n\n📚 *لا تتردد في سؤالي أي شيء آخر عن دراستك!*",
+        "document_based": "\n\n📖 *هذه الإجابة مبنية على موادك الدراسية.*",
+        "no_documents": "\n\n📁 *بمجرد رفع المواد الدراسية، سأتمكن من تقديم مساعدة أكثر تحديداً!*",
+    },
+}
+
+AI_FALLBACK_MESSAGES = {
+    "en": "I'm here to help! Could you tell me more about what you'd like to know?",
+    "zh": "我在这里帮助您！您能告诉我更多关于您想了解什么吗？",
+    "ar": "أنا هنا للمساعدة! هل يمكنك إخباري المزيد عما تريد معرفته؟",
+}
+
+
+def add_language_prefix(question: str, user_language: str) -> str:
+    """Ask the model to answer in the user's language."""
+    prefix = AI_LANGUAGE_PREFIXES.get(user_language, "")
+    return f"{prefix}{question}" if prefix else question
+
+
+def personality_addition(conversation_type: str, user_language: str) -> str:
+    """Closing line appended to an assistant answer of the given type."""
+    lang_additions = AI_PERSONALITY_ADDITIONS.get(
+        user_language, AI_PERSONALITY_ADDITIONS["en"]
+    )
+    return lang_additions.get(conversation_type, "")
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_ai_answer(
+    qa_system: Any, question: str, user_id: str, user_language: str, start_time: float
+) -> Response:
+    """
+    Stream an assistant answer to the browser as server-sent events.
+
+    Events are "meta" (sources, conversation_type), "token" (text) as GPT
+    produces it, then "done" with the full answer. QA history and request
+    metrics are saved once the stream ends, with the text sent so far if the
+    client disconnects first.
+    """
+    enhanced_question = add_language_prefix(question, user_language)
+
+    def generate():
+        answer = ""
+        streamed = []
+        success = False
+        try:
+            for item in qa_system.answer_question_stream(enhanced_question, user_id=user_id):
+                if item["event"] == "token":
+                    streamed.append(item["text"])
+                    yield sse_event("token", {"text": item["text"]})
+                elif item["event"] == "meta":
+                    yield sse_event("meta", {
+                        "sources": item["sources"],
+                        "conversation_type": item["conversation_type"],
+                    })
+                else:
+                    answer = item["answer"]
+                    addition = personality_addition(item["conversation_type"], user_language)
+                    if addition:
+                        answer += addition
+                        yield sse_event("token", {"text": addition})
+                    if not answer.strip():
+                        answer = AI_FALLBACK_MESSAGES.get(user_language, AI_FALLBACK_MESSAGES["en"])
+                        yield sse_event("token", {"text": answer})
+                    success = True
+                    yield sse_event("done", {
+                        "success": True,
+                        "answer": answer,
+                        "sources": item["sources"],
+                        "conversation_type": item["conversation_type"],
+                        "question": question,
+                        "language": user_language,
+                    })
+        except Exception as e:
+            logger.error(f"Ask AI stream error: {str(e)}")
+            yield sse_event("error", {"success": False, "conversation_type": "error"})
+        finally:
+            # Runs on completion and when the client disconnects mid-stream;
+            # then the history keeps the part of the answer already sent
+            answer = answer or "".join(streamed)
+            if answer.strip():
+                try:
+                    save_qa_history_sync(int(user_id), question, answer)
+                except Exception as db_error:
+                    logger.error(f"Error saving QA history in API: {str(db_error)}")
+            track_qa_request(user_id, time.time() - start_time, success)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/ask_ai_enhanced", methods=["POST"])
 @login_required
 @limiter.limit("20 per minute")
 def ask_ai_enhanced() -> Any:
-    """AI assistant with language support."""
+    """
+    AI assistant with language support.
+
+    Send {"stream": true} to receive the answer as server-sent events
+    (see stream_ai_answer) instead of a single JSON response. Validation
+    errors, empty questions and start-up states are still answered as JSON.
+    """
     start_time = time.time()
     success = False
+    streaming = False
     user_id = str(session.get("user_id", "unknown"))
 
     if not session.get("authenticated"):
@@ -4138,16 +5790,14 @@ def ask_ai_enhanced() -> Any:
                     503,
                 )
 
+        if data.get("stream"):
+            # History and metrics are recorded when the stream finishes
+            streaming = True
+            return stream_ai_answer(qa_system, question, user_id, user_language, start_time)
+
         try:
             # Add language context to the question
-            language_prefixes = {
-                "en": "",  # No prefix for English
-                "zh": "请用中文回答：",
-                "ar": "يرجى الإجابة باللغة العربية: ",
-            }
-
-            prefix = language_prefixes.get(user_language, "")
-            enhanced_question = f"{prefix}{question}" if prefix else question
+            enhanced_question = add_language_prefix(question, user_language)
 
             qa_response = qa_system.answer_question(enhanced_question, user_id=user_id)
 
@@ -4159,40 +5809,10 @@ def ask_ai_enhanced() -> Any:
             conversation_type = qa_response.get("conversation_type", "general")
 
             # Add language-specific personality additions
-            personality_additions = {
-                "en": {
-                    "greeting": "\n\n💡 *Tip: You can ask me about course materials, explanations, or just chat about learning!*",
-                    "general": "\n\n📚 *Feel free to ask me anything else about your studies!*",
-                    "document_based": "\n\n📖 *This answer is based on your course materials.*",
-                    "no_documents": "\n\n📁 *Once you upload course materials, I'll be able to provide more specific help!*",
-                },
-                "zh": {
-                    "greeting": "\n\n💡 *提示：您可以询问课程材料、解释或只是聊聊学习！*",
-                    "general": "\n\n📚 *请随时询问其他关于学习的问题！*",
-                    "document_based": "\n\n📖 *此答案基于您的课程材料。*",
-                    "no_documents": "\n\n📁 *上传课程材料后，我将能够提供更具体的帮助！*",
-                },
-                "ar": {
-                    "greeting": "\n\n💡 *نصيحة: يمكنك أن تسألني عن المواد الدراسية أو التفسيرات أو مجرد الدردشة حول التعلم!*",
-                    "general": "\n\n📚 *لا تتردد في سؤالي أي شيء آخر عن دراستك!*",
-                    "document_based": "\n\n📖 *هذه الإجابة مبنية على موادك الدراسية.*",
-                    "no_documents": "\n\n📁 *بمجرد رفع المواد الدراسية، سأتمكن من تقديم مساعدة أكثر تحديداً!*",
-                },
-            }
-
-            lang_additions = personality_additions.get(
-                user_language, personality_additions["en"]
-            )
-            if conversation_type in lang_additions:
-                answer += lang_additions[conversation_type]
+            answer += personality_addition(conversation_type, user_language)
 
             if not answer.strip():
-                fallback_msg = {
-                    "en": "I'm here to help! Could you tell me more about what you'd like to know?",
-                    "zh": "我在这里帮助您！您能告诉我更多关于您想了解什么吗？",
-                    "ar": "أنا هنا للمساعدة! هل يمكنك إخباري المزيد عما تريد معرفته؟",
-                }
-                answer = fallback_msg.get(user_language, fallback_msg["en"])
+                answer = AI_FALLBACK_MESSAGES.get(user_language, AI_FALLBACK_MESSAGES["en"])
 
         except Exception as qa_error:
             logger.error(f"QA system error: {str(qa_error)}")
@@ -4249,8 +5869,9 @@ def ask_ai_enhanced() -> Any:
         )
 
     finally:
-        response_time = time.time() - start_time
-        track_qa_request(user_id, response_time, success)
+        if not streaming:
+            response_time = time.time() - start_time
+            track_qa_request(user_id, response_time, success)
 
 
 @app.route("/ask_ai", methods=["POST"])
@@ -4945,6 +6566,7 @@ def admin_user_tags(user_id):
                 )
 
             conn.commit()
+            invalidate_user_profile(user_id)
             flash("User tags updated successfully!", "success")
 
         # Get all tags with assignment status
@@ -5299,6 +6921,7 @@ def admin_edit_user(user_id):
                 )
 
             conn.commit()
+            invalidate_user_profile(user_id)
             flash("User updated successfully!", "success")
             # Refresh user data
             cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
@@ -5326,6 +6949,7 @@ def admin_delete_user(user_id):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         conn.commit()
+        invalidate_user_profile(user_id)
         cursor.close()
         flash("User deleted successfully!", "success")
     except Exception as e:
@@ -5347,6 +6971,88 @@ def admin_download_submissions() -> Any:
     return render_template("admin/export_options.html", export_type="submissions")
 
 
+# ==============================================
+# STREAMING ZIP EXPORT
+# ==============================================
+
+# Formats that are already compressed; deflating them again costs CPU for no gain
+ZIP_STORED_EXTENSIONS = {
+    ".pdf", ".pptx", ".docx", ".xlsx", ".zip", ".gz", ".7z", ".rar",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp4", ".mov", ".webm", ".mp3",
+}
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """
+    Write-only, unseekable sink for zipfile.ZipFile.
+
+    Because it can't seek, ZipFile writes each entry's sizes and CRC in a
+    data descriptor after the entry instead of going back to patch the
+    local header, so the archive can be sent as it is written.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip_stream(
+    entries: List[Tuple[str, str]], compress: bool = True
+) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of files on disk as it is built.
+
+    Memory use is one read buffer regardless of how many or how large the
+    files are.
+
+    Args:
+        entries: (path on disk, name in archive) pairs.
+        compress: Deflate files, except formats in ZIP_STORED_EXTENSIONS,
+            which are always stored as-is. False stores everything.
+    """
+    read_size = get_media_read_size()
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for path, arcname in entries:
+            try:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            except OSError as e:
+                logger.warning(f"Skipping {path} in ZIP export: {str(e)}")
+                continue
+            extension = os.path.splitext(path)[1].lower()
+            if compress and extension not in ZIP_STORED_EXTENSIONS:
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+            else:
+                zinfo.compress_type = zipfile.ZIP_STORED
+
+            with open(path, "rb") as src, zf.open(zinfo, "w") as dest:
+                while True:
+                    chunk = src.read(read_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory, written when the archive is closed
+    yield buffer.drain()
+
+
 @app.route("/admin/download_submissions/<camp>")
 @admin_required
 def admin_download_submissions_by_camp(camp: str) -> Any:
@@ -5355,77 +7061,67 @@ def admin_download_submissions_by_camp(camp: str) -> Any:
         flash("Invalid camp selection", "danger")
         return redirect(url_for("admin_dashboard"))
 
-    # Create a BytesIO object to store the ZIP file
-    memory_file = io.BytesIO()
-
-    # Create a ZIP file in memory
-    with zipfile.ZipFile(memory_file, "w") as zf:
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-            if camp == "all":
-                cursor.execute(
-                    """
-                    SELECT s.id, u.username, u.camp, s.unit_id, s.file_path, s.submitted_at
-                    FROM submissions s
-                    JOIN users u ON s.user_id = u.id
-                    ORDER BY u.camp, s.submitted_at DESC
+        if camp == "all":
+            cursor.execute(
                 """
-                )
-            else:
-                cursor.execute(
-                    """
-                    SELECT s.id, u.username, u.camp, s.unit_id, s.file_path, s.submitted_at
-                    FROM submissions s
-                    JOIN users u ON s.user_id = u.id
-                    WHERE u.camp = %s
-                    ORDER BY s.submitted_at DESC
-                """,
-                    (camp,),
-                )
-
-            submissions = cursor.fetchall()
-            cursor.close()
+                SELECT s.id, u.username, u.camp, s.unit_id, s.file_path, s.submitted_at
+                FROM submissions s
+                JOIN users u ON s.user_id = u.id
+                ORDER BY u.camp, s.submitted_at DESC
+            """
+            )
+        else:
+            cursor.execute(
+                """
+                SELECT s.id, u.username, u.camp, s.unit_id, s.file_path, s.submitted_at
+                FROM submissions s
+                JOIN users u ON s.user_id = u.id
+                WHERE u.camp = %s
+                ORDER BY s.submitted_at DESC
+            """,
+                (camp,),
+            )
 
-            if not submissions:
-                flash(f"No submissions found for {camp} camp", "warning")
-                return redirect(url_for("admin_submissions"))
-
-            # Add each submission file to the ZIP
-            files_added = 0
-            for submission in submissions:
-                file_path = submission["file_path"]
-                if file_path:
-                    # Look for file in uploads folder
-                    real_path = os.path.join(UPLOAD_FOLDER, file_path)
-
-                    # Check if file exists
-                    if os.path.exists(real_path):
-                        # Create a descriptive name for the file in the ZIP
-                        # Format: Camp_Unit#_Username_OriginalFilename
-                        camp_prefix = submission["camp"].replace(" ", "_")
-                        file_name = f"{camp_prefix}_Unit{submission['unit_id']}_{submission['username']}_{file_path}"
-                        zf.write(real_path, file_name)
-                        files_added += 1
-                    else:
-                        logger.warning(f"File not found: {real_path}")
+        submissions = cursor.fetchall()
+        cursor.close()
+    except Exception as e:
+        logger.error(f"Admin download submissions error: {str(e)}")
+        flash(f"An error occurred: {str(e)}", "danger")
+        return redirect(url_for("admin_submissions"))
+    finally:
+        if conn:
+            release_db_connection(conn)
 
-            if files_added == 0:
-                flash(f"No submission files found for {camp} camp", "warning")
-                return redirect(url_for("admin_submissions"))
+    if not submissions:
+        flash(f"No submissions found for {camp} camp", "warning")
+        return redirect(url_for("admin_submissions"))
 
-        except Exception as e:
-            logger.error(f"Admin download submissions error: {str(e)}")
-            flash(f"An error occurred: {str(e)}", "danger")
-            return redirect(url_for("admin_submissions"))
-        finally:
-            if conn:
-                release_db_connection(conn)
+    # Collect the submission files; they are read while the ZIP is streamed
+    entries = []
+    for submission in submissions:
+        file_path = submission["file_path"]
+        if file_path:
+            # Look for file in uploads folder
+            real_path = os.path.join(UPLOAD_FOLDER, file_path)
+
+            # Check if file exists
+            if os.path.exists(real_path):
+                # Create a descriptive name for the file in the ZIP
+                # Format: Camp_Unit#_Username_OriginalFilename
+                camp_prefix = submission["camp"].replace(" ", "_")
+                file_name = f"{camp_prefix}_Unit{submission['unit_id']}_{submission['username']}_{file_path}"
+                entries.append((real_path, file_name))
+            else:
+                logger.warning(f"File not found: {real_path}")
 
-    # Reset the file pointer to the beginning
-    memory_file.seek(0)
+    if not entries:
+        flash(f"No submission files found for {camp} camp", "warning")
+        return redirect(url_for("admin_submissions"))
 
     # Generate filename with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -5435,12 +7131,14 @@ def admin_download_submissions_by_camp(camp: str) -> Any:
         camp_safe = camp.replace(" ", "_").lower()
         filename = f"{camp_safe}_submissions_{timestamp}.zip"
 
-    # Send the file for download
-    return send_file(
-        memory_file,
+    logger.info(f"📦 Streaming {len(entries)} submission files as {filename}")
+
+    # Stream the archive as it is built instead of holding it in memory
+    return Response(
+        iter_zip_stream(entries),
         mimetype="application/zip",
-        as_attachment=True,
-        download_name=filename,
+        headers={"Content-Disposition": _content_disposition("attachment", filename)},
+        direct_passthrough=True,
     )
 
 
@@ -5510,6 +7208,7 @@ def admin_update_user_language() -> Any:
                 "UPDATE users SET language = %s WHERE id = %s", (language, user_id)
             )
             conn.commit()
+            invalidate_user_profile(user_id)
             cursor.close()
             flash("User language updated successfully", "success")
         except Exception as e:
@@ -5657,6 +7356,8 @@ def admin_add_word() -> Any:
             )
 
             word_id = cursor.fetchone()[0]
+            refresh_content_visibility(cursor, "word", word_id)
+            content_changed(cursor)
             conn.commit()
 
             # Auto-assign bootcamp type tags for all selected bootcamp types
@@ -5775,6 +7476,8 @@ def admin_add_quiz() -> Any:
             )
 
             quiz_id = cursor.fetchone()[0]
+            refresh_content_visibility(cursor, "quiz", quiz_id)
+            content_changed(cursor)
 
             # Prepare tags to assign
             tags_to_assign = []
@@ -5965,6 +7668,8 @@ def admin_add_material() -> Any:
             )
 
             material_id = cursor.fetchone()[0]
+            refresh_content_visibility(cursor, "material", material_id)
+            content_changed(cursor)
             logger.info(f"Material created with ID: {material_id}")
 
             # Prepare tags to assign
@@ -6175,6 +7880,8 @@ def admin_edit_material(material_id: int) -> Any:
                 """,
                     (unit_id, title, content, file_path, primary_camp, material_id),
                 )
+                refresh_content_visibility(cursor, "material", material_id)
+                content_changed(cursor)
 
                 # Prepare tags to assign
                 tags_to_assign = []
@@ -6383,6 +8090,8 @@ def admin_add_video() -> Any:
             )
 
             video_id = cursor.fetchone()[0]
+            refresh_content_visibility(cursor, "video", video_id)
+            content_changed(cursor)
 
             # Handle tags (same as before)
             tags_to_assign = []
@@ -6429,10 +8138,15 @@ def admin_add_video() -> Any:
 @app.route("/serve_video/<path:filename>")
 @login_required
 def serve_video(filename):
-    """Serve uploaded video files."""
+    """Serve uploaded video files, with Range support so the player can seek."""
     try:
         videos_dir = os.path.join(UPLOAD_FOLDER, "videos")
-        return send_file(os.path.join(videos_dir, filename))
+        response = media_file_response(
+            videos_dir, filename, cache_control="private, max-age=86400"
+        )
+        if response.status_code == 404:
+            return "Video not found", 404
+        return response
     except Exception as e:
         logger.error(f"Error serving video: {str(e)}")
         return "Video not found", 404
@@ -6504,6 +8218,8 @@ def admin_add_project() -> Any:
             )
 
             project_id = cursor.fetchone()[0]
+            refresh_content_visibility(cursor, "project", project_id)
+            content_changed(cursor)
 
             # Prepare tags to assign
             tags_to_assign = []
@@ -6637,6 +8353,18 @@ def admin_manage_content() -> Any:
         if conn:
             release_db_connection(conn)
 
+    # Tag names of every listed item, one query per content type
+    content_tags = {
+        content_type: get_content_tags_map(content_type, [item["id"] for item in items])
+        for content_type, items in (
+            ("quiz", quizzes),
+            ("material", materials),
+            ("video", videos),
+            ("project", projects),
+            ("word", words),
+        )
+    }
+
     return render_template(
         "admin/manage_content.html",
         quizzes=quizzes,
@@ -6644,6 +8372,7 @@ def admin_manage_content() -> Any:
         videos=videos,
         projects=projects,
         words=words,
+        content_tags=content_tags,
         camps=CAMPS,
     )
 
@@ -6936,6 +8665,8 @@ def admin_reset_db() -> Any:
                     "videos",
                     "materials",
                     "quizzes",
+                    # Derived from the content tables above; stale rows would match new ids
+                    "content_visibility",
                     "team_members",
                     "team_scores",
                     "teams",
@@ -6947,6 +8678,9 @@ def admin_reset_db() -> Any:
                 # Maintain admin users but reset regular users
                 cursor.execute("TRUNCATE TABLE users CASCADE")
 
+                # Drop cached unit content here and, via NOTIFY, in other workers
+                content_changed(cursor)
+
                 conn.commit()
                 cursor.close()
                 release_db_connection(conn)
@@ -7582,6 +9316,8 @@ def admin_edit_quiz(quiz_id: int) -> Any:
                         quiz_id,
                     ),
                 )
+                refresh_content_visibility(cursor, "quiz", quiz_id)
+                content_changed(cursor)
 
                 # Prepare tags to assign
                 tags_to_assign = []
@@ -7659,6 +9395,8 @@ def admin_delete_quiz(quiz_id: int) -> Any:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM quizzes WHERE id=%s", (quiz_id,))
+        refresh_content_visibility(cursor, "quiz", quiz_id)
+        content_changed(cursor)
         conn.commit()
         cursor.close()
         flash("Quiz deleted successfully", "success")
@@ -7719,6 +9457,8 @@ def admin_delete_material(material_id: int) -> Any:
                     logger.error(f"Could not delete file {file_path}")
 
         cursor.execute("DELETE FROM materials WHERE id=%s", (material_id,))
+        refresh_content_visibility(cursor, "material", material_id)
+        content_changed(cursor)
         conn.commit()
         cursor.close()
         flash("Material deleted successfully", "success")
@@ -7977,6 +9717,8 @@ def admin_edit_video(video_id: int) -> Any:
                     (unit_id, title, video_url, description, primary_camp, 
                      video_type, video_file_path, video_id),
                 )
+                refresh_content_visibility(cursor, "video", video_id)
+                content_changed(cursor)
 
                 # Prepare tags to assign
                 tags_to_assign = []
@@ -8048,6 +9790,8 @@ def admin_delete_video(video_id: int) -> Any:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM videos WHERE id=%s", (video_id,))
+        refresh_content_visibility(cursor, "video", video_id)
+        content_changed(cursor)
         conn.commit()
         cursor.close()
         flash("Video deleted successfully", "success")
@@ -8206,6 +9950,8 @@ def admin_edit_project(project_id: int) -> Any:
                         project_id,
                     ),
                 )
+                refresh_content_visibility(cursor, "project", project_id)
+                content_changed(cursor)
 
                 # Prepare tags to assign
                 tags_to_assign = []
@@ -8282,6 +10028,8 @@ def admin_delete_project(project_id: int) -> Any:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM projects WHERE id=%s", (project_id,))
+        refresh_content_visibility(cursor, "project", project_id)
+        content_changed(cursor)
         conn.commit()
         cursor.close()
         flash("Project deleted successfully", "success")
@@ -8428,6 +10176,8 @@ def admin_edit_word(word_id: int) -> Any:
                     word_id,
                 ),
             )
+            refresh_content_visibility(cursor, "word", word_id)
+            content_changed(cursor)
             conn.commit()
 
             # Handle bootcamp tags
@@ -8472,6 +10222,8 @@ def admin_delete_word(word_id: int) -> Any:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM words WHERE id=%s", (word_id,))
+        refresh_content_visibility(cursor, "word", word_id)
+        content_changed(cursor)
         conn.commit()
         cursor.close()
         flash("Word deleted successfully", "success")
@@ -8581,27 +10333,54 @@ def store_document_in_database(
             )
         """
         )
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+        )
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS size_bytes BIGINT"
+        )
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS filename_normalized VARCHAR(255)"
+        )
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS filename_suffix VARCHAR(255)"
+        )
+        # Store content uncompressed so substring() reads only the requested
+        # window when streaming; uploads are mostly already-compressed formats
+        cursor.execute(
+            "ALTER TABLE stored_documents ALTER COLUMN content SET STORAGE EXTERNAL"
+        )
 
         # Insert or update document
+        content_hash = hashlib.sha256(content).hexdigest()
         cursor.execute(
             """
-            INSERT INTO stored_documents (filename, content, content_type)
-            VALUES (%s, %s, %s)
+            INSERT INTO stored_documents (
+                filename, content, content_type, content_hash, size_bytes,
+                filename_normalized, filename_suffix
+            )
+            VALUES (%s, %s, %s, %s, %s, lower(%s), reverse(lower(%s)))
             ON CONFLICT (filename) 
             DO UPDATE SET 
                 content = EXCLUDED.content, 
                 content_type = EXCLUDED.content_type,
+                content_hash = EXCLUDED.content_hash,
+                size_bytes = EXCLUDED.size_bytes,
                 upload_date = CURRENT_TIMESTAMP
             RETURNING id
         """,
-            (filename, content, content_type),
+            (filename, content, content_type, content_hash, len(content), filename, filename),
         )
 
         doc_id = cursor.fetchone()[0]
         conn.commit()
         cursor.close()
+        stored_document_aliases.invalidate()
 
         logger.info(f"✅ Document {filename} stored in database with ID: {doc_id}")
+
+        # Index just this document instead of rebuilding the whole QA system
+        index_document(filename, content)
         return True
 
     except Exception as e:
@@ -8703,35 +10482,13 @@ def admin_upload_document() -> Any:
 
             logger.info(f"📤 Uploading: {filename} ({len(file_content)} bytes)")
 
-            # Store in database
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
-            cursor.execute(
-                """
-                INSERT INTO stored_documents (filename, content, content_type)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (filename) 
-                DO UPDATE SET 
-                    content = EXCLUDED.content, 
-                    content_type = EXCLUDED.content_type,
-                    upload_date = CURRENT_TIMESTAMP
-                RETURNING id
-            """,
-                (filename, file_content, content_type),
-            )
-
-            doc_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            release_db_connection(conn)
-
-            # Reset QA system to reload documents
-            global _qa_instance
-            _qa_instance = None
+            # Store in database; the QA index picks up only this document
+            if not store_document_in_database(filename, file_content, content_type):
+                flash(f"Error uploading document '{filename}'.", "error")
+                return redirect(url_for("admin_manage_documents"))
 
             flash(
-                f"Document '{filename}' uploaded successfully! QA system will reload.",
+                f"Document '{filename}' uploaded successfully! The AI assistant is indexing it now.",
                 "success",
             )
             logger.info(f"✅ Successfully uploaded {filename}")
@@ -8766,10 +10523,10 @@ def admin_delete_document(filename: str) -> Any:
 
         if deleted:
             conn.commit()
+            stored_document_aliases.invalidate()
 
-            # Reset QA system
-            global _qa_instance
-            _qa_instance = None
+            # Drop only this document's chunks from the QA index
+            unindex_document(safe_filename)
 
             flash(f"Document '{safe_filename}' deleted successfully.", "success")
             logger.info(f"🗑️ Deleted document: {safe_filename}")
@@ -8835,22 +10592,25 @@ def admin_followup_history():
 @app.route("/admin/force_qa_reload")
 @admin_required
 def admin_force_qa_reload():
-    """FIXED: Force QA system to reload from database."""
+    """Sync the QA index with the database, re-indexing only changed documents."""
     try:
-        # Reset global QA instance
-        global _qa_instance
-        _qa_instance = None
-
-        # Force reload from qa.py
-        from qa import initialize_qa
-
-        qa_system = initialize_qa()
+        if get_qa_system() is None:
+            initialize_qa()
+            summary = "QA system initialized with database documents."
+        else:
+            stats = sync_qa_documents()
+            if stats is None:
+                summary = "QA system is still initializing; it will load the latest documents."
+            else:
+                summary = (
+                    f"Added {stats['added']}, updated {stats['updated']}, "
+                    f"removed {stats['removed']}, unchanged {stats['unchanged']} documents."
+                )
 
         return f"""
         <div style="font-family: monospace; padding: 20px; background: #d4edda;">
             <h2>✅ QA System Force Reload Complete!</h2>
-            <p>QA system reinitialized with database documents.</p>
-            <p><strong>Wait 30 seconds, then test AI assistant!</strong></p>
+            <p>{summary}</p>
             <p><a href="/ai_status">🔍 Check QA Status</a></p>
             <p><a href="/ai_assistant">🤖 Test AI Assistant</a></p>
         </div>
@@ -9564,31 +11324,13 @@ def stream_file(filename: str) -> Any:
         if not os.path.exists(file_path):
             return f"File not found: {file_path}", 404
 
-        # Get file size
-        file_size = os.path.getsize(file_path)
-
-        # Open the file in binary mode
-        with open(file_path, "rb") as f:
-            # Stream the file in chunks
-            def generate():
-                while True:
-                    chunk = f.read(4096)
-                    if not chunk:
-                        break
-                    yield chunk
-
-        # Set appropriate headers
-        headers = {
-            "Content-Disposition": f'attachment; filename="{os.path.basename(clean_filename)}"',
-            "Content-Type": "application/octet-stream",
-            "Content-Length": str(file_size),
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        }
-
-        # Return a streaming response
-        return app.response_class(generate(), headers=headers, direct_passthrough=True)
+        # Streams (or offloads) the file; add_header marks it uncacheable
+        return media_file_response(
+            UPLOAD_FOLDER,
+            clean_filename,
+            as_attachment=True,
+            mimetype="application/octet-stream",
+        )
 
     except Exception as e:
         logger.error(f"Stream error: {str(e)}")
@@ -9613,6 +11355,7 @@ def health_check():
         cursor.close()
         release_db_connection(conn)
         health_status["services"]["database"] = "healthy"
+        health_status["services"]["database_pool"] = get_db_pool_stats()
     except Exception as e:
         health_status["services"]["database"] = f"unhealthy: {str(e)}"
         health_status["status"] = "degraded"
@@ -9729,6 +11472,8 @@ def admin_edit_tag(tag_id):
                 (name, description, tag_id),
             )
             conn.commit()
+            rebuild_content_visibility()
+            invalidate_user_profile()
             flash("Tag updated successfully!", "success")
             cursor.execute("SELECT * FROM tags WHERE id = %s", (tag_id,))
             tag = cursor.fetchone()
@@ -9749,6 +11494,8 @@ def admin_delete_tag(tag_id):
     try:
         cursor.execute("DELETE FROM tags WHERE id = %s", (tag_id,))
         conn.commit()
+        rebuild_content_visibility()
+        invalidate_user_profile()
         flash("Tag deleted successfully!", "success")
     except Exception as e:
         logger.error(f"Error deleting tag: {str(e)}")
@@ -9768,6 +11515,7 @@ def admin_delete_cohort(cohort_id):
     try:
         cursor.execute("DELETE FROM cohorts WHERE id = %s", (cohort_id,))
         conn.commit()
+        invalidate_user_profile()
         flash("Cohort deleted successfully!", "success")
     except Exception as e:
         logger.error(f"Error deleting cohort: {str(e)}")
@@ -9941,6 +11689,8 @@ def admin_edit_tag_group(group_id):
                 (name, description, group_id),
             )
             conn.commit()
+            rebuild_content_visibility()
+            invalidate_user_profile()
             flash("Tag group updated successfully!", "success")
             cursor.execute("SELECT * FROM tag_groups WHERE id = %s", (group_id,))
             group = cursor.fetchone()
@@ -9960,6 +11710,8 @@ def admin_delete_tag_group(group_id):
     try:
         cursor.execute("DELETE FROM tag_groups WHERE id = %s", (group_id,))
         conn.commit()
+        rebuild_content_visibility()
+        invalidate_user_profile()
         flash("Tag group deleted successfully!", "success")
     except Exception as e:
         logger.error(f"Error deleting tag group: {str(e)}")
@@ -10124,28 +11876,22 @@ def mindmap_home():
             WITH unit_materials AS (
                 SELECT DISTINCT unit_id, COUNT(*) as material_count
                 FROM materials m
-                WHERE m.camp = %s OR EXISTS (
-                    SELECT 1 FROM content_tags ct
-                    JOIN tags t ON ct.tag_id = t.id
-                    JOIN tag_groups tg ON t.tag_group_id = tg.id
-                    WHERE ct.content_type = 'material' 
-                    AND ct.content_id = m.id
-                    AND tg.name = 'Bootcamp Type'
-                    AND t.name = %s
+                WHERE EXISTS (
+                    SELECT 1 FROM content_visibility cv
+                    WHERE cv.content_type = 'material'
+                    AND cv.content_id = m.id
+                    AND cv.camp = %s
                 )
                 GROUP BY unit_id
             ),
             unit_words AS (
                 SELECT DISTINCT unit_id, COUNT(*) as word_count
                 FROM words w
-                WHERE w.camp = %s OR EXISTS (
-                    SELECT 1 FROM content_tags ct
-                    JOIN tags t ON ct.tag_id = t.id
-                    JOIN tag_groups tg ON t.tag_group_id = tg.id
-                    WHERE ct.content_type = 'word' 
-                    AND ct.content_id = w.id
-                    AND tg.name = 'Bootcamp Type'
-                    AND t.name = %s
+                WHERE EXISTS (
+                    SELECT 1 FROM content_visibility cv
+                    WHERE cv.content_type = 'word'
+                    AND cv.content_id = w.id
+                    AND cv.camp = %s
                 )
                 GROUP BY unit_id
             )
@@ -10158,7 +11904,7 @@ def mindmap_home():
             WHERE COALESCE(um.material_count, 0) > 0 OR COALESCE(uw.word_count, 0) > 0
             ORDER BY COALESCE(um.unit_id, uw.unit_id)
         """,
-            (user_camp, user_camp, user_camp, user_camp),
+            (user_camp, user_camp),
         )
 
         available_units = cursor.fetchall()
@@ -0,0 +1,88 @@
+"""
+Retrieval benchmark
+
+Compares per-query latency of the legacy MockRetriever linear scan against the
+BM25 inverted index on synthetic course-material chunks.
+
+Usage:
+    python benchmark_retrieval.py [--sizes 1000 10000 100000] [--queries 20]
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Any, Dict, List
+
+from qa import BM25Index, IndexRetriever, MockRetriever
+
+logging.getLogger("qa").setLevel(logging.WARNING)
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_CHUNK = 120
+
+
+def build_vocabulary(size: int, rng: random.Random) -> List[str]:
+    """Generate pseudo-words of 3-10 lowercase letters."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    ]
+
+
+def build_chunks(count: int, vocabulary: List[str], rng: random.Random) -> List[Dict[str, Any]]:
+    """Generate chunks whose word frequencies follow a Zipf-like distribution."""
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    chunks = []
+    for i in range(count):
+        words = rng.choices(vocabulary, weights=weights, k=WORDS_PER_CHUNK)
+        chunks.append(
+            {
+                "page_content": " ".join(words),
+                "metadata": {"filename": f"doc_{i // 50}.pdf", "page": i % 50 + 1},
+            }
+        )
+    return chunks
+
+
+def time_queries(retriever: Any, queries: List[str]) -> float:
+    """Return mean latency per query in milliseconds."""
+    start = time.perf_counter()
+    for query in queries:
+        retriever.get_relevant_documents(query, search_kwargs={"k": 6})
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = build_vocabulary(VOCABULARY_SIZE, rng)
+    queries = [
+        "what is " + " ".join(rng.sample(vocabulary[:5000], 3))
+        for _ in range(args.queries)
+    ]
+
+    print(f"{'chunks':>8} {'build (s)':>10} {'mock (ms)':>11} {'bm25 (ms)':>11} {'speedup':>9}")
+    for size in args.sizes:
+        chunks = build_chunks(size, vocabulary, rng)
+
+        build_start = time.perf_counter()
+        index = BM25Index(chunks)
+        build_time = time.perf_counter() - build_start
+
+        mock_ms = time_queries(MockRetriever(chunks), queries)
+        bm25_ms = time_queries(IndexRetriever(index), queries)
+        print(
+            f"{size:>8} {build_time:>10.2f} {mock_ms:>11.2f} {bm25_ms:>11.2f} "
+            f"{mock_ms / bm25_ms if bm25_ms else float('inf'):>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,67 +6,12 @@ Loads environment variables and provides app configuration settings.
 import os
 import secrets
 from dotenv import load_dotenv
-import requests
 
 # Load environment variables
 load_dotenv()
 
-
-class OpenRouterLLM:
-    """
-    Wrapper for OpenRouter API for LLM text generation using GPT and other models.
-    """
-    def __init__(self, api_key: str, model: str):
-        self.api_key = api_key
-        self.model = model
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
-
-    def generate_response(self, prompt: str) -> str:
-        """Generate response using OpenRouter API."""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://51talk-ai-learning.com",  # Replace with your actual domain
-            "X-Title": "51Talk AI Learning Platform"
-        }
-        
-        payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 800,
-            "temperature": 0.7,
-            "top_p": 1,
-            "frequency_penalty": 0,
-            "presence_penalty": 0
-        }
-        
-        try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=60
-            )
-            
-            if response.status_code == 429:
-                return "[Rate Limited] Too many requests. Please wait a moment and try again."
-            elif response.status_code == 401:
-                return "[Authentication Error] Invalid API key."
-            elif response.status_code == 402:
-                return "[Insufficient Credits] Please check your OpenRouter account balance."
-            elif response.status_code != 200:
-                return f"[API Error] Service unavailable (Status: {response.status_code})"
-                
-            data = response.json()
-            
-            if "choices" in data and len(data["choices"]) > 0:
-                return data["choices"][0]["message"]["content"]
-            else:
-                return "[Error] No response generated"
-                
-        except requests.exceptions.Timeout:
-            return "[Timeout] Request timed out. Please try again."
-        except requests.exceptions.ConnectionError:
-            return "[Connection Error] Unable to connect to OpenRouter service."
-        except Exception as e:
-            return f"[Error] {str(e)}"
+# Shared OpenRouter client, re-exported for existing `from config import OpenRouterLLM` users
+from llm_client import OpenRouterLLM  # noqa: E402,F401
 
 
 class Config:
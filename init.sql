@@ -102,6 +102,15 @@ CREATE TABLE IF NOT EXISTS content_tags (
     UNIQUE(content_type, content_id, tag_id)
 );
 
+-- Content visibility - camps that may see each content item (its camp column plus
+-- its 'Bootcamp Type' tags), maintained by the app so student reads are a key lookup
+CREATE TABLE IF NOT EXISTS content_visibility (
+    content_type VARCHAR(20) NOT NULL, -- 'material', 'video', 'project', 'quiz', 'word'
+    content_id INTEGER NOT NULL,
+    camp VARCHAR(50) NOT NULL,
+    PRIMARY KEY (content_type, content_id, camp)
+);
+
 -- Teams table - stores team information
 CREATE TABLE IF NOT EXISTS teams (
     id SERIAL PRIMARY KEY,
@@ -302,9 +311,25 @@ CREATE TABLE IF NOT EXISTS stored_documents (
     filename VARCHAR(255) NOT NULL,
     content BYTEA NOT NULL,
     content_type VARCHAR(100),
+    content_hash VARCHAR(64), -- SHA-256 of content: incremental QA ingestion, ETags and /blob/ URLs
+    size_bytes BIGINT, -- octet_length(content), recorded at upload
+    filename_normalized VARCHAR(255), -- lower(filename), for case-insensitive lookups
+    filename_suffix VARCHAR(255), -- reverse(lower(filename)), so "ends with" is an indexed prefix match
     upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(filename)
 );
+-- Uncompressed out-of-line storage, so downloads can read content in substring() windows
+ALTER TABLE stored_documents ALTER COLUMN content SET STORAGE EXTERNAL;
+
+-- QA answer cache shared by all app workers (used when ANSWER_CACHE_BACKEND=postgres)
+CREATE TABLE IF NOT EXISTS qa_answer_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    corpus_version VARCHAR(64) NOT NULL, -- answers are dropped when course documents change
+    answer TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    expires_at DOUBLE PRECISION NOT NULL, -- unix time
+    last_access DOUBLE PRECISION NOT NULL -- unix time, for LRU eviction
+);
 
 -- Submissions table - stores project submissions
 CREATE TABLE IF NOT EXISTS submissions (
@@ -451,6 +476,18 @@ BEGIN
         CREATE INDEX idx_content_tags_tag ON content_tags(tag_id);
     END IF;
     
+    IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_stored_documents_hash') THEN
+        CREATE INDEX idx_stored_documents_hash ON stored_documents(content_hash);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_stored_documents_name') THEN
+        CREATE INDEX idx_stored_documents_name ON stored_documents(filename_normalized);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_stored_documents_suffix') THEN
+        CREATE INDEX idx_stored_documents_suffix ON stored_documents(filename_suffix text_pattern_ops);
+    END IF;
+
     IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_followups_user') THEN
         CREATE INDEX idx_followups_user ON followups(user_id);
     END IF;
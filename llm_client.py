@@ -0,0 +1,524 @@
+"""
+OpenRouter LLM Client
+
+Single OpenRouter client shared by qa.py and config.py. All requests go through
+one pooled requests.Session per process, so TLS connections to openrouter.ai are
+kept alive and reused across questions, mindmaps and node expansions.
+
+Calls are scheduled by LLMGateway, which caps concurrent upstream requests,
+shares slots fairly between users and coalesces identical in-flight prompts.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+def get_client_config() -> Dict[str, Any]:
+    """
+    Read HTTP client settings from environment variables.
+
+    Read on use rather than at import, so values from .env loaded later by the
+    app are honoured.
+
+    Returns:
+        Dict[str, Any]: url, pool_size (keep-alive connections per process),
+            connect_timeout and read_timeout (seconds), max_concurrency
+            (upstream calls in flight per process) and queue_timeout (seconds a
+            caller waits for a queued call to finish).
+    """
+    return {
+        "url": os.getenv("OPENROUTER_URL", DEFAULT_OPENROUTER_URL),
+        "pool_size": int(os.getenv("OPENROUTER_POOL_SIZE", "10")),
+        "connect_timeout": float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "5")),
+        "read_timeout": float(os.getenv("OPENROUTER_READ_TIMEOUT", "60")),
+        "max_concurrency": int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "8")),
+        "queue_timeout": float(os.getenv("OPENROUTER_QUEUE_TIMEOUT", "120")),
+    }
+
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide pooled HTTP session, creating it on first use.
+
+    A new session is created after a fork so that workers never share sockets
+    with their parent.
+
+    Returns:
+        requests.Session: Session with a keep-alive connection pool.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            pool_size = get_client_config()["pool_size"]
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_size,
+                pool_block=False,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(
+                {
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "https://51talk-ai-learning.com",
+                    "X-Title": "51Talk AI Learning Platform",
+                }
+            )
+            _session = session
+            _session_pid = pid
+            logger.info(
+                f"🌐 OpenRouter HTTP session created (pool size {pool_size})"
+            )
+    return _session
+
+
+def close_http_session() -> None:
+    """Close the pooled HTTP session and its keep-alive connections."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            _session_pid = None
+
+
+class OpenRouterLLM:
+    """OpenRouter GPT API wrapper with improved error handling."""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the OpenRouter LLM wrapper.
+
+        Args:
+            api_key (str): OpenRouter API key.
+            model (str): Model identifier to use.
+            base_url (str, optional): Chat completions endpoint. Defaults to OPENROUTER_URL or openrouter.ai.
+            connect_timeout (float, optional): Connect timeout in seconds.
+            read_timeout (float, optional): Read timeout in seconds.
+        """
+        client_config = get_client_config()
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url or client_config["url"]
+        # (connect, read): fail fast if OpenRouter is unreachable, but allow long generations
+        self.timeout = (
+            connect_timeout or client_config["connect_timeout"],
+            read_timeout or client_config["read_timeout"],
+        )
+
+    def _payload(self, prompt: str, stream: bool = False) -> Dict[str, Any]:
+        """
+        Build the chat completion request body.
+
+        Args:
+            prompt (str): The prompt to send to the model.
+            stream (bool): Ask OpenRouter for server-sent events.
+
+        Returns:
+            Dict[str, Any]: JSON payload.
+        """
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": 800,
+            "temperature": 0.7,
+            "top_p": 1,
+            "frequency_penalty": 0,
+            "presence_penalty": 0,
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _status_error(self, response: requests.Response) -> Optional[str]:
+        """
+        Map a non-200 response to the user-facing error message.
+
+        Args:
+            response (requests.Response): Response from OpenRouter.
+
+        Returns:
+            Optional[str]: Error message, or None if the request succeeded.
+        """
+        if response.status_code == 429:
+            return "[Rate Limited] Too many requests. Please wait a moment and try again."
+        elif response.status_code == 401:
+            return "[Authentication Error] Invalid OpenRouter API key. Please check your API configuration."
+        elif response.status_code == 402:
+            return "[Insufficient Credits] Please check your OpenRouter account balance."
+        elif response.status_code == 404:
+            return f"[Model Error] Model '{self.model}' not found. Please check your model configuration."
+        elif response.status_code != 200:
+            logger.error(
+                f"OpenRouter API error: {response.status_code} - {response.text}"
+            )
+            return f"[API Error] Service unavailable (Status: {response.status_code})"
+        return None
+
+    def generate_response(self, prompt: str) -> str:
+        """
+        Generate response with comprehensive error handling.
+
+        Args:
+            prompt (str): The prompt to send to the model.
+
+        Returns:
+            str: The generated response or an error message.
+        """
+        if not prompt or not prompt.strip():
+            return "[Error] Empty prompt provided"
+
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        try:
+            response = get_http_session().post(
+                self.base_url,
+                headers=headers,
+                json=self._payload(prompt),
+                timeout=self.timeout,
+            )
+
+            error = self._status_error(response)
+            if error:
+                return error
+
+            data = response.json()
+
+            if "choices" in data and len(data["choices"]) > 0:
+                return data["choices"][0]["message"]["content"]
+            else:
+                return "[Error] No response generated by GPT model"
+
+        except requests.exceptions.Timeout:
+            return "[Timeout] GPT request timed out. Please try again."
+        except requests.exceptions.ConnectionError:
+            return "[Connection Error] Unable to connect to OpenRouter service."
+        except Exception as e:
+            logger.error(f"OpenRouter API error: {e}")
+            return f"[Error] {str(e)}"
+
+    def stream_response(self, prompt: str) -> Iterator[str]:
+        """
+        Generate a response as a stream of text fragments (OpenRouter SSE).
+
+        Failures before the first fragment yield a single error message, the
+        same as generate_response(). Failures after that are raised, so callers
+        can tell a truncated answer from a complete one.
+
+        Args:
+            prompt (str): The prompt to send to the model.
+
+        Yields:
+            str: Text fragments in order.
+        """
+        if not prompt or not prompt.strip():
+            yield "[Error] Empty prompt provided"
+            return
+
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        try:
+            response = get_http_session().post(
+                self.base_url,
+                headers=headers,
+                json=self._payload(prompt, stream=True),
+                timeout=self.timeout,
+                stream=True,
+            )
+        except requests.exceptions.Timeout:
+            yield "[Timeout] GPT request timed out. Please try again."
+            return
+        except requests.exceptions.ConnectionError:
+            yield "[Connection Error] Unable to connect to OpenRouter service."
+            return
+        except Exception as e:
+            logger.error(f"OpenRouter API error: {e}")
+            yield f"[Error] {str(e)}"
+            return
+
+        with response:
+            error = self._status_error(response)
+            if error:
+                yield error
+                return
+
+            # Read each chunk as it arrives rather than waiting to fill a buffer
+            response.encoding = "utf-8"
+            produced = False
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                # SSE: "data: {...}" events, ": comment" keep-alives, blank separators
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                if "error" in event:
+                    message = event["error"].get("message", "stream error")
+                    if not produced:
+                        yield f"[Error] {message}"
+                        return
+                    raise RuntimeError(f"OpenRouter stream error: {message}")
+                choices = event.get("choices") or []
+                text = choices[0].get("delta", {}).get("content") if choices else None
+                if text:
+                    produced = True
+                    yield text
+
+            if not produced:
+                yield "[Error] No response generated by GPT model"
+
+
+# ============================================================================
+# LLM GATEWAY
+# ============================================================================
+
+
+class LLMGateway:
+    """
+    Schedules OpenRouter calls for one process on a background asyncio loop.
+
+    - At most max_concurrency upstream calls run at once, keeping bursts below
+      OpenRouter's rate limits.
+    - Waiting calls are queued per user and dispatched round-robin, so one user
+      generating many mindmaps can't starve everyone else.
+    - Calls for an identical prompt already queued or running share its result
+      instead of making another upstream request.
+
+    Upstream requests use the pooled requests session on a thread pool sized to
+    the concurrency cap; callers block on the result, as Flask views are sync.
+    """
+
+    def __init__(self, max_concurrency: int, queue_timeout: float) -> None:
+        """
+        Start the gateway's event loop thread.
+
+        Args:
+            max_concurrency (int): Maximum upstream calls in flight.
+            queue_timeout (float): Seconds a caller waits for its result.
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="llm-gateway"
+        )
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._rotation: Deque[str] = deque()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._active = 0
+        self._stats = {"requests": 0, "coalesced": 0, "upstream": 0, "peak_active": 0}
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="llm-gateway", daemon=True
+        )
+        self._thread.start()
+
+    def generate(
+        self, llm: OpenRouterLLM, prompt: str, user_id: Optional[str] = None
+    ) -> str:
+        """
+        Generate a response through the gateway.
+
+        Args:
+            llm (OpenRouterLLM): Client to call.
+            prompt (str): The prompt to send to the model.
+            user_id (Optional[str]): User the call is made for, for fair queueing.
+
+        Returns:
+            str: The generated response or an error message, as generate_response().
+        """
+        key = hashlib.sha256(
+            f"{llm.base_url}|{llm.model}|{prompt}".encode("utf-8")
+        ).hexdigest()
+        future = asyncio.run_coroutine_threadsafe(
+            self._submit(key, user_id, lambda: llm.generate_response(prompt)),
+            self._loop,
+        )
+        try:
+            return future.result(self.queue_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"⚠️ LLM gateway gave up after {self.queue_timeout}s")
+            return "[Timeout] GPT request timed out. Please try again."
+
+    @contextmanager
+    def slot(self, user_id: Optional[str] = None) -> Iterator[None]:
+        """
+        Hold one concurrency slot while the caller makes its own upstream call.
+
+        Used for streamed responses, which can't be coalesced but still count
+        towards the cap and wait their turn in the same fair queue.
+
+        Args:
+            user_id (Optional[str]): User the call is made for.
+
+        Raises:
+            TimeoutError: If no slot became free within queue_timeout.
+        """
+        granted = threading.Event()
+        finished = threading.Event()
+
+        def hold() -> None:
+            granted.set()
+            finished.wait()
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._submit(None, user_id, hold), self._loop
+        )
+        try:
+            if not granted.wait(self.queue_timeout):
+                future.cancel()
+                raise TimeoutError("No LLM slot became free")
+            yield
+        finally:
+            finished.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get gateway counters.
+
+        Returns:
+            Dict[str, int]: requests, coalesced, upstream, peak_active, active and queued.
+        """
+        return {
+            **self._stats,
+            "active": self._active,
+            "queued": sum(len(queue) for queue in list(self._queues.values())),
+        }
+
+    def close(self) -> None:
+        """Stop the event loop thread and the upstream thread pool."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+    async def _submit(
+        self, key: Optional[str], user_id: Optional[str], call: Callable[[], Any]
+    ) -> Any:
+        """Queue a call, or join an identical one already in flight (runs on the loop)."""
+        self._stats["requests"] += 1
+        shared = self._inflight.get(key) if key else None
+        if shared is None:
+            shared = self._loop.create_future()
+            if key:
+                self._inflight[key] = shared
+            self._enqueue(
+                str(user_id or "anonymous"), {"key": key, "call": call, "future": shared}
+            )
+        else:
+            self._stats["coalesced"] += 1
+        # A caller timing out must not cancel the call for everyone sharing it
+        return await asyncio.shield(shared)
+
+    def _enqueue(self, user: str, job: Dict[str, Any]) -> None:
+        """Add a job to its user's queue and dispatch if a slot is free."""
+        queue = self._queues.get(user)
+        if queue is None:
+            queue = self._queues[user] = deque()
+            self._rotation.append(user)
+        queue.append(job)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start queued jobs, one user at a time, until the cap is reached."""
+        while self._active < self.max_concurrency and self._rotation:
+            user = self._rotation.popleft()
+            queue = self._queues[user]
+            job = queue.popleft()
+            if queue:
+                self._rotation.append(user)
+            else:
+                del self._queues[user]
+            self._active += 1
+            self._stats["upstream"] += 1
+            self._stats["peak_active"] = max(self._stats["peak_active"], self._active)
+            self._loop.create_task(self._run(job))
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """Run a job on the thread pool and publish its result."""
+        try:
+            result = await self._loop.run_in_executor(self._executor, job["call"])
+            job["future"].set_result(result)
+        except Exception as e:
+            logger.error(f"❌ LLM gateway call failed: {e}")
+            job["future"].set_exception(e)
+        finally:
+            if job["key"]:
+                self._inflight.pop(job["key"], None)
+            self._active -= 1
+            self._dispatch()
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_pid: Optional[int] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Get the process-wide LLM gateway, starting it on first use (and after a fork).
+
+    Returns:
+        LLMGateway: The gateway.
+    """
+    global _gateway, _gateway_pid
+    pid = os.getpid()
+    if _gateway is not None and _gateway_pid == pid:
+        return _gateway
+
+    with _session_lock:
+        if _gateway is None or _gateway_pid != pid:
+            client_config = get_client_config()
+            _gateway = LLMGateway(
+                client_config["max_concurrency"], client_config["queue_timeout"]
+            )
+            _gateway_pid = pid
+            logger.info(
+                f"🚦 LLM gateway started (max {_gateway.max_concurrency} concurrent calls)"
+            )
+    return _gateway
+
+
+def close_llm_gateway() -> None:
+    """Stop the LLM gateway if it was started in this process."""
+    global _gateway, _gateway_pid
+    with _session_lock:
+        if _gateway is not None and _gateway_pid == os.getpid():
+            _gateway.close()
+        _gateway = None
+        _gateway_pid = None
@@ -7,28 +7,49 @@ It includes functionality for document processing, vector storage, and interacti
 
 import os
 import logging
+import multiprocessing
+import queue
 import threading
 import time
 import json
 import re
-import requests
+import math
+import heapq
 import hashlib
+import shutil
+import sqlite3
 import tempfile
-from typing import List, Dict, Any, Optional, Tuple, Union
+import zlib
+from collections import Counter, OrderedDict, deque
+from difflib import SequenceMatcher
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterator, Iterable, Callable, FrozenSet, Deque
 from datetime import datetime
 
 # Document processing
 import pptx
 from langchain_community.document_loaders import PyPDFLoader
+from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 
+# OpenRouter client (pooled keep-alive session, gateway with concurrency cap)
+from llm_client import (
+    OpenRouterLLM,
+    close_http_session,
+    close_llm_gateway,
+    get_llm_gateway,
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
+# File types DocumentProcessor.load_file can parse
+SUPPORTED_DOCUMENT_EXTENSIONS = (".pdf", ".pptx", ".ppt", ".txt")
+
 # ============================================================================
 # FIXED DATABASE CONNECTION FOR RAILWAY
 # ============================================================================
@@ -98,6 +119,49 @@ def ensure_stored_documents_table() -> bool:
             )
         """
         )
+
+        # Content hash drives incremental ingestion and file ETags; size lets
+        # downloads skip the content column. Backfill rows uploaded before them.
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+        )
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS size_bytes BIGINT"
+        )
+        cursor.execute(
+            """
+            UPDATE stored_documents
+            SET content_hash = COALESCE(content_hash, encode(sha256(content), 'hex')),
+                size_bytes = COALESCE(size_bytes, octet_length(content))
+            WHERE content_hash IS NULL OR size_bytes IS NULL
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stored_documents_hash ON stored_documents(content_hash)"
+        )
+
+        # Indexed file name resolution for /static/uploads (see find_stored_document)
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS filename_normalized VARCHAR(255)"
+        )
+        cursor.execute(
+            "ALTER TABLE stored_documents ADD COLUMN IF NOT EXISTS filename_suffix VARCHAR(255)"
+        )
+        cursor.execute(
+            """
+            UPDATE stored_documents
+            SET filename_normalized = lower(filename),
+                filename_suffix = reverse(lower(filename))
+            WHERE filename_normalized IS NULL OR filename_suffix IS NULL
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stored_documents_name ON stored_documents(filename_normalized)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stored_documents_suffix "
+            "ON stored_documents(filename_suffix text_pattern_ops)"
+        )
         conn.commit()
         cursor.close()
         logger.info("✅ Stored documents table ensured")
@@ -111,57 +175,142 @@ def ensure_stored_documents_table() -> bool:
             conn.close()
 
 
-def get_documents_from_database() -> List[Tuple[str, bytes, str]]:
+def get_document_catalogue() -> Optional[Dict[str, str]]:
     """
-    Retrieve documents from the database with proper error handling.
+    Get the content hash of every indexable stored document without reading any content.
+
+    Only file types DocumentProcessor can parse are listed; images and Word
+    files would produce no chunks, so they'd never be cached and would be
+    streamed and re-parsed on every startup.
 
     Returns:
-        List[Tuple[str, bytes, str]]: A list of tuples containing (filename, content, content_type)
+        Optional[Dict[str, str]]: Mapping of filename to SHA-256 hex digest, or None on error.
     """
     conn = None
     try:
+        if not ensure_stored_documents_table():
+            return None
         conn = get_db_connection()
         if not conn:
-            logger.error("❌ No database connection available")
-            return []
+            return None
 
         cursor = conn.cursor()
-
-        # Ensure table exists
-        if not ensure_stored_documents_table():
-            logger.error("❌ Could not ensure stored_documents table exists")
-            return []
-
-        # Get documents
         cursor.execute(
             """
-            SELECT filename, content, content_type, upload_date
+            SELECT filename, content_hash
             FROM stored_documents
-            ORDER BY upload_date DESC
-        """
+            WHERE octet_length(content) > 0
+              AND lower(filename) LIKE ANY(%s)
+        """,
+            ([f"%{extension}" for extension in SUPPORTED_DOCUMENT_EXTENSIONS],),
         )
-
-        documents = cursor.fetchall()
+        catalogue = dict(cursor.fetchall())
         cursor.close()
+        return catalogue
+
+    except Exception as e:
+        logger.error(f"❌ Error getting document catalogue: {str(e)}")
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+
+def get_document_content(filename: str) -> Optional[bytes]:
+    """
+    Fetch the content of a single stored document.
 
-        logger.info(f"📄 Retrieved {len(documents)} documents from database")
+    Args:
+        filename (str): Name of the stored document.
 
-        # Return in expected format
-        result = []
-        for filename, content, content_type, upload_date in documents:
-            if content:  # Only include documents with content
-                result.append((filename, content, content_type))
+    Returns:
+        Optional[bytes]: The document bytes, or None if missing or on error.
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return None
 
-        return result
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT content FROM stored_documents WHERE filename = %s", (filename,)
+        )
+        row = cursor.fetchone()
+        cursor.close()
+        return bytes(row[0]) if row and row[0] else None
 
     except Exception as e:
-        logger.error(f"❌ Error getting documents from database: {str(e)}")
-        return []
+        logger.error(f"❌ Error getting document {filename}: {str(e)}")
+        return None
     finally:
         if conn:
             conn.close()
 
 
+def stream_documents_to_dir(
+    filenames: List[str], target_dir: str
+) -> Iterator[Tuple[str, str]]:
+    """
+    Write stored documents to files one row at a time.
+
+    Uses a server-side (named) cursor fetching a single row per round trip,
+    so only one document's content is in memory at any time.
+
+    Args:
+        filenames (List[str]): Names of the documents to fetch.
+        target_dir (str): Directory to write the files to.
+
+    Yields:
+        Tuple[str, str]: (filename, file_path) once each file has been written.
+    """
+    if not filenames:
+        return
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cursor = conn.cursor(name="stream_stored_documents")
+        cursor.itersize = 1
+        cursor.execute(
+            """
+            SELECT filename, content
+            FROM stored_documents
+            WHERE filename = ANY(%s)
+            ORDER BY filename
+        """,
+            (list(filenames),),
+        )
+        for filename, content in cursor:
+            file_path = os.path.join(target_dir, os.path.basename(filename))
+            with open(file_path, "wb") as f:
+                f.write(content)
+            del content
+            yield filename, file_path
+        cursor.close()
+    except Exception as e:
+        logger.error(f"❌ Error streaming documents from database: {str(e)}")
+    finally:
+        conn.close()
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Hash a file in blocks.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: SHA-256 hex digest, matching stored_documents.content_hash.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def create_temp_documents_from_db() -> str:
     """
     Create temporary directory with documents from database.
@@ -174,10 +323,10 @@ def create_temp_documents_from_db() -> str:
         temp_dir = tempfile.mkdtemp(prefix="railway_qa_docs_")
         logger.info(f"📁 Created temp directory: {temp_dir}")
 
-        # Get documents from database
-        documents = get_documents_from_database()
+        # Get document names from database (no content yet)
+        catalogue = get_document_catalogue()
 
-        if not documents:
+        if not catalogue:
             logger.warning("⚠️ No documents found in database")
             # Create a placeholder file so the system doesn't crash
             placeholder_content = """# Welcome to 51Talk AI Learning Platform
@@ -202,18 +351,11 @@ This is a placeholder document. Please upload your course materials through the
             logger.info("📄 Created placeholder document")
             return temp_dir
 
-        # Save documents to temp directory
+        # Stream documents to temp directory one at a time
         saved_count = 0
-        for filename, content, content_type in documents:
-            if content:
-                try:
-                    file_path = os.path.join(temp_dir, filename)
-                    with open(file_path, "wb") as f:
-                        f.write(content)
-                    saved_count += 1
-                    logger.info(f"📄 Extracted document: {filename}")
-                except Exception as e:
-                    logger.error(f"❌ Error saving {filename}: {str(e)}")
+        for filename, _ in stream_documents_to_dir(sorted(catalogue), temp_dir):
+            saved_count += 1
+            logger.info(f"📄 Extracted document: {filename}")
 
         logger.info(
             f"✅ Created temporary documents directory with {saved_count} files"
@@ -271,6 +413,69 @@ def get_openrouter_config() -> Tuple[Optional[str], Optional[str]]:
         return None, None
 
 
+RETRIEVAL_MODES = ("keyword", "dense", "hybrid")
+# How often (seconds) a worker checks stored_documents for uploads made through other workers
+DOCUMENT_SYNC_INTERVAL = int(os.getenv("DOCUMENT_SYNC_INTERVAL", "60"))
+CHUNK_CACHE_ENABLED = os.getenv("CHUNK_CACHE", "true").lower() in ("true", "1", "t")
+# Parse documents in a process pool when > 1; PDFs longer than INGEST_PDF_PAGES_PER_TASK
+# pages are split into page ranges so one large deck is spread over several workers
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_PDF_PAGES_PER_TASK = int(os.getenv("INGEST_PDF_PAGES_PER_TASK", "40"))
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+ANSWER_CACHE_BACKENDS = ("memory", "sqlite", "postgres")
+
+
+def get_retrieval_config() -> Dict[str, Any]:
+    """
+    Get retrieval configuration from environment variables.
+
+    Returns:
+        Dict[str, Any]: Retrieval mode and dense index settings.
+    """
+    mode = os.getenv("RETRIEVAL_MODE", "keyword").strip().lower()
+    if mode not in RETRIEVAL_MODES:
+        logger.warning(f"⚠️ Unknown RETRIEVAL_MODE '{mode}', using keyword retrieval")
+        mode = "keyword"
+    return {
+        "mode": mode,
+        "model_name": os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+        "batch_size": int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+        "ann_threshold": int(os.getenv("DENSE_ANN_THRESHOLD", "20000")),
+        "ann_index": os.getenv("DENSE_ANN_INDEX", "hnsw").strip().lower(),
+    }
+
+
+def get_answer_cache_config() -> Dict[str, Any]:
+    """
+    Get answer cache configuration from environment variables.
+
+    Returns:
+        Dict[str, Any]: backend ("memory", "sqlite" or "postgres"), ttl (seconds),
+            max_bytes (per process), shared_max_bytes (shared backend) and
+            sqlite_path, plus the semantic cache settings semantic (enabled),
+            semantic_threshold (minimum question_similarity()) and
+            semantic_size (questions remembered per language).
+    """
+    backend = os.getenv("ANSWER_CACHE_BACKEND", "memory").strip().lower()
+    if backend not in ANSWER_CACHE_BACKENDS:
+        logger.warning(f"⚠️ Unknown ANSWER_CACHE_BACKEND '{backend}', using memory")
+        backend = "memory"
+    return {
+        "backend": backend,
+        "ttl": int(os.getenv("ANSWER_CACHE_TTL", "86400")),
+        "max_bytes": int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+        "shared_max_bytes": int(
+            os.getenv("ANSWER_CACHE_SHARED_MAX_BYTES", str(64 * 1024 * 1024))
+        ),
+        "sqlite_path": os.getenv(
+            "ANSWER_CACHE_PATH", os.path.join("vector_db", "answer_cache.sqlite3")
+        ),
+        "semantic": os.getenv("SEMANTIC_CACHE", "false").lower() in ("true", "1", "t"),
+        "semantic_threshold": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85")),
+        "semantic_size": int(os.getenv("SEMANTIC_CACHE_SIZE", "1000")),
+    }
+
+
 # ============================================================================
 # CONVERSATION MEMORY
 # ============================================================================
@@ -333,94 +538,6 @@ class ConversationMemory:
         return "\n".join(context_parts)
 
 
-# ============================================================================
-# OPENROUTER GPT LLM
-# ============================================================================
-
-
-class OpenRouterLLM:
-    """OpenRouter GPT API wrapper with improved error handling."""
-
-    def __init__(self, api_key: str, model: str) -> None:
-        """
-        Initialize the OpenRouter LLM wrapper.
-
-        Args:
-            api_key (str): OpenRouter API key.
-            model (str): Model identifier to use.
-        """
-        self.api_key = api_key
-        self.model = model
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
-        self.timeout = 60
-
-    def generate_response(self, prompt: str) -> str:
-        """
-        Generate response with comprehensive error handling.
-
-        Args:
-            prompt (str): The prompt to send to the model.
-
-        Returns:
-            str: The generated response or an error message.
-        """
-        if not prompt or not prompt.strip():
-            return "[Error] Empty prompt provided"
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://51talk-ai-learning.com",
-            "X-Title": "51Talk AI Learning Platform",
-        }
-
-        payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 800,
-            "temperature": 0.7,
-            "top_p": 1,
-            "frequency_penalty": 0,
-            "presence_penalty": 0,
-        }
-
-        try:
-            response = requests.post(
-                self.base_url, headers=headers, json=payload, timeout=self.timeout
-            )
-
-            if response.status_code == 429:
-                return "[Rate Limited] Too many requests. Please wait a moment and try again."
-            elif response.status_code == 401:
-                return "[Authentication Error] Invalid OpenRouter API key. Please check your API configuration."
-            elif response.status_code == 402:
-                return "[Insufficient Credits] Please check your OpenRouter account balance."
-            elif response.status_code == 404:
-                return f"[Model Error] Model '{self.model}' not found. Please check your model configuration."
-            elif response.status_code != 200:
-                logger.error(
-                    f"OpenRouter API error: {response.status_code} - {response.text}"
-                )
-                return (
-                    f"[API Error] Service unavailable (Status: {response.status_code})"
-                )
-
-            data = response.json()
-
-            if "choices" in data and len(data["choices"]) > 0:
-                return data["choices"][0]["message"]["content"]
-            else:
-                return "[Error] No response generated by GPT model"
-
-        except requests.exceptions.Timeout:
-            return "[Timeout] GPT request timed out. Please try again."
-        except requests.exceptions.ConnectionError:
-            return "[Connection Error] Unable to connect to OpenRouter service."
-        except Exception as e:
-            logger.error(f"OpenRouter API error: {e}")
-            return f"[Error] {str(e)}"
-
-
 # ============================================================================
 # DOCUMENT LOADERS
 # ============================================================================
@@ -494,20 +611,27 @@ class DocumentProcessor:
             documents_dir (str, optional): Directory containing documents. If None, creates from database.
         """
         self.documents_dir = documents_dir or create_temp_documents_from_db()
+        self.chunk_size = 800
+        self.chunk_overlap = 100
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800, chunk_overlap=100, length_function=len
+            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, length_function=len
         )
 
-    def load_documents(self) -> List[Any]:
+    @property
+    def splitter_key(self) -> str:
+        """Identifies the chunking settings, so cached chunks are reused only if they match."""
+        return (
+            f"{ChunkCache.FORMAT_VERSION}:{type(self.text_splitter).__name__}:"
+            f"{self.chunk_size}:{self.chunk_overlap}"
+        )
+
+    def list_document_files(self) -> List[Tuple[str, str]]:
         """
-        Load documents from the configured directory.
+        List supported document files in the configured directory.
 
         Returns:
-            List[Any]: List of loaded document objects.
+            List[Tuple[str, str]]: List of (file_path, filename) tuples.
         """
-        all_docs = []
-
-        # Check if documents directory exists and has files
         if not os.path.exists(self.documents_dir):
             logger.error(f"❌ Documents directory does not exist: {self.documents_dir}")
             return []
@@ -515,41 +639,59 @@ class DocumentProcessor:
         files_found = []
         for root, _, files in os.walk(self.documents_dir):
             for file in files:
-                if file.lower().endswith((".pdf", ".pptx", ".ppt", ".txt")):
-                    files_found.append(file)
+                if file.lower().endswith(SUPPORTED_DOCUMENT_EXTENSIONS):
+                    files_found.append((os.path.join(root, file), file))
+        # Sorted so chunk order (and the persisted dense index) is stable across restarts
+        files_found.sort(key=lambda item: item[1])
 
         if not files_found:
             logger.warning(
                 f"⚠️ No supported document files found in {self.documents_dir}"
             )
-            return []
+        else:
+            logger.info(
+                f"📁 Found {len(files_found)} document files: {[f for _, f in files_found]}"
+            )
+        return files_found
 
-        logger.info(f"📁 Found {len(files_found)} document files: {files_found}")
+    def load_file(self, file_path: str, filename: str) -> List[Any]:
+        """
+        Load a single document file.
 
-        # Process each file
-        for root, _, files in os.walk(self.documents_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                filename = os.path.basename(file_path)
-                try:
-                    if file.lower().endswith(".pdf"):
-                        docs = self._load_pdf(file_path, filename)
-                        all_docs.extend(docs)
-                        logger.info(f"📄 Loaded {len(docs)} pages from PDF: {filename}")
-                    elif file.lower().endswith((".pptx", ".ppt")):
-                        loader = PPTXLoader(file_path)
-                        docs = loader.load()
-                        all_docs.extend(docs)
-                        logger.info(
-                            f"📄 Loaded {len(docs)} slides from PPTX: {filename}"
-                        )
-                    elif file.lower().endswith(".txt"):
-                        docs = self._load_txt(file_path, filename)
-                        all_docs.extend(docs)
-                        logger.info(f"📄 Loaded text file: {filename}")
-                except Exception as e:
-                    logger.error(f"❌ Error processing {file_path}: {str(e)}")
-                    continue
+        Args:
+            file_path (str): Path to the file.
+            filename (str): Name of the file.
+
+        Returns:
+            List[Any]: List of loaded pages, slides or text sections.
+        """
+        try:
+            if filename.lower().endswith(".pdf"):
+                docs = self._load_pdf(file_path, filename)
+                logger.info(f"📄 Loaded {len(docs)} pages from PDF: {filename}")
+                return docs
+            elif filename.lower().endswith((".pptx", ".ppt")):
+                docs = PPTXLoader(file_path).load()
+                logger.info(f"📄 Loaded {len(docs)} slides from PPTX: {filename}")
+                return docs
+            elif filename.lower().endswith(".txt"):
+                docs = self._load_txt(file_path, filename)
+                logger.info(f"📄 Loaded text file: {filename}")
+                return docs
+        except Exception as e:
+            logger.error(f"❌ Error processing {file_path}: {str(e)}")
+        return []
+
+    def load_documents(self) -> List[Any]:
+        """
+        Load documents from the configured directory.
+
+        Returns:
+            List[Any]: List of loaded document objects.
+        """
+        all_docs = []
+        for file_path, filename in self.list_document_files():
+            all_docs.extend(self.load_file(file_path, filename))
 
         logger.info(f"✅ Total loaded document sections: {len(all_docs)}")
         return all_docs
@@ -620,7 +762,159 @@ class DocumentProcessor:
         if not docs:
             logger.warning("⚠️ No documents loaded")
             return []
+        return self.split_documents(docs)
+
+    def process_file(
+        self,
+        file_path: str,
+        filename: str,
+        page_range: Optional[Tuple[int, int]] = None,
+    ) -> List[Any]:
+        """
+        Load and chunk a single document file.
+
+        Args:
+            file_path (str): Path to the file.
+            filename (str): Name of the file.
+            page_range (Optional[Tuple[int, int]]): For PDFs, the [start, end) pages to load.
+
+        Returns:
+            List[Any]: List of processed document chunks.
+        """
+        if page_range and filename.lower().endswith(".pdf"):
+            docs = self._load_pdf_pages(file_path, filename, *page_range)
+        else:
+            docs = self.load_file(file_path, filename)
+        return self.split_documents(docs) if docs else []
+
+    def process_files_parallel(
+        self,
+        files: Iterable[Tuple[str, str]],
+        max_workers: int = INGEST_WORKERS,
+        pages_per_task: int = INGEST_PDF_PAGES_PER_TASK,
+        remove_files: bool = False,
+    ) -> Dict[str, Optional[List[Any]]]:
+        """
+        Chunk files in a process pool, splitting long PDFs into page ranges.
+
+        Files are taken from the iterable only as earlier ones finish, so about
+        max_workers files are on disk at a time; with remove_files each is
+        deleted once all of its tasks are done. Results
+        are merged in submission order (file, then page range), so the chunks
+        and their ids are the same as when processing serially.
+
+        Args:
+            files (Iterable[Tuple[str, str]]): (file_path, filename) tuples.
+            max_workers (int): Number of worker processes.
+            pages_per_task (int): Maximum PDF pages handled by one task.
+            remove_files (bool): Delete each file once it has been parsed.
+
+        Returns:
+            Dict[str, Optional[List[Any]]]: Chunks per filename, None if any part failed.
+        """
+        results: Dict[str, Optional[List[Any]]] = {}
+        pending: Deque[Tuple[str, str, List[Tuple[Optional[Tuple[int, int]], Future]]]] = deque()
+        file_count = task_count = 0
+
+        def finish_oldest() -> None:
+            file_path, filename, parts = pending.popleft()
+            for page_range, future in parts:
+                try:
+                    chunks = future.result()
+                    if results[filename] is not None:
+                        results[filename].extend(chunks)
+                except Exception as e:
+                    logger.error(f"❌ Error processing {filename} {page_range or ''}: {str(e)}")
+                    results[filename] = None
+            if remove_files:
+                os.remove(file_path)
+
+        # spawn rather than fork: the parent is a threaded web worker, and a forked
+        # child could inherit locks (e.g. logging's) held by another thread
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            for file_path, filename in files:
+                if len(pending) >= max_workers:
+                    finish_oldest()
+                page_ranges: List[Optional[Tuple[int, int]]] = [None]
+                if filename.lower().endswith(".pdf"):
+                    page_count = self._pdf_page_count(file_path)
+                    if page_count > pages_per_task:
+                        page_ranges = [
+                            (start, min(start + pages_per_task, page_count))
+                            for start in range(0, page_count, pages_per_task)
+                        ]
+                results[filename] = []
+                parts = [
+                    (page_range, executor.submit(_process_file_task, file_path, filename, page_range))
+                    for page_range in page_ranges
+                ]
+                pending.append((file_path, filename, parts))
+                file_count += 1
+                task_count += len(page_ranges)
+            while pending:
+                finish_oldest()
+
+        logger.info(
+            f"⚙️ Parsed {file_count} files as {task_count} tasks on {max_workers} processes"
+        )
+        return results
+
+    def _pdf_page_count(self, file_path: str) -> int:
+        """
+        Count the pages of a PDF without extracting any text.
 
+        Args:
+            file_path (str): Path to the PDF file.
+
+        Returns:
+            int: Number of pages, 0 if the file can't be read.
+        """
+        try:
+            from pypdf import PdfReader
+
+            return len(PdfReader(file_path).pages)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not count pages of {file_path}: {str(e)}")
+            return 0
+
+    def _load_pdf_pages(
+        self, file_path: str, filename: str, start: int, end: int
+    ) -> List[Any]:
+        """
+        Load a page range of a PDF, with the same page metadata as PyPDFLoader.
+
+        Args:
+            file_path (str): Path to the PDF file.
+            filename (str): Name of the file.
+            start (int): First page (0-based).
+            end (int): Page after the last one to load.
+
+        Returns:
+            List[Any]: List of loaded PDF pages.
+        """
+        from pypdf import PdfReader
+
+        reader = PdfReader(file_path)
+        return [
+            Document(
+                page_content=reader.pages[page].extract_text(),
+                metadata={"source": file_path, "page": page, "filename": filename},
+            )
+            for page in range(start, min(end, len(reader.pages)))
+        ]
+
+    def split_documents(self, docs: List[Any]) -> List[Any]:
+        """
+        Normalize whitespace and split loaded documents into chunks.
+
+        Args:
+            docs (List[Any]): List of loaded document objects.
+
+        Returns:
+            List[Any]: List of processed document chunks.
+        """
         logger.info(f"📄 Processing {len(docs)} documents into chunks...")
         try:
             texts = []
@@ -638,41 +932,218 @@ class DocumentProcessor:
                     metadatas.append(metadata)
 
             splits = self.text_splitter.create_documents(texts, metadatas=metadatas)
+            self._assign_chunk_ids(splits)
             logger.info(f"✅ Created {len(splits)} document chunks")
             return splits
         except Exception as e:
             logger.error(f"❌ Error processing documents: {str(e)}")
             return []
 
+    @staticmethod
+    def _assign_chunk_ids(chunks: List[Any]) -> None:
+        """
+        Give every chunk a stable "filename:page:ordinal" id in its metadata.
+
+        Args:
+            chunks (List[Any]): List of document chunks, in split order.
+        """
+        ordinals: Counter = Counter()
+        for chunk in chunks:
+            key = (chunk.metadata.get("filename", ""), chunk.metadata.get("page", 0))
+            chunk.metadata["chunk_id"] = f"{key[0]}:{key[1]}:{ordinals[key]}"
+            ordinals[key] += 1
+
+
+def _process_file_task(
+    file_path: str, filename: str, page_range: Optional[Tuple[int, int]]
+) -> List[Any]:
+    """
+    Process pool entry point: chunk one file, or one page range of a PDF.
+
+    Args:
+        file_path (str): Path to the file.
+        filename (str): Name of the file.
+        page_range (Optional[Tuple[int, int]]): For PDFs, the [start, end) pages to load.
+
+    Returns:
+        List[Any]: List of processed document chunks.
+    """
+    processor = DocumentProcessor(os.path.dirname(file_path))
+    return processor.process_file(file_path, filename, page_range)
+
 
 # ============================================================================
-# VECTOR STORE - RAILWAY COMPATIBLE
+# CHUNK CACHE - SKIP PARSING ON WARM RESTARTS
 # ============================================================================
 
 
-class VectorStore:
-    """Vector store manager for Railway deployment."""
+class ChunkCache:
+    """SQLite store of split chunks keyed by document hash, filename and splitter settings."""
 
-    def __init__(self, documents_dir: str = None, vector_db_path: str = "vector_db") -> None:
+    FORMAT_VERSION = 1
+    FILE_NAME = "chunk_cache.sqlite3"
+
+    def __init__(self, cache_dir: str) -> None:
         """
-        Initialize the vector store manager.
+        Open (or create) the cache database.
 
         Args:
-            documents_dir (str, optional): Directory containing documents. If None, creates from database.
-            vector_db_path (str): Path to store vector database.
+            cache_dir (str): Directory holding the cache file.
         """
-        self.documents_dir = documents_dir or create_temp_documents_from_db()
-        self.vector_db_path = vector_db_path
-        self.embeddings = None
-        self.vector_store_instance = None
-        self.document_chunks = []
-        self._initialization_lock = threading.Lock()
-        self._is_initializing = False
-        self._initialization_complete = False
-        self._initialization_error = None
-        self._start_background_initialization()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, self.FILE_NAME)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_cache (
+                    content_hash TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    splitter_key TEXT NOT NULL,
+                    chunks BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (content_hash, filename, splitter_key)
+                )
+            """
+            )
 
-    def _start_background_initialization(self) -> None:
+    def _connect(self) -> sqlite3.Connection:
+        """Open a short-lived connection; SQLite connections aren't shared across threads."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, content_hash: str, filename: str, splitter_key: str) -> Optional[List[Any]]:
+        """
+        Load cached chunks for a document.
+
+        Args:
+            content_hash (str): SHA-256 of the document content.
+            filename (str): Name of the document.
+            splitter_key (str): Splitter settings the chunks must have been made with.
+
+        Returns:
+            Optional[List[Any]]: The chunks as Documents, or None on a cache miss.
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    """
+                    SELECT chunks FROM chunk_cache
+                    WHERE content_hash = ? AND filename = ? AND splitter_key = ?
+                """,
+                    (content_hash, filename, splitter_key),
+                ).fetchone()
+            if not row:
+                return None
+            return [
+                Document(page_content=item["page_content"], metadata=item["metadata"])
+                for item in json.loads(zlib.decompress(row[0]))
+            ]
+        except Exception as e:
+            logger.warning(f"⚠️ Chunk cache read failed for {filename}: {str(e)}")
+            return None
+
+    def put(
+        self, content_hash: str, filename: str, splitter_key: str, chunks: List[Any]
+    ) -> None:
+        """
+        Store the chunks of a document.
+
+        Args:
+            content_hash (str): SHA-256 of the document content.
+            filename (str): Name of the document.
+            splitter_key (str): Splitter settings the chunks were made with.
+            chunks (List[Any]): The document's chunks.
+        """
+        payload = [
+            {
+                "page_content": _chunk_text(chunk),
+                "metadata": (
+                    chunk.metadata if hasattr(chunk, "metadata") else chunk.get("metadata", {})
+                ),
+            }
+            for chunk in chunks
+        ]
+        try:
+            blob = zlib.compress(json.dumps(payload, default=str).encode("utf-8"))
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO chunk_cache
+                        (content_hash, filename, splitter_key, chunks)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (content_hash, filename, splitter_key, blob),
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Chunk cache write failed for {filename}: {str(e)}")
+
+    def prune(self, live_hashes: List[str]) -> None:
+        """
+        Drop entries for documents that are no longer in the corpus.
+
+        Args:
+            live_hashes (List[str]): Content hashes of the current documents.
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute("CREATE TEMP TABLE live_hashes (content_hash TEXT PRIMARY KEY)")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO live_hashes VALUES (?)",
+                    [(h,) for h in live_hashes],
+                )
+                conn.execute(
+                    """
+                    DELETE FROM chunk_cache
+                    WHERE content_hash NOT IN (SELECT content_hash FROM live_hashes)
+                """
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Chunk cache prune failed: {str(e)}")
+
+
+# ============================================================================
+# VECTOR STORE - RAILWAY COMPATIBLE
+# ============================================================================
+
+
+class VectorStore:
+    """Vector store manager for Railway deployment."""
+
+    def __init__(
+        self,
+        documents_dir: str = None,
+        vector_db_path: str = "vector_db",
+        retrieval_mode: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the vector store manager.
+
+        Args:
+            documents_dir (str, optional): Directory containing documents. If None, streams from database.
+            vector_db_path (str): Path to store vector database.
+            retrieval_mode (str, optional): "keyword", "dense" or "hybrid". If None, read from RETRIEVAL_MODE.
+        """
+        self.documents_dir = documents_dir
+        self.vector_db_path = vector_db_path
+        self.retrieval_config = get_retrieval_config()
+        self.retrieval_mode = retrieval_mode or self.retrieval_config["mode"]
+        self.embeddings = None
+        self.vector_store_instance = None
+        self.document_chunks = []
+        self.search_index: Optional["BM25Index"] = None
+        self.dense_index: Optional["DenseIndex"] = None
+        # Ingestion catalogue: filename -> {"hash": content sha256, "chunk_ids": [...]}
+        self.catalogue: Dict[str, Dict[str, Any]] = {}
+        self.chunk_cache = self._open_chunk_cache()
+        self._update_lock = threading.RLock()
+        self._last_sync = 0.0
+        self._sync_in_progress = False
+        self._initialization_lock = threading.Lock()
+        self._is_initializing = False
+        self._initialization_complete = False
+        self._initialization_error = None
+        self._start_background_initialization()
+
+    def _start_background_initialization(self) -> None:
         """Start background initialization of the vector store."""
         def initialize():
             try:
@@ -684,11 +1155,33 @@ class VectorStore:
                         "🚀 Starting Railway-compatible vector store initialization..."
                     )
 
-                    # Load documents from temporary directory (created from database)
-                    processor = DocumentProcessor(self.documents_dir)
-                    self.document_chunks = processor.process_documents()
+                    self._last_sync = time.time()
+
+                    # Load documents one file at a time so each file's chunks can be
+                    # replaced later
+                    if self.documents_dir:
+                        files, file_chunks = self._load_directory()
+                    else:
+                        files, file_chunks = self._load_database()
+                    self.document_chunks = []
+                    for filename, content_hash in files:
+                        chunks = file_chunks[filename]
+                        start = len(self.document_chunks)
+                        self.catalogue[filename] = {
+                            "hash": content_hash,
+                            "chunk_ids": list(range(start, start + len(chunks))),
+                        }
+                        self.document_chunks.extend(chunks)
+                    if self.chunk_cache:
+                        self.chunk_cache.prune(
+                            [entry["hash"] for entry in self.catalogue.values()]
+                        )
+
+                    # Build the keyword index once so queries don't rescan every chunk
+                    self.search_index = BM25Index(self.document_chunks)
+                    if self.retrieval_mode != "keyword":
+                        self.dense_index = self._build_dense_index()
 
-                    # Mark as complete - we don't need actual vector store for OpenRouter/GPT
                     self._initialization_complete = True
                     self._is_initializing = False
                     logger.info(
@@ -703,7 +1196,167 @@ class VectorStore:
         thread = threading.Thread(target=initialize, daemon=True)
         thread.start()
 
-    def get_vector_store(self, timeout: int = 30) -> "MockRetriever":
+    def _open_chunk_cache(self) -> Optional[ChunkCache]:
+        """
+        Open the on-disk chunk cache next to the vector database.
+
+        Returns:
+            Optional[ChunkCache]: The cache, or None if disabled or unavailable.
+        """
+        if not CHUNK_CACHE_ENABLED:
+            return None
+        try:
+            return ChunkCache(self.vector_db_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Chunk cache unavailable, documents will be re-parsed: {str(e)}")
+            return None
+
+    def _load_directory(self) -> Tuple[List[Tuple[str, str]], Dict[str, List[Any]]]:
+        """
+        Load chunks for every document file in documents_dir.
+
+        Returns:
+            Tuple[List[Tuple[str, str]], Dict[str, List[Any]]]: (filename, content_hash)
+                pairs in load order, and chunks per filename.
+        """
+        processor = DocumentProcessor(self.documents_dir)
+        paths = {filename: file_path for file_path, filename in processor.list_document_files()}
+        files = [(filename, file_sha256(file_path)) for filename, file_path in paths.items()]
+        file_chunks = self._load_chunks(
+            processor, files, lambda names: ((name, paths[name]) for name in names)
+        )
+        return files, file_chunks
+
+    def _load_database(self) -> Tuple[List[Tuple[str, str]], Dict[str, List[Any]]]:
+        """
+        Load chunks for every stored document, streaming only uncached ones.
+
+        Document hashes are read first; content is then streamed row by row for
+        cache misses only, each file removed once parsed, so peak memory is
+        bounded by the largest single document rather than the whole corpus.
+
+        Returns:
+            Tuple[List[Tuple[str, str]], Dict[str, List[Any]]]: (filename, content_hash)
+                pairs in load order, and chunks per filename.
+
+        Raises:
+            Exception: If the document catalogue can't be read.
+        """
+        catalogue = get_document_catalogue()
+        if catalogue is None:
+            raise Exception("Could not read stored_documents from the database")
+        logger.info(f"📚 Found {len(catalogue)} documents in database")
+
+        files = sorted(catalogue.items())
+        temp_dir = tempfile.mkdtemp(prefix="railway_qa_docs_")
+        try:
+            file_chunks = self._load_chunks(
+                DocumentProcessor(temp_dir),
+                files,
+                lambda names: stream_documents_to_dir(names, temp_dir),
+                remove_files=True,
+            )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return files, file_chunks
+
+    def _load_chunks(
+        self,
+        processor: DocumentProcessor,
+        files: List[Tuple[str, str]],
+        materialize: Callable[[List[str]], Iterator[Tuple[str, str]]],
+        remove_files: bool = False,
+    ) -> Dict[str, List[Any]]:
+        """
+        Get chunks for files from the chunk cache, parsing and caching the misses.
+
+        Misses are parsed as materialize() produces them: in a process pool
+        when INGEST_WORKERS > 1, otherwise one at a time.
+
+        Args:
+            processor (DocumentProcessor): Processor used on cache misses.
+            files (List[Tuple[str, str]]): List of (filename, content_hash).
+            materialize (Callable[[List[str]], Iterator[Tuple[str, str]]]): Given the
+                missed filenames, yields (filename, file_path) with each file on disk.
+            remove_files (bool): Delete each materialized file once it has been parsed.
+
+        Returns:
+            Dict[str, List[Any]]: Chunks per filename.
+        """
+        results: Dict[str, List[Any]] = {}
+        misses = []
+        for filename, content_hash in files:
+            chunks = None
+            if self.chunk_cache:
+                chunks = self.chunk_cache.get(content_hash, filename, processor.splitter_key)
+            if chunks is not None:
+                logger.info(f"💾 Loaded {len(chunks)} cached chunks for {filename}")
+                results[filename] = chunks
+            else:
+                misses.append(filename)
+
+        if INGEST_WORKERS > 1 and len(misses) > 1:
+            parsed = processor.process_files_parallel(
+                ((file_path, filename) for filename, file_path in materialize(misses)),
+                remove_files=remove_files,
+            )
+        else:
+            parsed = {}
+            for filename, file_path in materialize(misses):
+                parsed[filename] = processor.process_file(file_path, filename)
+                if remove_files:
+                    os.remove(file_path)
+
+        hashes = dict(files)
+        for filename in misses:
+            chunks = parsed.get(filename)
+            if self.chunk_cache and chunks:
+                self.chunk_cache.put(
+                    hashes[filename], filename, processor.splitter_key, chunks
+                )
+            results[filename] = chunks or []
+        return results
+
+    def _build_dense_index(self) -> Optional["DenseIndex"]:
+        """
+        Build or load the FAISS index, falling back to keyword retrieval on failure.
+
+        Returns:
+            Optional[DenseIndex]: The dense index, or None if it could not be built.
+        """
+        try:
+            return DenseIndex(
+                self.document_chunks,
+                self.vector_db_path,
+                model_name=self.retrieval_config["model_name"],
+                batch_size=self.retrieval_config["batch_size"],
+                ann_threshold=self.retrieval_config["ann_threshold"],
+                ann_index=self.retrieval_config["ann_index"],
+            )
+        except ImportError as e:
+            logger.warning(
+                f"⚠️ Dense retrieval unavailable ({str(e)}), using keyword retrieval"
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to build dense index, using keyword retrieval: {str(e)}")
+        self.retrieval_mode = "keyword"
+        return None
+
+    def _active_index(self) -> Any:
+        """
+        Get the index matching the configured retrieval mode.
+
+        Returns:
+            Any: A BM25Index, DenseIndex or HybridIndex.
+        """
+        if self.dense_index is not None:
+            if self.retrieval_mode == "dense":
+                return self.dense_index
+            if self.retrieval_mode == "hybrid":
+                return HybridIndex(self.search_index, self.dense_index)
+        return self.search_index
+
+    def get_vector_store(self, timeout: int = 30) -> "IndexRetriever":
         """
         Get a vector store retriever.
 
@@ -711,7 +1364,7 @@ class VectorStore:
             timeout (int): Timeout in seconds for initialization.
 
         Returns:
-            MockRetriever: A mock retriever instance.
+            IndexRetriever: A retriever over the index for the configured retrieval mode.
 
         Raises:
             TimeoutError: If initialization times out.
@@ -720,7 +1373,7 @@ class VectorStore:
         start_time = time.time()
         while time.time() - start_time < timeout:
             if self._initialization_complete:
-                return MockRetriever(self.document_chunks)
+                return IndexRetriever(self._active_index())
             elif self._initialization_error:
                 raise Exception(f"Vector store failed: {self._initialization_error}")
             time.sleep(0.5)
@@ -730,97 +1383,1490 @@ class VectorStore:
         """
         Check if the vector store is ready.
 
-        Returns:
-            bool: True if initialization is complete, False otherwise.
-        """
-        return self._initialization_complete
+        Returns:
+            bool: True if initialization is complete, False otherwise.
+        """
+        return self._initialization_complete
+
+    def chunk_count(self) -> int:
+        """
+        Get the number of indexed chunks.
+
+        Returns:
+            int: Number of live chunks in the index.
+        """
+        return len(self.search_index) if self.search_index else 0
+
+    def corpus_version(self) -> str:
+        """
+        Identify the set of indexed documents and their contents.
+
+        Returns:
+            str: Hash over (filename, content hash) of every indexed document.
+        """
+        with self._update_lock:
+            items = sorted((name, entry["hash"]) for name, entry in self.catalogue.items())
+        return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()[:16]
+
+    def add_document(self, filename: str, content: bytes) -> int:
+        """
+        Index a new or changed document, replacing any chunks it had before.
+
+        Args:
+            filename (str): Name of the document.
+            content (bytes): Raw document content.
+
+        Returns:
+            int: Number of chunks indexed, 0 if the content was unchanged.
+        """
+        if not self._initialization_complete:
+            return 0
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        with self._update_lock:
+            entry = self.catalogue.get(filename)
+            if entry and entry["hash"] == content_hash:
+                logger.info(f"📄 {filename} unchanged, skipping re-index")
+                return 0
+
+            temp_dir = tempfile.mkdtemp(prefix="railway_qa_doc_")
+            try:
+                file_path = os.path.join(temp_dir, filename)
+                with open(file_path, "wb") as f:
+                    f.write(content)
+                chunks = self._load_chunks(
+                    DocumentProcessor(temp_dir),
+                    [(filename, content_hash)],
+                    lambda names: iter([(filename, file_path)]),
+                )[filename]
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+            if entry:
+                self._remove_chunks(entry["chunk_ids"])
+            chunk_ids = self.search_index.add_documents(chunks)
+            if self.dense_index is not None:
+                self.dense_index.add_documents(chunks)
+                self.dense_index.save()
+            self.catalogue[filename] = {"hash": content_hash, "chunk_ids": chunk_ids}
+
+        logger.info(
+            f"✅ {'Re-indexed' if entry else 'Indexed'} {filename}: {len(chunk_ids)} chunks"
+        )
+        return len(chunk_ids)
+
+    def remove_document(self, filename: str) -> bool:
+        """
+        Remove a document's chunks from the index.
+
+        Args:
+            filename (str): Name of the document.
+
+        Returns:
+            bool: True if the document was indexed and has been removed.
+        """
+        with self._update_lock:
+            entry = self.catalogue.pop(filename, None)
+            if not entry:
+                return False
+            self._remove_chunks(entry["chunk_ids"])
+            if self.dense_index is not None:
+                self.dense_index.save()
+        logger.info(f"🗑️ Removed {len(entry['chunk_ids'])} chunks of {filename} from index")
+        return True
+
+    def _remove_chunks(self, chunk_ids: List[int]) -> None:
+        """Remove chunks from every index."""
+        self.search_index.remove_documents(chunk_ids)
+        if self.dense_index is not None:
+            self.dense_index.remove_documents(chunk_ids)
+
+    def sync_with_database(self) -> Optional[Dict[str, int]]:
+        """
+        Bring the index in line with stored_documents using content hashes.
+
+        Only documents whose hash differs from the catalogue are fetched and parsed.
+
+        Returns:
+            Optional[Dict[str, int]]: Counts of added, updated, removed and unchanged
+                documents, or None if the database catalogue is unavailable.
+        """
+        if not self._initialization_complete:
+            return None
+        catalogue = get_document_catalogue()
+        if catalogue is None:
+            return None
+
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._update_lock:
+            for filename in list(self.catalogue):
+                if filename not in catalogue and self.remove_document(filename):
+                    stats["removed"] += 1
+
+            for filename, content_hash in catalogue.items():
+                entry = self.catalogue.get(filename)
+                if entry and entry["hash"] == content_hash:
+                    stats["unchanged"] += 1
+                    continue
+                content = get_document_content(filename)
+                if content is None:
+                    continue
+                self.add_document(filename, content)
+                stats["updated" if entry else "added"] += 1
+            self._last_sync = time.time()
+
+        logger.info(f"🔄 Document sync complete: {stats}")
+        return stats
+
+    def sync_if_stale(self, max_age: int = DOCUMENT_SYNC_INTERVAL) -> None:
+        """
+        Start a background sync if the last one is older than max_age seconds.
+
+        Args:
+            max_age (int): Maximum age of the last sync in seconds.
+        """
+        if (
+            not self._initialization_complete
+            or self._sync_in_progress
+            or time.time() - self._last_sync < max_age
+        ):
+            return
+        self._sync_in_progress = True
+        self._last_sync = time.time()
+
+        def sync():
+            try:
+                self.sync_with_database()
+            except Exception as e:
+                logger.error(f"❌ Background document sync failed: {str(e)}")
+            finally:
+                self._sync_in_progress = False
+
+        threading.Thread(target=sync, daemon=True).start()
+
+
+class MockRetriever:
+    """Mock retriever for Railway deployment."""
+
+    def __init__(self, document_chunks: List[Any]) -> None:
+        """
+        Initialize the mock retriever.
+
+        Args:
+            document_chunks (List[Any]): List of document chunks to search through.
+        """
+        self.document_chunks = document_chunks
+        logger.info(f"🔍 MockRetriever initialized with {len(document_chunks)} chunks")
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> "MockRetriever":
+        """
+        Return self as a retriever.
+
+        Args:
+            search_kwargs (Optional[Dict[str, Any]]): Optional search parameters.
+
+        Returns:
+            MockRetriever: This instance.
+        """
+        return self
+
+    def get_relevant_documents(
+        self, query: str, search_kwargs: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Search for relevant documents based on a query.
+
+        Args:
+            query (str): The search query.
+            search_kwargs (Optional[Dict[str, Any]]): Optional search parameters.
+
+        Returns:
+            List[Any]: List of relevant documents.
+        """
+        if not self.document_chunks:
+            logger.warning("⚠️ No document chunks available for search")
+            return []
+
+        query_lower = query.lower()
+        scored_docs = []
+
+        for doc in self.document_chunks:
+            content = (
+                doc.page_content
+                if hasattr(doc, "page_content")
+                else doc.get("page_content", "")
+            )
+            if not content:
+                continue
+
+            content_lower = content.lower()
+
+            # Improved scoring based on keyword matches
+            score = 0
+            query_words = query_lower.split()
+            for word in query_words:
+                if len(word) > 2:  # Skip short words
+                    # Exact word matches
+                    score += content_lower.count(word) * 2
+                    # Partial matches
+                    if word in content_lower:
+                        score += 1
+
+            # Bonus for question words
+            question_words = ["what", "how", "why", "when", "where", "which", "who"]
+            for qword in question_words:
+                if qword in query_lower and qword in content_lower:
+                    score += 3
+
+            if score > 0:
+                scored_docs.append((score, doc))
+
+        # Sort by score and return top results
+        scored_docs.sort(key=lambda x: x[0], reverse=True)
+        k = search_kwargs.get("k", 6) if search_kwargs else 6
+
+        results = [doc for score, doc in scored_docs[:k]]
+        logger.info(
+            f"🔍 Found {len(results)} relevant documents for query: {query[:50]}..."
+        )
+        return results
+
+
+# ============================================================================
+# RETRIEVAL ENGINE - BM25 INVERTED INDEX
+# ============================================================================
+
+# CJK ideographs are indexed one character at a time since Chinese text has no
+# whitespace word boundaries; other scripts use runs of 2+ word characters.
+_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]|[^\W_\u4e00-\u9fff]{2,}")
+
+
+def _chunk_text(doc: Any) -> str:
+    """
+    Get the text of a document chunk.
+
+    Args:
+        doc (Any): A langchain Document or a loader dictionary.
+
+    Returns:
+        str: The chunk's page content.
+    """
+    return doc.page_content if hasattr(doc, "page_content") else doc.get("page_content", "")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: List of terms.
+    """
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Inverted index over document chunks with Okapi BM25 scoring."""
+
+    def __init__(self, document_chunks: List[Any], k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Build the index.
+
+        Args:
+            document_chunks (List[Any]): List of document chunks to index.
+            k1 (float): Term frequency saturation parameter.
+            b (float): Document length normalization parameter.
+        """
+        self.k1 = k1
+        self.b = b
+        # Chunk index -> chunk; removed chunks leave a None slot so indexes stay stable
+        self.document_chunks: List[Optional[Any]] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: List[int] = []
+        self._length_norms: List[float] = []
+        self._live_count = 0
+        self._lock = threading.RLock()
+
+        start_time = time.time()
+        self.add_documents(document_chunks)
+        logger.info(
+            f"🔍 BM25 index built: {len(self)} chunks, "
+            f"{len(self.postings)} terms in {time.time() - start_time:.2f}s"
+        )
+
+    def add_documents(self, chunks: List[Any]) -> List[int]:
+        """
+        Tokenize and index chunks.
+
+        Args:
+            chunks (List[Any]): List of document chunks.
+
+        Returns:
+            List[int]: The chunk indexes assigned, in order.
+        """
+        with self._lock:
+            doc_ids = []
+            for doc in chunks:
+                doc_id = len(self.document_chunks)
+                tokens = tokenize(_chunk_text(doc))
+                self.document_chunks.append(doc)
+                self.doc_lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    self.postings.setdefault(term, {})[doc_id] = tf
+                doc_ids.append(doc_id)
+            self._live_count += len(doc_ids)
+            self._update_length_norms()
+            return doc_ids
+
+    def remove_documents(self, doc_ids: List[int]) -> None:
+        """
+        Drop chunks from the postings lists.
+
+        Args:
+            doc_ids (List[int]): Chunk indexes to remove.
+        """
+        with self._lock:
+            for doc_id in doc_ids:
+                doc = self.document_chunks[doc_id]
+                if doc is None:
+                    continue
+                for term in set(tokenize(_chunk_text(doc))):
+                    term_postings = self.postings.get(term)
+                    if term_postings is not None:
+                        term_postings.pop(doc_id, None)
+                        if not term_postings:
+                            del self.postings[term]
+                self.document_chunks[doc_id] = None
+                self.doc_lengths[doc_id] = 0
+                self._live_count -= 1
+            self._update_length_norms()
+
+    def _update_length_norms(self) -> None:
+        """Precompute the per-chunk BM25 length normalization term."""
+        total_length = sum(self.doc_lengths)
+        avg_length = total_length / self._live_count if total_length else 1.0
+        self._length_norms = [
+            self.k1 * (1 - self.b + self.b * length / avg_length)
+            for length in self.doc_lengths
+        ]
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def idf(self, term: str) -> float:
+        """
+        Inverse document frequency of a term.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            float: The (always positive) BM25 idf weight.
+        """
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self._live_count - df + 0.5) / (df + 0.5))
+
+    def search(
+        self,
+        query: str,
+        k: int = 6,
+        expansion: Optional[List[str]] = None,
+        expansion_weight: float = 0.5,
+    ) -> List[Tuple[int, float]]:
+        """
+        Score chunks against a query.
+
+        Only the postings of the query terms are visited, and the top k are
+        selected with a heap instead of sorting every scored chunk. Expansion
+        terms are scored in the same pass with extra weight.
+
+        Args:
+            query (str): The search query.
+            k (int): Number of results to return.
+            expansion (Optional[List[str]]): Extra keywords to boost.
+            expansion_weight (float): Weight added for each expansion term.
+
+        Returns:
+            List[Tuple[int, float]]: (chunk index, score) pairs, best first.
+        """
+        term_weights = dict.fromkeys(tokenize(query), 1.0)
+        for term in tokenize(" ".join(expansion or [])):
+            term_weights[term] = term_weights.get(term, 0.0) + expansion_weight
+
+        scores: Dict[int, float] = {}
+        k1_plus_one = self.k1 + 1
+        with self._lock:
+            for term, weight in term_weights.items():
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term) * weight
+                for doc_id, tf in postings.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * k1_plus_one / (
+                        tf + self._length_norms[doc_id]
+                    )
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+# ============================================================================
+# RETRIEVAL ENGINE - DENSE VECTORS (FAISS)
+# ============================================================================
+
+
+class DenseIndex:
+    """FAISS index over sentence-transformer embeddings of document chunks."""
+
+    INDEX_FILE = "dense.faiss"
+    MANIFEST_FILE = "dense_manifest.json"
+
+    def __init__(
+        self,
+        document_chunks: List[Any],
+        index_path: str,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        batch_size: int = 64,
+        ann_threshold: int = 20000,
+        ann_index: str = "hnsw",
+    ) -> None:
+        """
+        Load a persisted index for these chunks or embed and build a new one.
+
+        Args:
+            document_chunks (List[Any]): List of document chunks to index.
+            index_path (str): Directory the index is persisted to.
+            model_name (str): Sentence-transformers model used for embeddings.
+            batch_size (int): Number of chunks embedded per batch.
+            ann_threshold (int): Corpus size above which an approximate index is used.
+            ann_index (str): Approximate index type, "hnsw" or "ivf".
+
+        Raises:
+            ImportError: If faiss or sentence-transformers is not installed.
+        """
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self._faiss = faiss
+        # Chunk index -> chunk, kept aligned with BM25Index so hybrid fusion can share ids
+        self.document_chunks: List[Optional[Any]] = list(document_chunks)
+        # Ids removed from indexes that don't support removal (HNSW), filtered at search
+        self._removed_ids: set = set()
+        self._lock = threading.RLock()
+        self.index_path = index_path
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.ann_threshold = ann_threshold
+        self.ann_index = ann_index
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.fingerprint = self._fingerprint()
+        self.index = self._load() or self._build()
+
+    def __len__(self) -> int:
+        return self.index.ntotal - len(self._removed_ids)
+
+    def _fingerprint(self) -> str:
+        """Hash of the model name and every chunk slot, used to detect a stale index."""
+        digest = hashlib.sha256(self.model_name.encode("utf-8"))
+        for doc in self.document_chunks:
+            text = _chunk_text(doc) if doc is not None else ""
+            digest.update(hashlib.sha256(text.encode("utf-8")).digest())
+        return digest.hexdigest()
+
+    def _load(self) -> Optional[Any]:
+        """
+        Load the persisted index if it was built from the same chunks.
+
+        Returns:
+            Optional[Any]: The FAISS index, or None if missing or stale.
+        """
+        manifest_path = os.path.join(self.index_path, self.MANIFEST_FILE)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("fingerprint") != self.fingerprint:
+                logger.info("🔄 Persisted dense index is stale, rebuilding")
+                return None
+            index = self._faiss.read_index(os.path.join(self.index_path, self.INDEX_FILE))
+            self._configure_search(self._faiss.downcast_index(index.index))
+            logger.info(f"✅ Loaded dense index with {index.ntotal} vectors from disk")
+            return index
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load persisted dense index: {str(e)}")
+            return None
+
+    def _embed(self, texts: List[str]) -> Any:
+        """Embed texts as L2-normalized float32 vectors, so inner product is cosine."""
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype("float32")
+
+    def _embed_batches(self, texts: List[str]) -> Any:
+        """Embed texts batch by batch into one (n, dimension) array."""
+        import numpy as np
+
+        batches = []
+        for i in range(0, len(texts), self.batch_size):
+            batches.append(self._embed(texts[i : i + self.batch_size]))
+        if not batches:
+            dimension = self.model.get_sentence_embedding_dimension()
+            return np.zeros((0, dimension), dtype="float32")
+        return np.vstack(batches)
+
+    def _build(self) -> Any:
+        """
+        Embed all chunks in batches and build the FAISS index.
+
+        Returns:
+            Any: The populated FAISS index.
+        """
+        import numpy as np
+
+        start_time = time.time()
+        ids = [i for i, doc in enumerate(self.document_chunks) if doc is not None]
+        vectors = self._embed_batches([_chunk_text(self.document_chunks[i]) for i in ids])
+
+        index = self._faiss.IndexIDMap2(
+            self._create_index(self.model.get_sentence_embedding_dimension(), vectors)
+        )
+        index.add_with_ids(vectors, np.array(ids, dtype="int64"))
+        logger.info(
+            f"✅ Dense index built: {index.ntotal} vectors "
+            f"({type(self._faiss.downcast_index(index.index)).__name__}) "
+            f"in {time.time() - start_time:.2f}s"
+        )
+        self._persist(index)
+        return index
+
+    def add_documents(self, chunks: List[Any]) -> List[int]:
+        """
+        Embed and index chunks, appending them after the existing chunk indexes.
+
+        Args:
+            chunks (List[Any]): List of document chunks.
+
+        Returns:
+            List[int]: The chunk indexes assigned, in order.
+        """
+        import numpy as np
+
+        with self._lock:
+            start = len(self.document_chunks)
+            ids = list(range(start, start + len(chunks)))
+            if chunks:
+                vectors = self._embed_batches([_chunk_text(doc) for doc in chunks])
+                self.index.add_with_ids(vectors, np.array(ids, dtype="int64"))
+            self.document_chunks.extend(chunks)
+            return ids
+
+    def remove_documents(self, doc_ids: List[int]) -> None:
+        """
+        Remove chunks from the index.
+
+        Args:
+            doc_ids (List[int]): Chunk indexes to remove.
+        """
+        import numpy as np
+
+        with self._lock:
+            doc_ids = [i for i in doc_ids if self.document_chunks[i] is not None]
+            if not doc_ids:
+                return
+            try:
+                self.index.remove_ids(np.array(doc_ids, dtype="int64"))
+            except RuntimeError:
+                # HNSW graphs can't delete nodes; hide them until the next full rebuild
+                self._removed_ids.update(doc_ids)
+            for doc_id in doc_ids:
+                self.document_chunks[doc_id] = None
+
+    def save(self) -> None:
+        """Persist the index after incremental changes."""
+        with self._lock:
+            self.fingerprint = self._fingerprint()
+            self._persist(self.index)
+
+    def _create_index(self, dimension: int, vectors: Any) -> Any:
+        """
+        Pick an exact index for small corpora and an approximate one for large corpora.
+
+        The result is wrapped in an IndexIDMap2 by the caller so vectors are
+        addressed by chunk index.
+
+        Args:
+            dimension (int): Embedding dimension.
+            vectors (Any): Training vectors, used by IVF.
+
+        Returns:
+            Any: An empty FAISS index.
+        """
+        faiss = self._faiss
+        if len(vectors) < self.ann_threshold:
+            index = faiss.IndexFlatIP(dimension)
+        elif self.ann_index == "ivf":
+            nlist = max(1, int(4 * math.sqrt(len(vectors))))
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(
+                quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(vectors)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 80
+        self._configure_search(index)
+        return index
+
+    def _configure_search(self, index: Any) -> None:
+        """Set search-time recall/latency knobs for approximate indexes."""
+        if hasattr(index, "nprobe"):
+            index.nprobe = 16
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = 64
+
+    def _persist(self, index: Any) -> None:
+        """Write the index and its manifest to index_path."""
+        try:
+            os.makedirs(self.index_path, exist_ok=True)
+            self._faiss.write_index(index, os.path.join(self.index_path, self.INDEX_FILE))
+            with open(
+                os.path.join(self.index_path, self.MANIFEST_FILE), "w", encoding="utf-8"
+            ) as f:
+                json.dump(
+                    {
+                        "fingerprint": self.fingerprint,
+                        "model_name": self.model_name,
+                        "vectors": index.ntotal,
+                        "created_at": datetime.now().isoformat(),
+                    },
+                    f,
+                )
+            logger.info(f"💾 Dense index saved to {self.index_path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist dense index: {str(e)}")
+
+    def search(
+        self, query: str, k: int = 6, expansion: Optional[List[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the chunks nearest to a query embedding.
+
+        Args:
+            query (str): The search query.
+            k (int): Number of results to return.
+            expansion (Optional[List[str]]): Ignored; the embedding of the full
+                question already covers its keywords.
+
+        Returns:
+            List[Tuple[int, float]]: (chunk index, cosine similarity) pairs, best first.
+        """
+        if not len(self) or not query.strip():
+            return []
+        vector = self._embed([query])
+        with self._lock:
+            removed = self._removed_ids
+            scores, ids = self.index.search(vector, k + len(removed))
+        results = [
+            (int(doc_id), float(score))
+            for doc_id, score in zip(ids[0], scores[0])
+            if doc_id >= 0 and int(doc_id) not in removed
+        ]
+        return results[:k]
+
+
+# ============================================================================
+# RETRIEVAL ENGINE - HYBRID FUSION
+# ============================================================================
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[Tuple[int, float]]], k: int, rrf_k: int = RRF_K
+) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked result lists by summing 1 / (rrf_k + rank) per chunk.
+
+    Args:
+        rankings (List[List[Tuple[int, float]]]): Ranked (chunk index, score) lists.
+        k (int): Number of results to return.
+        rrf_k (int): Rank damping constant.
+
+    Returns:
+        List[Tuple[int, float]]: (chunk index, fused score) pairs, best first.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+
+
+class HybridIndex:
+    """Lexical and dense indexes over the same chunks, fused with reciprocal-rank fusion."""
+
+    def __init__(self, lexical_index: BM25Index, dense_index: DenseIndex) -> None:
+        """
+        Initialize the hybrid index.
+
+        Args:
+            lexical_index (BM25Index): Keyword index.
+            dense_index (DenseIndex): Dense index built from the same chunk list.
+        """
+        self.lexical_index = lexical_index
+        self.dense_index = dense_index
+        self.document_chunks = lexical_index.document_chunks
+
+    def __len__(self) -> int:
+        return len(self.lexical_index)
+
+    def search(
+        self, query: str, k: int = 6, expansion: Optional[List[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Search both indexes and fuse the rankings.
+
+        Args:
+            query (str): The search query.
+            k (int): Number of results to return.
+            expansion (Optional[List[str]]): Extra keywords boosted in the lexical ranking.
+
+        Returns:
+            List[Tuple[int, float]]: (chunk index, fused score) pairs, best first.
+        """
+        candidates = max(k * 4, 20)
+        return reciprocal_rank_fusion(
+            [
+                self.lexical_index.search(query, candidates, expansion=expansion),
+                self.dense_index.search(query, candidates),
+            ],
+            k,
+        )
+
+
+class IndexRetriever:
+    """Retriever over a prebuilt BM25, dense or hybrid index, drop-in for MockRetriever."""
+
+    def __init__(self, index: Optional[Any]) -> None:
+        """
+        Initialize the retriever.
+
+        Args:
+            index (Optional[Any]): The index to search; must provide search() and document_chunks.
+        """
+        self.index = index
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> "IndexRetriever":
+        """
+        Return self as a retriever.
+
+        Args:
+            search_kwargs (Optional[Dict[str, Any]]): Optional search parameters.
+
+        Returns:
+            IndexRetriever: This instance.
+        """
+        return self
+
+    def get_relevant_documents(
+        self, query: str, search_kwargs: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Search for relevant documents based on a query.
+
+        Args:
+            query (str): The search query.
+            search_kwargs (Optional[Dict[str, Any]]): Optional search parameters.
+
+        Returns:
+            List[Any]: List of relevant documents.
+        """
+        if not self.index or not len(self.index):
+            logger.warning("⚠️ No document chunks available for search")
+            return []
+
+        search_kwargs = search_kwargs or {}
+        k = search_kwargs.get("k", 6)
+        # Rankings are keyed by chunk index, so each chunk appears at most once
+        results = [
+            self.index.document_chunks[doc_id]
+            for doc_id, score in self.index.search(
+                query, k, expansion=search_kwargs.get("expansion")
+            )
+        ]
+        logger.info(
+            f"🔍 Found {len(results)} relevant documents for query: {query[:50]}..."
+        )
+        return results
+
+
+# ============================================================================
+# ANSWER CACHE - LRU + TTL, OPTIONALLY SHARED ACROSS WORKERS
+# ============================================================================
+
+
+class SQLAnswerBackend:
+    """
+    Answer cache table shared by all workers, in SQLite (one host) or PostgreSQL.
+
+    Entries carry the corpus version they were generated against, an expiry
+    time and a last-access time used for LRU eviction once the table exceeds
+    its byte budget.
+    """
+
+    # The byte budget is enforced every this many puts per process, so the
+    # table can briefly run over by that many entries
+    EVICTION_INTERVAL = 20
+
+    def __init__(self, kind: str, max_bytes: int, sqlite_path: Optional[str] = None) -> None:
+        """
+        Create the cache table if needed.
+
+        Args:
+            kind (str): "sqlite" or "postgres".
+            max_bytes (int): Total answer bytes kept before evicting least recently used.
+            sqlite_path (str, optional): Database file for the SQLite backend.
+        """
+        self.kind = kind
+        self.max_bytes = max_bytes
+        self.sqlite_path = sqlite_path
+        self._param = "?" if kind == "sqlite" else "%s"
+        self._lock = threading.Lock()
+        self._pg_conn = None
+        self._puts_since_eviction = 0
+        if kind == "sqlite":
+            os.makedirs(os.path.dirname(sqlite_path) or ".", exist_ok=True)
+        self._execute(
+            """
+            CREATE TABLE IF NOT EXISTS qa_answer_cache (
+                cache_key VARCHAR(64) PRIMARY KEY,
+                corpus_version VARCHAR(64) NOT NULL,
+                answer TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                expires_at DOUBLE PRECISION NOT NULL,
+                last_access DOUBLE PRECISION NOT NULL
+            )
+        """
+        )
+
+    def _execute(self, sql: str, params: Tuple = (), fetch: bool = False) -> List[Tuple]:
+        """
+        Run one statement in its own transaction.
+
+        Args:
+            sql (str): Statement, with "?" placeholders.
+            params (Tuple): Statement parameters.
+            fetch (bool): Return the result rows.
+
+        Returns:
+            List[Tuple]: Result rows when fetch is set, otherwise [].
+        """
+        sql = sql.replace("?", self._param)
+        if self.kind == "sqlite":
+            # Short-lived connections; SQLite connections aren't shared across threads
+            with sqlite3.connect(self.sqlite_path, timeout=30) as conn:
+                rows = conn.execute(sql, params).fetchall()
+            return rows if fetch else []
+
+        # One connection per process, reused across requests
+        with self._lock:
+            for attempt in range(2):
+                if self._pg_conn is None or self._pg_conn.closed:
+                    self._pg_conn = get_db_connection()
+                    if self._pg_conn is None:
+                        raise Exception("Database connection failed")
+                try:
+                    with self._pg_conn.cursor() as cursor:
+                        cursor.execute(sql, params)
+                        rows = cursor.fetchall() if fetch else []
+                    self._pg_conn.commit()
+                    return rows
+                except Exception:
+                    try:
+                        self._pg_conn.rollback()
+                    except Exception:
+                        self._pg_conn = None
+                    if attempt:
+                        raise
+        return []
+
+    def get(self, key: str, version: str) -> Optional[str]:
+        """
+        Look up an answer.
+
+        Args:
+            key (str): Cache key.
+            version (str): Current corpus version; entries for other versions miss.
+
+        Returns:
+            Optional[str]: The cached answer, or None.
+        """
+        now = time.time()
+        rows = self._execute(
+            """
+            SELECT answer FROM qa_answer_cache
+            WHERE cache_key = ? AND corpus_version = ? AND expires_at > ?
+        """,
+            (key, version, now),
+            fetch=True,
+        )
+        if not rows:
+            return None
+        self._execute(
+            "UPDATE qa_answer_cache SET last_access = ? WHERE cache_key = ?", (now, key)
+        )
+        return rows[0][0]
+
+    def put(self, key: str, version: str, answer: str, size: int, expires_at: float) -> None:
+        """
+        Store an answer, evicting over-budget entries every EVICTION_INTERVAL puts.
+
+        Args:
+            key (str): Cache key.
+            version (str): Corpus version the answer was generated against.
+            answer (str): The answer.
+            size (int): Size of the entry in bytes.
+            expires_at (float): Unix time the entry expires.
+        """
+        self._execute(
+            """
+            INSERT INTO qa_answer_cache
+                (cache_key, corpus_version, answer, size_bytes, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET
+                corpus_version = EXCLUDED.corpus_version,
+                answer = EXCLUDED.answer,
+                size_bytes = EXCLUDED.size_bytes,
+                expires_at = EXCLUDED.expires_at,
+                last_access = EXCLUDED.last_access
+        """,
+            (key, version, answer, size, expires_at, time.time()),
+        )
+        with self._lock:
+            self._puts_since_eviction += 1
+            due = self._puts_since_eviction >= self.EVICTION_INTERVAL
+            if due:
+                self._puts_since_eviction = 0
+        if due:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Delete expired entries and the least recently used ones over the budget.
+
+        One statement: entries are ranked newest first by last access, and
+        every entry past the point where the running size exceeds max_bytes
+        is deleted.
+        """
+        now = time.time()
+        self._execute(
+            """
+            DELETE FROM qa_answer_cache
+            WHERE expires_at <= ?
+               OR cache_key IN (
+                   SELECT cache_key FROM (
+                       SELECT cache_key,
+                              SUM(size_bytes) OVER (
+                                  ORDER BY last_access DESC, cache_key
+                              ) AS newer_bytes
+                       FROM qa_answer_cache
+                       WHERE expires_at > ?
+                   ) ranked
+                   WHERE newer_bytes > ?
+               )
+        """,
+            (now, now, self.max_bytes),
+        )
+
+    def purge_other_versions(self, version: str) -> None:
+        """
+        Drop entries generated against a different corpus.
+
+        Args:
+            version (str): Current corpus version.
+        """
+        self._execute("DELETE FROM qa_answer_cache WHERE corpus_version <> ?", (version,))
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._execute("DELETE FROM qa_answer_cache")
+
+
+class AnswerCache:
+    """
+    Answer cache with LRU eviction, TTL and a byte budget.
+
+    A per-process LRU sits in front of an optional shared backend, so answers
+    generated by one gunicorn worker are served warm by the others. All
+    entries are tied to the corpus version reported by version_fn and are
+    dropped when the indexed documents change.
+    """
+
+    def __init__(
+        self,
+        version_fn: Callable[[], str],
+        ttl: int,
+        max_bytes: int,
+        backend: Optional[SQLAnswerBackend] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            version_fn (Callable[[], str]): Returns the current corpus version.
+            ttl (int): Seconds an answer stays valid.
+            max_bytes (int): Byte budget of the per-process LRU.
+            backend (SQLAnswerBackend, optional): Shared store behind the local LRU.
+        """
+        self.version_fn = version_fn
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self) -> str:
+        """Drop everything if the corpus changed since the last call; return the version."""
+        version = self.version_fn()
+        if version != self._version:
+            with self._lock:
+                if self._version is not None:
+                    self._entries.clear()
+                    self._bytes = 0
+                    self.stats["invalidations"] += 1
+                    logger.info(f"🧹 Corpus changed ({version}), answer cache invalidated")
+                    if self.backend:
+                        try:
+                            self.backend.purge_other_versions(version)
+                        except Exception as e:
+                            logger.warning(f"⚠️ Shared answer cache purge failed: {str(e)}")
+                self._version = version
+        return version
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up an answer.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss.
+        """
+        version = self._check_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                answer, expires_at, _ = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return answer
+                self._remove(key)
+                self.stats["expirations"] += 1
+
+        if self.backend:
+            try:
+                answer = self.backend.get(key, version)
+            except Exception as e:
+                logger.warning(f"⚠️ Shared answer cache read failed: {str(e)}")
+                answer = None
+            if answer is not None:
+                self._store_local(key, answer, time.time() + self.ttl)
+                with self._lock:
+                    self.stats["shared_hits"] += 1
+                return answer
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, answer: str) -> None:
+        """
+        Store an answer locally and in the shared backend.
+
+        Args:
+            key (str): Cache key.
+            answer (str): The answer.
+        """
+        version = self._check_version()
+        expires_at = time.time() + self.ttl
+        self._store_local(key, answer, expires_at)
+        if self.backend:
+            try:
+                self.backend.put(
+                    key, version, answer, self._entry_size(key, answer), expires_at
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Shared answer cache write failed: {str(e)}")
+
+    def clear(self) -> None:
+        """Drop all local entries (the shared backend is left to other workers)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict[str, Any]: Hit/miss/eviction counters, entries, bytes and hit rate.
+        """
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["shared_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "backend": self.backend.kind if self.backend else "memory",
+                "hit_rate": round(
+                    (self.stats["hits"] + self.stats["shared_hits"]) / lookups, 3
+                )
+                if lookups
+                else 0.0,
+            }
+
+    def _entry_size(self, key: str, answer: str) -> int:
+        return len(key) + len(answer.encode("utf-8"))
+
+    def _store_local(self, key: str, answer: str, expires_at: float) -> None:
+        """Insert into the local LRU, evicting least recently used entries over budget."""
+        size = self._entry_size(key, answer)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        """Remove a local entry (lock held)."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+# Questions are compared as word sequences; CJK ideographs count one character at a time
+_QUESTION_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]|[^\W_\u4e00-\u9fff]+")
+_ARABIC_PATTERN = re.compile(r"[\u0600-\u06ff]")
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+_CONTRACTIONS = {
+    "what's": "what is",
+    "whats": "what is",
+    "who's": "who is",
+    "where's": "where is",
+    "how's": "how is",
+    "that's": "that is",
+    "it's": "it is",
+    "isn't": "is not",
+    "aren't": "are not",
+    "doesn't": "does not",
+    "don't": "do not",
+    "can't": "can not",
+    "cannot": "can not",
+    "won't": "will not",
+    "shan't": "shall not",
+}
+_CONTRACTION_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(c) for c in _CONTRACTIONS) + r")(?!\w)"
+)
+# Any other "<verb>n't" (didn't, wasn't, shouldn't...) becomes "<verb> not"
+_NOT_CONTRACTION_PATTERN = re.compile(r"\b(\w+)n't(?!\w)")
+# Words that never change what is being asked
+_QUESTION_FILLER = {"a", "an", "the", "please", "pls", "plz"}
+# Words that invert a question; two questions must contain exactly the same ones
+_NEGATION_TOKENS = {
+    "not", "no", "never", "without", "none", "nor", "neither", "nothing",
+    "不", "没", "沒", "无", "無", "非", "别", "未",
+    "لا", "ليس", "لم", "لن", "غير", "بدون",
+}
+
+
+def normalize_question(question: str) -> Tuple[str, FrozenSet[str]]:
+    """
+    Normalize a question for near-duplicate matching.
+
+    Lowercases, unifies apostrophes, expands common contractions and drops
+    punctuation and filler words, so "What's a neural network?" and
+    "what is a neural network" normalize the same.
+
+    Args:
+        question (str): The question.
+
+    Returns:
+        Tuple[str, FrozenSet[str]]: Normalized text and its set of tokens.
+    """
+    text = question.lower().replace("\u2019", "'").replace("`", "'")
+    text = _CONTRACTION_PATTERN.sub(lambda m: _CONTRACTIONS[m.group(1)], text)
+    text = _NOT_CONTRACTION_PATTERN.sub(r"\1 not", text)
+    tokens = [
+        token
+        for token in _QUESTION_TOKEN_PATTERN.findall(text)
+        if token not in _QUESTION_FILLER
+    ]
+    return " ".join(tokens), frozenset(tokens)
+
+
+def question_similarity(first: List[str], second: List[str]) -> float:
+    """
+    Order-aware similarity of two normalized questions' token sequences.
+
+    Questions only count as near-duplicates when one can be turned into the
+    other by adding or removing words: the words they share must appear in
+    the same order, and both must contain the same negations. "convert
+    fahrenheit to celsius" therefore never matches "convert celsius to
+    fahrenheit", nor "why does it work" "why does it not work".
+
+    Args:
+        first (List[str]): Tokens of one normalized question.
+        second (List[str]): Tokens of the other.
+
+    Returns:
+        float: 0-1 sequence similarity, or 0.0 if the questions differ in
+        word order or negation.
+    """
+    first_negations = Counter(t for t in first if t in _NEGATION_TOKENS)
+    second_negations = Counter(t for t in second if t in _NEGATION_TOKENS)
+    if first_negations != second_negations:
+        return 0.0
+
+    shared = set(first) & set(second)
+    if [t for t in first if t in shared] != [t for t in second if t in shared]:
+        return 0.0
+
+    return SequenceMatcher(None, first, second, autojunk=False).ratio()
+
+
+def detect_question_language(question: str) -> str:
+    """
+    Guess the language a question should be answered in, from its script.
+
+    Args:
+        question (str): The question, including any answer-language prefix.
+
+    Returns:
+        str: "ar", "zh" or "en".
+    """
+    if _ARABIC_PATTERN.search(question):
+        return "ar"
+    if _CJK_PATTERN.search(question):
+        return "zh"
+    return "en"
+
 
+class SemanticAnswerCache:
+    """
+    Serves answers to near-duplicate questions asked recently in the same language.
+
+    Questions are normalized and compared with question_similarity() against
+    recently answered ones; the best match at or above threshold is reused.
+    Word order and negations must agree, only short questions are eligible,
+    and numbers must match exactly, so "explain unit 3" never answers
+    "explain unit 4" and long generated prompts (mindmaps) always go to the
+    exact-match cache instead.
+    """
 
-class MockRetriever:
-    """Mock retriever for Railway deployment."""
+    MAX_TOKENS = 40
 
-    def __init__(self, document_chunks: List[Any]) -> None:
+    def __init__(
+        self, version_fn: Callable[[], str], threshold: float, max_entries: int, ttl: int
+    ) -> None:
         """
-        Initialize the mock retriever.
+        Initialize the cache.
 
         Args:
-            document_chunks (List[Any]): List of document chunks to search through.
+            version_fn (Callable[[], str]): Returns the current corpus version.
+            threshold (float): Minimum similarity (0-1) to reuse an answer.
+            max_entries (int): Questions remembered per language (least recently used dropped).
+            ttl (int): Seconds an answer stays valid.
         """
-        self.document_chunks = document_chunks
-        logger.info(f"🔍 MockRetriever initialized with {len(document_chunks)} chunks")
-
-    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> "MockRetriever":
+        self.version_fn = version_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "exact_hits": 0, "misses": 0}
+
+    def _key(self, question: str) -> Optional[Tuple[str, str, FrozenSet[str]]]:
+        """Language, normalized text and tokens, or None if the question isn't eligible."""
+        normalized, tokens = normalize_question(question)
+        if not tokens or len(tokens) > self.MAX_TOKENS:
+            return None
+        return detect_question_language(question), normalized, tokens
+
+    def _check_version(self) -> None:
+        """Forget everything if the corpus changed (lock held)."""
+        version = self.version_fn()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
         """
-        Return self as a retriever.
+        Find the answer to a near-duplicate question.
 
         Args:
-            search_kwargs (Optional[Dict[str, Any]]): Optional search parameters.
+            question (str): The question.
 
         Returns:
-            MockRetriever: This instance.
+            Optional[Dict[str, Any]]: A copy of the cached response, or None.
         """
-        return self
-
-    def get_relevant_documents(
-        self, query: str, search_kwargs: Optional[Dict[str, Any]] = None
-    ) -> List[Any]:
+        key = self._key(question)
+        if key is None:
+            return None
+        language, normalized, tokens = key
+        numbers = {token for token in tokens if token.isdigit()}
+        now = time.time()
+
+        with self._lock:
+            self._check_version()
+            entries = self._entries.get(language)
+            best, best_score = None, 0.0
+            if entries:
+                entry = entries.get(normalized)
+                if entry and entry["expires_at"] > now:
+                    best, best_score = normalized, 1.0
+                else:
+                    sequence = normalized.split(" ")
+                    for candidate, entry in entries.items():
+                        other = entry["sequence"]
+                        # The ratio can't exceed 2*min/(len sum); skip without computing it
+                        if 2 * min(len(sequence), len(other)) < self.threshold * (
+                            len(sequence) + len(other)
+                        ):
+                            continue
+                        if entry["numbers"] != numbers or entry["expires_at"] <= now:
+                            continue
+                        score = question_similarity(sequence, other)
+                        if score > best_score:
+                            best, best_score = candidate, score
+
+            if best is None or best_score < self.threshold:
+                self.stats["misses"] += 1
+                return None
+
+            entries.move_to_end(best)
+            self.stats["hits"] += 1
+            if best_score == 1.0:
+                self.stats["exact_hits"] += 1
+            response = dict(entries[best]["response"])
+
+        logger.info(f"💾 Semantic cache hit ({best_score:.2f}) for: {question[:50]}")
+        return response
+
+    def store(self, question: str, response: Dict[str, Any]) -> None:
         """
-        Search for relevant documents based on a query.
+        Remember a successful answer.
 
         Args:
-            query (str): The search query.
-            search_kwargs (Optional[Dict[str, Any]]): Optional search parameters.
-
-        Returns:
-            List[Any]: List of relevant documents.
+            question (str): The question.
+            response (Dict[str, Any]): The response from answer_question().
         """
-        if not self.document_chunks:
-            logger.warning("⚠️ No document chunks available for search")
-            return []
+        answer = response.get("answer", "")
+        if (
+            response.get("conversation_type") not in ("document_based", "general")
+            or not answer
+            or answer.startswith("[")
+            or answer == LLM_UNAVAILABLE_MESSAGE
+        ):
+            return
+        key = self._key(question)
+        if key is None:
+            return
+        language, normalized, tokens = key
+
+        with self._lock:
+            self._check_version()
+            entries = self._entries.setdefault(language, OrderedDict())
+            entries.pop(normalized, None)
+            entries[normalized] = {
+                "sequence": normalized.split(" "),
+                "numbers": {token for token in tokens if token.isdigit()},
+                "expires_at": time.time() + self.ttl,
+                "response": {
+                    "answer": answer,
+                    "sources": response.get("sources", []),
+                    "conversation_type": response["conversation_type"],
+                },
+            }
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
 
-        query_lower = query.lower()
-        scored_docs = []
+    def clear(self) -> None:
+        """Forget all questions."""
+        with self._lock:
+            self._entries.clear()
 
-        for doc in self.document_chunks:
-            content = (
-                doc.page_content
-                if hasattr(doc, "page_content")
-                else doc.get("page_content", "")
-            )
-            if not content:
-                continue
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
 
-            content_lower = content.lower()
+        Returns:
+            Dict[str, Any]: Hits, exact hits, misses, hit rate and questions per language.
+        """
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "threshold": self.threshold,
+                "questions": {lang: len(e) for lang, e in self._entries.items()},
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
 
-            # Improved scoring based on keyword matches
-            score = 0
-            query_words = query_lower.split()
-            for word in query_words:
-                if len(word) > 2:  # Skip short words
-                    # Exact word matches
-                    score += content_lower.count(word) * 2
-                    # Partial matches
-                    if word in content_lower:
-                        score += 1
 
-            # Bonus for question words
-            question_words = ["what", "how", "why", "when", "where", "which", "who"]
-            for qword in question_words:
-                if qword in query_lower and qword in content_lower:
-                    score += 3
+def create_answer_cache(version_fn: Callable[[], str]) -> AnswerCache:
+    """
+    Build the answer cache configured by ANSWER_CACHE_* environment variables.
 
-            if score > 0:
-                scored_docs.append((score, doc))
+    Falls back to a per-process cache if the shared backend can't be opened.
 
-        # Sort by score and return top results
-        scored_docs.sort(key=lambda x: x[0], reverse=True)
-        k = search_kwargs.get("k", 6) if search_kwargs else 6
+    Args:
+        version_fn (Callable[[], str]): Returns the current corpus version.
 
-        results = [doc for score, doc in scored_docs[:k]]
-        logger.info(
-            f"🔍 Found {len(results)} relevant documents for query: {query[:50]}..."
-        )
-        return results
+    Returns:
+        AnswerCache: The cache.
+    """
+    config = get_answer_cache_config()
+    backend = None
+    if config["backend"] != "memory":
+        try:
+            backend = SQLAnswerBackend(
+                config["backend"], config["shared_max_bytes"], config["sqlite_path"]
+            )
+            logger.info(f"✅ Shared answer cache enabled ({config['backend']})")
+        except Exception as e:
+            logger.warning(
+                f"⚠️ Shared answer cache unavailable, using per-process cache: {str(e)}"
+            )
+    return AnswerCache(version_fn, config["ttl"], config["max_bytes"], backend)
 
 
 # ============================================================================
@@ -828,6 +2874,10 @@ class MockRetriever:
 # ============================================================================
 
 
+LLM_UNAVAILABLE_MESSAGE = "I'm having trouble connecting to my language model. Please check that the OpenRouter API key is configured correctly and has sufficient credits."
+GENERAL_KNOWLEDGE_NOTE = "\n\n*Note: This response is based on general knowledge. Upload course materials for more specific help!*"
+
+
 class DocumentQA:
     """Main Document QA system for Railway deployment."""
 
@@ -836,14 +2886,24 @@ class DocumentQA:
         Initialize the Document QA system.
 
         Args:
-            documents_dir (str, optional): Directory containing documents. If None, creates from database.
+            documents_dir (str, optional): Directory containing documents. If None, streams from database.
         """
-        self.documents_dir = documents_dir or create_temp_documents_from_db()
+        self.documents_dir = documents_dir
         self.vector_store_manager = VectorStore(self.documents_dir)
         self.gpt_llm = None
         self.conversation_memory = ConversationMemory()
-        self.response_cache = {}
-        self.cache_max_size = 50
+        self.response_cache = create_answer_cache(self.vector_store_manager.corpus_version)
+        cache_config = get_answer_cache_config()
+        self.semantic_cache = (
+            SemanticAnswerCache(
+                self.vector_store_manager.corpus_version,
+                cache_config["semantic_threshold"],
+                cache_config["semantic_size"],
+                cache_config["ttl"],
+            )
+            if cache_config["semantic"]
+            else None
+        )
 
         # Initialize OpenRouter GPT
         api_key, model = get_openrouter_config()
@@ -902,7 +2962,12 @@ class DocumentQA:
                     "conversation_type": "greeting",
                 }
 
-            response = self._handle_document_question(question, user_id)
+            # Near-duplicates of recent questions are answered without retrieval or GPT
+            response = self.semantic_cache.lookup(question) if self.semantic_cache else None
+            if response is None:
+                response = self._handle_document_question(question, user_id)
+                if self.semantic_cache:
+                    self.semantic_cache.store(question, response)
             if user_id:
                 self.conversation_memory.add_message(
                     user_id, question, response["answer"]
@@ -920,6 +2985,203 @@ class DocumentQA:
                 "conversation_type": "error",
             }
 
+    def answer_question_stream(
+        self, question: str, user_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Answer a question, streaming GPT output as it is generated.
+
+        Retrieval and all checks run exactly as in answer_question(); only the
+        final GPT call is streamed. Answers that need no GPT call (greetings,
+        errors, cache hits) arrive as a single token event.
+
+        Args:
+            question (str): The question to answer.
+            user_id (Optional[str]): Optional user identifier for conversation history.
+
+        Yields:
+            Dict[str, Any]: Events, in order:
+                - {"event": "meta", "sources", "conversation_type"}
+                - {"event": "token", "text"} one or more times
+                - {"event": "done", "answer", "sources", "conversation_type"}
+        """
+        if not question or not question.strip():
+            response = self.answer_question(question, user_id)
+            yield from self._single_answer_events(response)
+            return
+
+        question = question.strip()
+        logger.info(f"🤖 Processing streamed question: {question[:50]}...")
+
+        try:
+            if self._detect_conversation_type(question.lower()) == "greeting":
+                response = self.answer_question(question, user_id)
+                yield from self._single_answer_events(response)
+                return
+
+            cached = self.semantic_cache.lookup(question) if self.semantic_cache else None
+            if cached is not None:
+                if user_id:
+                    self.conversation_memory.add_message(user_id, question, cached["answer"])
+                yield from self._single_answer_events(cached)
+                return
+
+            prepared = self._prepare_document_answer(question, user_id)
+            if "generate" not in prepared:
+                if user_id:
+                    self.conversation_memory.add_message(
+                        user_id, question, prepared["answer"]
+                    )
+                yield from self._single_answer_events(prepared)
+                return
+        except Exception as e:
+            logger.error(f"❌ Error in answer_question_stream: {str(e)}")
+            yield from self._single_answer_events(
+                {
+                    "answer": "I encountered an error, but I'm still here to help! Could you try rephrasing your question?",
+                    "sources": [],
+                    "conversation_type": "error",
+                }
+            )
+            return
+
+        sources = prepared["sources"]
+        conversation_type = prepared["conversation_type"]
+        yield {"event": "meta", "sources": sources, "conversation_type": conversation_type}
+
+        cache_key = None
+        if prepared["generate"] == "document":
+            cache_key = self._get_cache_key(question, prepared["context"])
+            prompt = self._build_document_prompt(question, prepared["context"])
+        else:
+            prompt = self._build_general_prompt(question)
+
+        parts: List[str] = []
+        complete = False
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            logger.debug("💾 Cache hit for question")
+            parts.append(cached)
+            yield {"event": "token", "text": cached}
+            complete = True
+        elif not self.gpt_llm:
+            parts.append(LLM_UNAVAILABLE_MESSAGE)
+            yield {"event": "token", "text": parts[0]}
+        else:
+            try:
+                stream = self._stream_upstream(prompt, user_id)
+                try:
+                    first = next(stream, "")
+                    if self._is_llm_failure(first):
+                        parts.append(LLM_UNAVAILABLE_MESSAGE)
+                        yield {"event": "token", "text": parts[0]}
+                    else:
+                        parts.append(first)
+                        yield {"event": "token", "text": first}
+                        for text in stream:
+                            parts.append(text)
+                            yield {"event": "token", "text": text}
+                        complete = True
+                finally:
+                    stream.close()
+                if complete:
+                    if cache_key:
+                        self.response_cache.put(cache_key, "".join(parts))
+                    if prepared["generate"] == "general":
+                        parts.append(GENERAL_KNOWLEDGE_NOTE)
+                        yield {"event": "token", "text": GENERAL_KNOWLEDGE_NOTE}
+            except Exception as e:
+                logger.error(f"❌ GPT stream interrupted: {e}")
+                interrupted = "\n\n[Connection Error] The response was interrupted. Please try again."
+                parts.append(interrupted)
+                yield {"event": "token", "text": interrupted}
+
+        answer = "".join(parts)
+        logger.info(
+            f"✅ GPT response streamed, length: {len(answer)} chars, complete: {complete}"
+        )
+        if user_id:
+            self.conversation_memory.add_message(user_id, question, answer)
+        if complete and self.semantic_cache:
+            self.semantic_cache.store(
+                question,
+                {"answer": answer, "sources": sources, "conversation_type": conversation_type},
+            )
+        yield {
+            "event": "done",
+            "answer": answer,
+            "sources": sources,
+            "conversation_type": conversation_type,
+        }
+
+    def _stream_upstream(self, prompt: str, user_id: Optional[str]) -> Iterator[str]:
+        """
+        Stream a GPT reply, holding a gateway slot only while OpenRouter sends it.
+
+        Streamed calls can't be coalesced, but still count towards the cap. A
+        reader thread holds the slot and buffers fragments in a queue, so a
+        slow or stalled browser delays only its own answer instead of keeping
+        an upstream slot from other users. Closing the generator (the client
+        went away) tells the reader to stop.
+
+        Args:
+            prompt (str): The prompt to send to the model.
+            user_id (Optional[str]): User the call is made for.
+
+        Yields:
+            str: Text fragments in order.
+
+        Raises:
+            Exception: Whatever waiting for the slot or reading the stream raised.
+        """
+        fragments: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        stopped = threading.Event()
+
+        def read() -> None:
+            try:
+                with get_llm_gateway().slot(user_id):
+                    stream = self.gpt_llm.stream_response(prompt)
+                    try:
+                        for text in stream:
+                            if stopped.is_set():
+                                break
+                            fragments.put(("text", text))
+                    finally:
+                        stream.close()
+                fragments.put(("end", None))
+            except Exception as e:
+                fragments.put(("error", e))
+
+        threading.Thread(target=read, name="llm-stream", daemon=True).start()
+        try:
+            while True:
+                kind, value = fragments.get()
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            stopped.set()
+
+    def _single_answer_events(self, response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Express a finished answer as stream events.
+
+        Args:
+            response (Dict[str, Any]): Response from answer_question().
+
+        Yields:
+            Dict[str, Any]: meta, token and done events.
+        """
+        yield {
+            "event": "meta",
+            "sources": response["sources"],
+            "conversation_type": response["conversation_type"],
+        }
+        yield {"event": "token", "text": response["answer"]}
+        yield {"event": "done", **response}
+
     def _detect_conversation_type(self, question_lower: str) -> str:
         """
         Detect the type of conversation based on the question.
@@ -982,6 +3244,37 @@ class DocumentQA:
         Returns:
             Dict[str, Any]: Response dictionary containing answer and metadata.
         """
+        prepared = self._prepare_document_answer(question, user_id)
+        if "generate" not in prepared:
+            return prepared
+
+        if prepared["generate"] == "document":
+            logger.info("🤖 Generating GPT response...")
+            answer = self._generate_gpt_response(question, prepared["context"], user_id)
+            logger.info(f"✅ GPT response generated, length: {len(answer)} chars")
+        else:
+            answer = self._generate_gpt_response_general(question, user_id)
+        return {
+            "answer": answer,
+            "sources": prepared["sources"],
+            "conversation_type": prepared["conversation_type"],
+        }
+
+    def _prepare_document_answer(
+        self, question: str, user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the checks and retrieval for a question, up to the point of calling GPT.
+
+        Args:
+            question (str): The question to answer.
+            user_id (Optional[str]): Optional user identifier.
+
+        Returns:
+            Dict[str, Any]: Either a finished response (answer, sources, conversation_type),
+                or a pending one with "generate" set to "document" (with "context") or
+                "general", plus sources and conversation_type.
+        """
         try:
             logger.info("🔍 Starting document question processing...")
 
@@ -1014,6 +3307,9 @@ class DocumentQA:
                     }
             logger.info("✅ Vector store is ready")
 
+            # Pick up documents uploaded or deleted through other workers
+            self.vector_store_manager.sync_if_stale()
+
             # Check 3: Get retriever
             try:
                 retriever = self.vector_store_manager.get_vector_store(timeout=10)
@@ -1033,51 +3329,23 @@ class DocumentQA:
                     "conversation_type": "no_documents",
                 }
 
-            # Check 4: Get relevant documents
+            # Check 4: Get relevant documents, with keyword expansion in the same pass
             try:
                 logger.info("🔍 Searching for relevant documents...")
                 docs = retriever.get_relevant_documents(
-                    question, search_kwargs={"k": 6}
+                    question,
+                    search_kwargs={"k": 10, "expansion": self._extract_keywords(question)},
                 )
                 logger.info(f"✅ Found {len(docs)} relevant documents")
             except Exception as search_error:
                 logger.error(f"❌ Document search error: {str(search_error)}")
                 # Fall back to general knowledge
-                answer = self._generate_gpt_response_general(question, user_id)
-                return {"answer": answer, "sources": [], "conversation_type": "general"}
-
-            # Enhanced search with keywords
-            keywords = self._extract_keywords(question)
-            if keywords:
-                keyword_query = " ".join(keywords)
-                try:
-                    additional_docs = retriever.get_relevant_documents(
-                        keyword_query, search_kwargs={"k": 4}
-                    )
-                    seen_contents = {
-                        (
-                            doc.page_content
-                            if hasattr(doc, "page_content")
-                            else doc.get("page_content", "")
-                        )
-                        for doc in docs
-                    }
-                    for doc in additional_docs:
-                        content = (
-                            doc.page_content
-                            if hasattr(doc, "page_content")
-                            else doc.get("page_content", "")
-                        )
-                        if content not in seen_contents:
-                            docs.append(doc)
-                            seen_contents.add(content)
-                except Exception as keyword_error:
-                    logger.warning(f"⚠️ Keyword search failed: {str(keyword_error)}")
+                return {"generate": "general", "sources": [], "conversation_type": "general"}
 
             # Check 5: Handle no documents case
             if not docs:
                 logger.info("⚠️ No relevant documents found")
-                documents_in_db = get_documents_from_database()
+                documents_in_db = get_document_catalogue()
                 if not documents_in_db:
                     return {
                         "answer": "📄 I don't have any course materials uploaded yet. Please upload some documents through the admin panel (/admin/upload_document), and I'll be able to help you with course-specific questions!",
@@ -1086,14 +3354,9 @@ class DocumentQA:
                     }
                 else:
                     logger.info("🤖 Using GPT general knowledge (no document matches)")
-                    answer = self._generate_gpt_response_general(question, user_id)
-                    return {
-                        "answer": answer,
-                        "sources": [],
-                        "conversation_type": "general",
-                    }
+                    return {"generate": "general", "sources": [], "conversation_type": "general"}
 
-            # Check 6: Prepare context and generate response
+            # Check 6: Prepare context for the response
             try:
                 logger.info("📝 Preparing context from documents...")
                 context = self._prepare_context(docs)
@@ -1101,21 +3364,16 @@ class DocumentQA:
                 logger.info(
                     f"✅ Context prepared, length: {len(context)} chars, sources: {len(sources)}"
                 )
-
-                logger.info("🤖 Generating GPT response...")
-                answer = self._generate_gpt_response(question, context, user_id)
-                logger.info(f"✅ GPT response generated, length: {len(answer)} chars")
-
                 return {
-                    "answer": answer,
+                    "generate": "document",
+                    "context": context,
                     "sources": sources,
                     "conversation_type": "document_based",
                 }
             except Exception as generation_error:
                 logger.error(f"❌ Response generation error: {str(generation_error)}")
                 # Fall back to general knowledge
-                answer = self._generate_gpt_response_general(question, user_id)
-                return {"answer": answer, "sources": [], "conversation_type": "general"}
+                return {"generate": "general", "sources": [], "conversation_type": "general"}
 
         except Exception as e:
             logger.error(f"❌ Outer exception in document question handling: {str(e)}")
@@ -1142,22 +3400,14 @@ class DocumentQA:
         if not self.gpt_llm:
             return "[Error: OpenRouter not configured. Please set OPENROUTER_API_KEY environment variable.]"
 
-        prompt = f"""You are a helpful AI learning assistant for the 51Talk AI Learning Platform. 
-
-Please provide a helpful, educational response to this question: {question}
-
-Keep your response clear, educational, and helpful for a student."""
+        prompt = self._build_general_prompt(question)
 
         try:
-            response = self.gpt_llm.generate_response(prompt)
-            if (
-                not response
-                or response.startswith("[Error")
-                or response.startswith("[Authentication")
-            ):
-                return "I'm having trouble connecting to my language model. Please check that the OpenRouter API key is configured correctly and has sufficient credits."
-
-            response += "\n\n*Note: This response is based on general knowledge. Upload course materials for more specific help!*"
+            response = get_llm_gateway().generate(self.gpt_llm, prompt, user_id=user_id)
+            if self._is_llm_failure(response):
+                return LLM_UNAVAILABLE_MESSAGE
+
+            response += GENERAL_KNOWLEDGE_NOTE
             return response
         except Exception as e:
             logger.error(f"❌ Error generating general GPT response: {e}")
@@ -1333,12 +3583,53 @@ Keep your response clear, educational, and helpful for a student."""
 
         # Check cache
         cache_key = self._get_cache_key(question, context)
-        if cache_key in self.response_cache:
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
             logger.debug("💾 Cache hit for question")
-            return self.response_cache[cache_key]
+            return cached
+
+        prompt = self._build_document_prompt(question, context)
+
+        try:
+            response = get_llm_gateway().generate(self.gpt_llm, prompt, user_id=user_id)
+
+            if self._is_llm_failure(response):
+                return LLM_UNAVAILABLE_MESSAGE
+
+            self.response_cache.put(cache_key, response)
+            return response
+        except Exception as e:
+            logger.error(f"❌ Error generating GPT response: {e}")
+            return "[Error] I encountered an issue generating a response. Please check your OpenRouter API configuration."
+
+    def _build_general_prompt(self, question: str) -> str:
+        """
+        Build the prompt for answering from general knowledge.
+
+        Args:
+            question (str): The question to answer.
+
+        Returns:
+            str: The prompt.
+        """
+        return f"""You are a helpful AI learning assistant for the 51Talk AI Learning Platform. 
+
+Please provide a helpful, educational response to this question: {question}
+
+Keep your response clear, educational, and helpful for a student."""
+
+    def _build_document_prompt(self, question: str, context: str) -> str:
+        """
+        Build the prompt for answering from course materials.
+
+        Args:
+            question (str): The question to answer.
+            context (str): Context from documents.
 
-        # Create prompt optimized for GPT models
-        prompt = f"""You are a helpful AI learning assistant for the 51Talk AI Learning Platform. You provide clear, accurate, and educational responses based on course materials.
+        Returns:
+            str: The prompt, optimized for GPT models.
+        """
+        return f"""You are a helpful AI learning assistant for the 51Talk AI Learning Platform. You provide clear, accurate, and educational responses based on course materials.
 
 Guidelines:
 - Use the course materials provided to give accurate, helpful answers
@@ -1355,27 +3646,21 @@ Student Question: {question}
 
 Please provide a helpful, educational response based on the course materials above:"""
 
-        try:
-            response = self.gpt_llm.generate_response(prompt)
-
-            if (
-                not response
-                or response.startswith("[Error")
-                or response.startswith("[Authentication")
-            ):
-                return "I'm having trouble connecting to my language model. Please check that the OpenRouter API key is configured correctly and has sufficient credits."
-
-            # Cache response
-            if len(self.response_cache) >= self.cache_max_size:
-                # Remove oldest entry
-                oldest_key = next(iter(self.response_cache))
-                del self.response_cache[oldest_key]
-            self.response_cache[cache_key] = response
+    def _is_llm_failure(self, response: str) -> bool:
+        """
+        Check whether a GPT reply is an error from the OpenRouter client.
 
-            return response
-        except Exception as e:
-            logger.error(f"❌ Error generating GPT response: {e}")
-            return "[Error] I encountered an issue generating a response. Please check your OpenRouter API configuration."
+        Args:
+            response (str): Reply or first streamed fragment.
+
+        Returns:
+            bool: True if the reply should be replaced with LLM_UNAVAILABLE_MESSAGE.
+        """
+        return (
+            not response
+            or response.startswith("[Error")
+            or response.startswith("[Authentication")
+        )
 
     def get_status(self) -> Dict[str, Any]:
         """
@@ -1384,9 +3669,8 @@ Please provide a helpful, educational response based on the course materials abo
         Returns:
             Dict[str, Any]: Dictionary containing system status information.
         """
-        # Count documents in database
-        documents = get_documents_from_database()
-        document_count = len(documents)
+        # Count documents in database (hashes only, no content)
+        document_count = len(get_document_catalogue() or {})
 
         return {
             "ready": self.vector_store_manager.is_ready() and self.gpt_llm is not None,
@@ -1396,9 +3680,13 @@ Please provide a helpful, educational response based on the course materials abo
             "llm_provider": "OpenRouter GPT",
             "gpt_available": self.gpt_llm is not None,
             "cache_size": len(self.response_cache),
+            "answer_cache": self.response_cache.get_stats(),
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None,
             "deployment": "Railway Compatible",
-            "documents_dir": self.documents_dir,
-            "chunks_loaded": len(self.vector_store_manager.document_chunks),
+            "documents_dir": self.documents_dir or "database",
+            "chunks_loaded": self.vector_store_manager.chunk_count(),
+            "retrieval_mode": self.vector_store_manager.retrieval_mode,
+            "llm_gateway": get_llm_gateway().get_stats(),
         }
 
 
@@ -1424,10 +3712,11 @@ def initialize_qa(
     """
     global _qa_instance
     if _qa_instance is None:
-        # For Railway, always create temp directory from database
-        temp_dir = documents_dir or create_temp_documents_from_db()
-        logger.info(f"🚀 Initializing Railway-compatible QA system from: {temp_dir}")
-        _qa_instance = DocumentQA(temp_dir)
+        # For Railway, documents are streamed from the database unless a directory is given
+        logger.info(
+            f"🚀 Initializing Railway-compatible QA system from: {documents_dir or 'database'}"
+        )
+        _qa_instance = DocumentQA(documents_dir)
     return _qa_instance
 
 
@@ -1480,6 +3769,54 @@ def get_system_status(
     return qa_system.get_status()
 
 
+def index_document(filename: str, content: bytes) -> bool:
+    """
+    Index a new or changed document in the background.
+
+    Args:
+        filename (str): Name of the stored document.
+        content (bytes): Raw document content.
+
+    Returns:
+        bool: True if indexing was started, False if the QA system isn't running.
+    """
+    if _qa_instance is None:
+        return False
+    threading.Thread(
+        target=_qa_instance.vector_store_manager.add_document,
+        args=(filename, content),
+        daemon=True,
+    ).start()
+    return True
+
+
+def unindex_document(filename: str) -> bool:
+    """
+    Remove a deleted document's chunks from the index.
+
+    Args:
+        filename (str): Name of the deleted document.
+
+    Returns:
+        bool: True if the document was indexed and has been removed.
+    """
+    if _qa_instance is None:
+        return False
+    return _qa_instance.vector_store_manager.remove_document(filename)
+
+
+def sync_qa_documents() -> Optional[Dict[str, int]]:
+    """
+    Incrementally sync the QA index with the stored_documents table.
+
+    Returns:
+        Optional[Dict[str, int]]: Sync counts, or None if the QA system isn't ready.
+    """
+    if _qa_instance is None:
+        return None
+    return _qa_instance.vector_store_manager.sync_with_database()
+
+
 def cleanup_qa() -> None:
     """Cleanup function for graceful shutdown."""
     global _qa_instance
@@ -1487,9 +3824,13 @@ def cleanup_qa() -> None:
         if _qa_instance:
             logger.info("🧹 Cleaning up Railway QA system resources...")
             _qa_instance.response_cache.clear()
+            if _qa_instance.semantic_cache:
+                _qa_instance.semantic_cache.clear()
             _qa_instance.conversation_memory.conversations.clear()
             _qa_instance = None
-            logger.info("✅ Railway QA cleanup completed")
+        close_llm_gateway()
+        close_http_session()
+        logger.info("✅ Railway QA cleanup completed")
     except Exception as e:
         logger.error(f"❌ Error during QA cleanup: {str(e)}")
 
@@ -0,0 +1,93 @@
+"""Shared pytest setup: importable top-level modules and a stub OpenRouter server."""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubOpenRouter:
+    """Chat completions endpoint that echoes the prompt and records what it saw."""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.status = 200
+        self.requests = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][0]["content"]
+                with stub._lock:
+                    stub.requests.append(
+                        {
+                            "prompt": prompt,
+                            "auth": self.headers.get("Authorization"),
+                            "body": body,
+                            "client_port": self.client_address[1],
+                        }
+                    )
+                    stub.active += 1
+                    stub.peak_active = max(stub.peak_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+                if stub.status != 200:
+                    self._send(stub.status, "application/json", b'{"error": {}}')
+                elif body.get("stream"):
+                    events = [
+                        {"choices": [{"delta": {"content": word}}]}
+                        for word in ["echo: ", prompt]
+                    ]
+                    payload = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+                    self._send(200, "text/event-stream", (payload + "data: [DONE]\n\n").encode())
+                else:
+                    reply = {"choices": [{"message": {"content": f"echo: {prompt}"}}]}
+                    self._send(200, "application/json", json.dumps(reply).encode())
+
+            def _send(self, status, content_type, data):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/v1/chat/completions"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def prompts(self):
+        with self._lock:
+            return [entry["prompt"] for entry in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    """A running StubOpenRouter, shut down after the test."""
+    server = StubOpenRouter()
+    yield server
+    server.close()
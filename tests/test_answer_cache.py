@@ -0,0 +1,180 @@
+"""Tests for AnswerCache: TTL, LRU byte budget, corpus versions and the shared backend."""
+
+import pytest
+
+import qa
+from qa import AnswerCache, DocumentQA, LLM_UNAVAILABLE_MESSAGE, SQLAnswerBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(version="v1", ttl=60, max_bytes=10_000, backend=None):
+    state = {"version": version}
+    cache = AnswerCache(lambda: state["version"], ttl=ttl, max_bytes=max_bytes, backend=backend)
+    return cache, state
+
+
+def test_hit_after_put_and_miss_for_unknown_key():
+    cache, _ = make_cache()
+    cache.put("k1", "answer one")
+
+    assert cache.get("k1") == "answer one"
+    assert cache.get("k2") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(qa.time, "time", clock)
+    cache, _ = make_cache(ttl=60)
+    cache.put("k1", "answer")
+
+    clock.now += 59
+    assert cache.get("k1") == "answer"
+    clock.now += 2
+    assert cache.get("k1") is None
+    assert cache.get_stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted_over_byte_budget():
+    # Each entry is 2 key bytes + 10 answer bytes; the budget holds two
+    cache, _ = make_cache(max_bytes=24)
+    cache.put("k1", "a" * 10)
+    cache.put("k2", "b" * 10)
+    assert cache.get("k1") is not None  # k2 is now least recently used
+    cache.put("k3", "c" * 10)
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") == "a" * 10
+    assert cache.get("k3") == "c" * 10
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 24
+
+
+def test_oversized_answer_is_not_stored():
+    cache, _ = make_cache(max_bytes=10)
+    cache.put("k1", "x" * 50)
+    assert cache.get("k1") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_corpus_version_change_invalidates_entries():
+    cache, state = make_cache()
+    cache.put("k1", "old answer")
+    state["version"] = "v2"
+
+    assert cache.get("k1") is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_shared_backend_serves_other_workers(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    first, _ = make_cache(backend=SQLAnswerBackend("sqlite", 10_000, path))
+    second, _ = make_cache(backend=SQLAnswerBackend("sqlite", 10_000, path))
+    first.put("k1", "shared answer")
+
+    assert second.get("k1") == "shared answer"
+    assert second.get_stats()["shared_hits"] == 1
+
+
+def test_shared_backend_ignores_other_corpus_versions(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    first, _ = make_cache(version="v1", backend=SQLAnswerBackend("sqlite", 10_000, path))
+    second, _ = make_cache(version="v2", backend=SQLAnswerBackend("sqlite", 10_000, path))
+    first.put("k1", "v1 answer")
+
+    assert second.get("k1") is None
+
+
+class FakeGateway:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def generate(self, llm, prompt, user_id=None):
+        self.calls += 1
+        return self.replies.pop(0)
+
+
+def make_document_qa(monkeypatch, replies):
+    gateway = FakeGateway(replies)
+    monkeypatch.setattr(qa, "get_llm_gateway", lambda: gateway)
+    document_qa = DocumentQA.__new__(DocumentQA)
+    document_qa.gpt_llm = object()
+    document_qa.response_cache, _ = make_cache()
+    return document_qa, gateway
+
+
+def test_generated_answer_is_cached(monkeypatch):
+    document_qa, gateway = make_document_qa(monkeypatch, ["Gradient descent steps downhill."])
+
+    first = document_qa._generate_gpt_response("what is gradient descent", "context")
+    second = document_qa._generate_gpt_response("what is gradient descent", "context")
+
+    assert first == second == "Gradient descent steps downhill."
+    assert gateway.calls == 1
+
+
+def test_llm_errors_are_not_cached(monkeypatch):
+    document_qa, gateway = make_document_qa(
+        monkeypatch, ["[Error: upstream timeout]", "Gradient descent steps downhill."]
+    )
+
+    first = document_qa._generate_gpt_response("what is gradient descent", "context")
+    second = document_qa._generate_gpt_response("what is gradient descent", "context")
+
+    assert first == LLM_UNAVAILABLE_MESSAGE
+    assert second == "Gradient descent steps downhill."
+    assert gateway.calls == 2
+    assert len(document_qa.response_cache) == 1
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "postgres"])
+def test_shared_backend_evicts_least_recently_used_over_budget(tmp_path, monkeypatch, kind):
+    clock = Clock()
+    monkeypatch.setattr(qa.time, "time", clock)
+    if kind == "postgres":
+        try:
+            backend = SQLAnswerBackend("postgres", 30)
+        except Exception as e:
+            pytest.skip(f"PostgreSQL not available: {e}")
+        backend.clear()
+    else:
+        backend = SQLAnswerBackend("sqlite", 30, str(tmp_path / "answers.sqlite3"))
+    backend.EVICTION_INTERVAL = 4
+
+    # Entries are 10 bytes and the budget holds three; the fourth put evicts
+    for index in range(3):
+        clock.now += 1
+        backend.put(f"k{index}", "v1", "x" * 10, 10, clock.now + 60)
+    clock.now += 1
+    assert backend.get("k0", "v1")  # k1 is now least recently used
+    clock.now += 1
+    backend.put("k3", "v1", "x" * 10, 10, clock.now + 60)
+
+    kept = [f"k{index}" for index in range(4) if backend.get(f"k{index}", "v1")]
+    backend.clear()
+    assert kept == ["k0", "k2", "k3"]
+
+
+def test_shared_backend_drops_expired_entries_when_evicting(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(qa.time, "time", clock)
+    backend = SQLAnswerBackend("sqlite", 1000, str(tmp_path / "answers.sqlite3"))
+    backend.EVICTION_INTERVAL = 2
+
+    backend.put("old", "v1", "answer", 6, clock.now + 10)
+    clock.now += 20
+    backend.put("new", "v1", "answer", 6, clock.now + 10)
+
+    rows = backend._execute("SELECT cache_key FROM qa_answer_cache", fetch=True)
+    assert rows == [("new",)]
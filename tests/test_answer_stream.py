@@ -0,0 +1,74 @@
+"""Tests for streamed answers holding an LLM gateway slot only while upstream is read."""
+
+import time
+
+import pytest
+
+import qa
+from llm_client import LLMGateway
+from qa import DocumentQA
+
+
+class FakeStreamingLLM:
+    def __init__(self, fragments, error=None):
+        self.fragments = fragments
+        self.error = error
+        self.closed = False
+
+    def stream_response(self, prompt):
+        try:
+            for text in self.fragments:
+                yield text
+            if self.error:
+                raise self.error
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    gateway = LLMGateway(max_concurrency=1, queue_timeout=2)
+    monkeypatch.setattr(qa, "get_llm_gateway", lambda: gateway)
+    yield gateway
+    gateway.close()
+
+
+def make_document_qa(llm):
+    document_qa = DocumentQA.__new__(DocumentQA)
+    document_qa.gpt_llm = llm
+    return document_qa
+
+
+def wait_until_idle(gateway, timeout=2):
+    deadline = time.time() + timeout
+    while gateway.get_stats()["active"] and time.time() < deadline:
+        time.sleep(0.01)
+    return gateway.get_stats()["active"] == 0
+
+
+def test_fragments_arrive_in_order(gateway):
+    llm = FakeStreamingLLM(["one ", "two ", "three"])
+    assert list(make_document_qa(llm)._stream_upstream("prompt", "u1")) == ["one ", "two ", "three"]
+
+
+def test_slot_is_released_while_a_slow_client_is_still_reading(gateway):
+    llm = FakeStreamingLLM(["one ", "two ", "three"])
+    stream = make_document_qa(llm)._stream_upstream("prompt", "u1")
+
+    assert next(stream) == "one "
+    # The client has not read the rest, but upstream is done and the only slot is free
+    assert wait_until_idle(gateway)
+    with gateway.slot("u2"):
+        pass
+    assert list(stream) == ["two ", "three"]
+
+
+def test_upstream_errors_are_raised_to_the_reader(gateway):
+    llm = FakeStreamingLLM(["one "], error=RuntimeError("stream broke"))
+    stream = make_document_qa(llm)._stream_upstream("prompt", "u1")
+
+    assert next(stream) == "one "
+    with pytest.raises(RuntimeError, match="stream broke"):
+        next(stream)
+    assert llm.closed
+    assert wait_until_idle(gateway)
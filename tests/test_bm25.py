@@ -0,0 +1,97 @@
+"""Tests for the BM25Index lexical ranking."""
+
+import math
+from collections import Counter
+
+import pytest
+
+from qa import BM25Index, tokenize
+
+DOCS = [
+    "Neural networks learn weights with gradient descent.",
+    "Gradient descent gradient descent gradient descent steps downhill on the loss.",
+    "Python lists and dictionaries are built-in data structures.",
+    "Convolutional neural networks are used for image recognition tasks in computer vision.",
+    "The loss function measures prediction error.",
+]
+
+
+def chunks(texts):
+    return [{"page_content": text, "metadata": {}} for text in texts]
+
+
+def reference_scores(texts, query, k1=1.5, b=0.75):
+    """Plain Okapi BM25 over every document, for comparison."""
+    docs = [tokenize(text) for text in texts]
+    avg_length = sum(len(doc) for doc in docs) / len(docs)
+    scores = {}
+    for doc_id, doc in enumerate(docs):
+        tf = Counter(doc)
+        score = 0.0
+        for term in set(tokenize(query)):
+            if not tf[term]:
+                continue
+            df = sum(1 for other in docs if term in other)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * len(doc) / avg_length)
+            score += idf * tf[term] * (k1 + 1) / (tf[term] + norm)
+        if score:
+            scores[doc_id] = score
+    return scores
+
+
+@pytest.mark.parametrize(
+    "query", ["gradient descent", "neural networks", "loss", "image recognition", "python data"]
+)
+def test_scores_match_reference_bm25(query):
+    index = BM25Index(chunks(DOCS))
+    expected = reference_scores(DOCS, query)
+    results = index.search(query, k=len(DOCS))
+
+    assert {doc_id for doc_id, _ in results} == set(expected)
+    for doc_id, score in results:
+        assert score == pytest.approx(expected[doc_id])
+    assert [score for _, score in results] == sorted((s for _, s in results), reverse=True)
+
+
+def test_term_frequency_and_rarity_rank_first():
+    index = BM25Index(chunks(DOCS))
+    assert index.search("gradient descent", k=1)[0][0] == 1
+    assert index.search("python", k=1)[0][0] == 2
+
+
+def test_unknown_terms_return_nothing():
+    index = BM25Index(chunks(DOCS))
+    assert index.search("quantum chromodynamics") == []
+    assert index.search("") == []
+
+
+def test_k_limits_results():
+    index = BM25Index(chunks(DOCS))
+    assert len(index.search("neural networks gradient loss", k=2)) == 2
+
+
+def test_expansion_terms_boost_matching_chunks():
+    index = BM25Index(chunks(DOCS))
+    plain = dict(index.search("networks", k=len(DOCS)))
+    expanded = dict(index.search("networks", k=len(DOCS), expansion=["image"]))
+
+    assert expanded[3] > plain[3]
+    assert expanded[0] == pytest.approx(plain[0])
+
+
+def test_removed_chunks_no_longer_match():
+    index = BM25Index(chunks(DOCS))
+    index.remove_documents([1])
+
+    assert len(index) == len(DOCS) - 1
+    assert 1 not in dict(index.search("gradient descent", k=len(DOCS)))
+    assert index.search("gradient descent", k=1)[0][0] == 0
+
+
+def test_added_chunks_get_new_indexes():
+    index = BM25Index(chunks(DOCS))
+    new_ids = index.add_documents(chunks(["Transformers rely on attention."]))
+
+    assert new_ids == [len(DOCS)]
+    assert index.search("attention", k=1)[0][0] == len(DOCS)
@@ -0,0 +1,138 @@
+"""Tests for ManagedConnectionPool lifetime recycling, health checks and checkout waits.
+
+Needs a PostgreSQL server reachable with the DB_* environment variables the app uses.
+"""
+
+import os
+
+import psycopg2
+import pytest
+from psycopg2 import pool
+
+from app import CountingConnection, ManagedConnectionPool
+
+CONNECT_KWARGS = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": os.getenv("DB_PORT", "5432"),
+    "database": os.getenv("DB_NAME", "fiftyone_learning"),
+    "user": os.getenv("DB_USER", "admin"),
+    "password": os.getenv("DB_PASSWORD", "admin123"),
+}
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(maxconn=2, max_lifetime=3600, healthcheck_after=3600, wait_timeout=1):
+        try:
+            managed = ManagedConnectionPool(
+                1,
+                maxconn,
+                max_lifetime=max_lifetime,
+                healthcheck_after=healthcheck_after,
+                wait_timeout=wait_timeout,
+                connection_factory=CountingConnection,
+                **CONNECT_KWARGS,
+            )
+        except psycopg2.OperationalError as e:
+            pytest.skip(f"PostgreSQL not available: {e}")
+        pools.append(managed)
+        return managed
+
+    yield make
+    for managed in pools:
+        managed.closeall()
+
+
+def backend_pid(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        pid = cursor.fetchone()[0]
+    conn.rollback()
+    return pid
+
+
+def terminate_backend(pid):
+    admin = psycopg2.connect(**CONNECT_KWARGS)
+    try:
+        admin.autocommit = True
+        with admin.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    finally:
+        admin.close()
+
+
+def test_returned_connection_is_reused_within_lifetime(make_pool):
+    managed = make_pool()
+    conn = managed.getconn()
+    pid = backend_pid(conn)
+    managed.putconn(conn)
+
+    conn = managed.getconn()
+    assert backend_pid(conn) == pid
+    managed.putconn(conn)
+    assert managed.get_stats()["recycled"] == 0
+
+
+def test_connection_past_max_lifetime_is_closed_on_return(make_pool):
+    managed = make_pool(max_lifetime=0)
+    conn = managed.getconn()
+    pid = backend_pid(conn)
+    managed.putconn(conn)
+
+    assert conn.closed
+    assert managed.get_stats()["recycled"] == 1
+    conn = managed.getconn()
+    assert backend_pid(conn) != pid
+    managed.putconn(conn)
+
+
+def test_dead_idle_connection_is_replaced_on_checkout(make_pool):
+    managed = make_pool(healthcheck_after=0)
+    conn = managed.getconn()
+    pid = backend_pid(conn)
+    managed.putconn(conn)
+    terminate_backend(pid)
+
+    conn = managed.getconn()
+    assert backend_pid(conn) != pid
+    managed.putconn(conn)
+    assert managed.get_stats()["health_check_failures"] == 1
+
+
+def test_recently_used_connection_skips_the_ping(make_pool):
+    managed = make_pool(healthcheck_after=3600)
+    conn = managed.getconn()
+    managed.putconn(conn)
+    queries = conn.query_count
+
+    conn = managed.getconn()
+    assert conn.query_count == queries
+    managed.putconn(conn)
+
+
+def test_closed_connection_is_discarded_on_return(make_pool):
+    managed = make_pool()
+    conn = managed.getconn()
+    conn.close()
+    managed.putconn(conn)
+
+    stats = managed.get_stats()
+    assert (stats["in_use"], stats["open"]) == (0, 0)
+    conn = managed.getconn()
+    assert not conn.closed
+    managed.putconn(conn)
+
+
+def test_checkout_times_out_when_pool_is_exhausted(make_pool):
+    managed = make_pool(maxconn=1, wait_timeout=0.1)
+    conn = managed.getconn()
+
+    with pytest.raises(pool.PoolError):
+        managed.getconn()
+    assert managed.get_stats()["timeouts"] == 1
+
+    managed.putconn(conn)
+    conn = managed.getconn()
+    managed.putconn(conn)
@@ -0,0 +1,69 @@
+"""Tests for OpenRouterLLM against the local stub chat completions server."""
+
+import pytest
+
+from llm_client import OpenRouterLLM, close_http_session
+
+
+@pytest.fixture
+def llm(stub):
+    close_http_session()
+    yield OpenRouterLLM("test-key", "test/model", base_url=stub.url, read_timeout=5)
+    close_http_session()
+
+
+def test_generate_posts_prompt_to_base_url(stub, llm):
+    assert llm.generate_response("hello") == "echo: hello"
+    assert stub.requests[0]["auth"] == "Bearer test-key"
+    assert stub.requests[0]["body"]["model"] == "test/model"
+
+
+def test_openrouter_url_overrides_default_endpoint(stub, monkeypatch):
+    monkeypatch.setenv("OPENROUTER_URL", stub.url)
+    assert OpenRouterLLM("test-key", "test/model").base_url == stub.url
+
+
+def test_requests_reuse_a_keep_alive_connection(stub, llm):
+    for prompt in ["one", "two", "three"]:
+        assert llm.generate_response(prompt) == f"echo: {prompt}"
+
+    assert len({entry["client_port"] for entry in stub.requests}) == 1
+
+
+@pytest.mark.parametrize(
+    "status, prefix",
+    [
+        (429, "[Rate Limited]"),
+        (401, "[Authentication Error]"),
+        (402, "[Insufficient Credits]"),
+        (404, "[Model Error]"),
+        (500, "[API Error]"),
+    ],
+)
+def test_error_status_is_mapped_to_message(stub, llm, status, prefix):
+    stub.status = status
+    assert llm.generate_response("hello").startswith(prefix)
+    assert list(llm.stream_response("hello"))[0].startswith(prefix)
+
+
+def test_read_timeout_is_reported(stub):
+    stub.delay = 0.5
+    llm = OpenRouterLLM("test-key", "test/model", base_url=stub.url, read_timeout=0.1)
+    assert llm.generate_response("hello").startswith("[Timeout]")
+
+
+def test_unreachable_server_is_reported(stub):
+    url = stub.url
+    stub.close()
+    llm = OpenRouterLLM("test-key", "test/model", base_url=url, connect_timeout=0.5)
+    assert llm.generate_response("hello").startswith("[Connection Error]")
+
+
+def test_empty_prompt_is_rejected_without_a_request(stub, llm):
+    assert llm.generate_response("   ").startswith("[Error]")
+    assert stub.requests == []
+
+
+def test_stream_response_yields_fragments(stub, llm):
+    assert list(llm.stream_response("hello")) == ["echo: ", "hello"]
+    assert stub.requests[0]["body"]["stream"] is True
@@ -0,0 +1,113 @@
+"""Tests for LLMGateway scheduling against the local stub chat completions server."""
+
+import threading
+import time
+
+import pytest
+
+from llm_client import LLMGateway, OpenRouterLLM
+
+
+@pytest.fixture
+def llm(stub):
+    return OpenRouterLLM("test-key", "test/model", base_url=stub.url, read_timeout=5)
+
+
+@pytest.fixture
+def make_gateway():
+    gateways = []
+
+    def make(max_concurrency=4, queue_timeout=5):
+        gateway = LLMGateway(max_concurrency, queue_timeout)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def run_in_threads(calls, stagger=0.0):
+    results = [None] * len(calls)
+
+    def run(index, call):
+        results[index] = call()
+
+    threads = []
+    for index, call in enumerate(calls):
+        thread = threading.Thread(target=run, args=(index, call))
+        thread.start()
+        threads.append(thread)
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def wait_until_idle(gateway, timeout=5):
+    deadline = time.time() + timeout
+    while gateway.get_stats()["active"] and time.time() < deadline:
+        time.sleep(0.05)
+    return gateway.get_stats()["active"] == 0
+
+
+def test_generate_returns_the_upstream_reply(stub, llm, make_gateway):
+    assert make_gateway().generate(llm, "hello") == "echo: hello"
+    assert stub.prompts() == ["hello"]
+
+
+def test_identical_prompts_in_flight_share_one_upstream_call(stub, llm, make_gateway):
+    stub.delay = 0.3
+    gateway = make_gateway()
+
+    results = run_in_threads([lambda: gateway.generate(llm, "same prompt")] * 5, stagger=0.02)
+
+    assert results == ["echo: same prompt"] * 5
+    assert stub.prompts() == ["same prompt"]
+    stats = gateway.get_stats()
+    assert (stats["requests"], stats["upstream"], stats["coalesced"]) == (5, 1, 4)
+
+
+def test_concurrent_upstream_calls_are_capped(stub, llm, make_gateway):
+    stub.delay = 0.1
+    gateway = make_gateway(max_concurrency=2)
+    prompts = [f"prompt {index}" for index in range(6)]
+
+    results = run_in_threads([lambda p=p: gateway.generate(llm, p) for p in prompts])
+
+    assert results == [f"echo: {p}" for p in prompts]
+    assert stub.peak_active == 2
+    assert gateway.get_stats()["peak_active"] == 2
+
+
+def test_waiting_calls_are_shared_round_robin_between_users(stub, llm, make_gateway):
+    stub.delay = 0.2
+    gateway = make_gateway(max_concurrency=1)
+    calls = [
+        lambda: gateway.generate(llm, "a1", user_id="a"),
+        lambda: gateway.generate(llm, "a2", user_id="a"),
+        lambda: gateway.generate(llm, "a3", user_id="a"),
+        lambda: gateway.generate(llm, "b1", user_id="b"),
+    ]
+
+    run_in_threads(calls, stagger=0.03)
+
+    # a1 was already running; b1 is served before user a's third call
+    assert stub.prompts() == ["a1", "a2", "b1", "a3"]
+
+
+def test_caller_gives_up_after_queue_timeout(stub, llm, make_gateway):
+    stub.delay = 1.0
+    gateway = make_gateway(queue_timeout=0.2)
+
+    assert gateway.generate(llm, "slow").startswith("[Timeout]")
+    # The upstream call keeps running for other callers; let it finish before teardown
+    assert wait_until_idle(gateway)
+
+
+def test_slot_holders_count_towards_the_cap(stub, llm, make_gateway):
+    gateway = make_gateway(max_concurrency=1, queue_timeout=0.2)
+
+    with gateway.slot("a"):
+        assert gateway.generate(llm, "waiting").startswith("[Timeout]")
+    assert wait_until_idle(gateway)
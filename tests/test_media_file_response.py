@@ -0,0 +1,117 @@
+"""Tests for validators, Range requests and proxy offload in media_file_response."""
+
+import os
+from email.utils import formatdate
+
+import pytest
+
+import app as app_module
+
+CONTENT = bytes(range(256)) * 8
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.delenv("MEDIA_SENDFILE", raising=False)
+    monkeypatch.setattr(app_module, "UPLOAD_FOLDER", str(tmp_path))
+    (tmp_path / "videos").mkdir()
+    path = tmp_path / "videos" / "lesson.mp4"
+    path.write_bytes(CONTENT)
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return tmp_path
+
+
+def respond(directory, headers=None, filename="videos/lesson.mp4"):
+    with app_module.app.test_request_context(headers=headers or {}):
+        response = app_module.media_file_response(str(directory), filename)
+        body = b"".join(response.response) if response.status_code in (200, 206) else b""
+    return response, body
+
+
+def test_whole_file_with_validators(media):
+    response, body = respond(media)
+
+    assert response.status_code == 200
+    assert body == CONTENT
+    assert response.mimetype == "video/mp4"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"]
+    assert response.last_modified.timestamp() == 1_700_000_000
+
+
+def test_missing_and_escaping_paths_are_404(media):
+    assert respond(media, filename="videos/missing.mp4")[0].status_code == 404
+    assert respond(media / "videos", filename="../videos/lesson.mp4")[0].status_code == 404
+
+
+def test_if_none_match_returns_304(media):
+    etag = respond(media)[0].headers["ETag"]
+    response, _ = respond(media, {"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_changed_file_gets_a_new_etag(media):
+    etag = respond(media)[0].headers["ETag"]
+    path = media / "videos" / "lesson.mp4"
+    path.write_bytes(CONTENT + b"more")
+    os.utime(path, (1_700_000_100, 1_700_000_100))
+
+    response, body = respond(media, {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert body == CONTENT + b"more"
+
+
+def test_if_modified_since_returns_304_only_when_unchanged(media):
+    current, _ = respond(media, {"If-Modified-Since": formatdate(1_700_000_000, usegmt=True)})
+    older, _ = respond(media, {"If-Modified-Since": formatdate(1_699_999_000, usegmt=True)})
+
+    assert current.status_code == 304
+    assert older.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [("bytes=0-99", 0, 100), ("bytes=2000-", 2000, 2048), ("bytes=-48", 2000, 2048)],
+)
+def test_range_returns_partial_content(media, header, start, end):
+    response, body = respond(media, {"Range": header})
+
+    assert response.status_code == 206
+    assert body == CONTENT[start:end]
+    assert response.headers["Content-Range"] == f"bytes {start}-{end - 1}/{len(CONTENT)}"
+
+
+def test_unsatisfiable_range_returns_416(media):
+    response, _ = respond(media, {"Range": "bytes=9000-"})
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_if_range_ignores_range_for_a_stale_copy(media):
+    etag = respond(media)[0].headers["ETag"]
+    current, current_body = respond(media, {"Range": "bytes=0-9", "If-Range": etag})
+    stale, stale_body = respond(media, {"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert (current.status_code, current_body) == (206, CONTENT[:10])
+    assert (stale.status_code, stale_body) == (200, CONTENT)
+
+
+def test_x_sendfile_offload(media, monkeypatch):
+    monkeypatch.setenv("MEDIA_SENDFILE", "x-sendfile")
+    response, _ = respond(media, {"Range": "bytes=0-9"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Sendfile"] == str(media / "videos" / "lesson.mp4")
+    assert not response.get_data()
+
+
+def test_x_accel_redirect_offload(media, monkeypatch):
+    monkeypatch.setenv("MEDIA_SENDFILE", "x-accel-redirect")
+    monkeypatch.setenv("MEDIA_ACCEL_PREFIX", "/protected/")
+    response, _ = respond(media)
+
+    assert response.headers["X-Accel-Redirect"] == "/protected/videos/lesson.mp4"
+    assert not response.get_data()
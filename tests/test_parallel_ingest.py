@@ -0,0 +1,73 @@
+"""Tests for DocumentProcessor.process_files_parallel keeping few files on disk."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import qa
+from qa import DocumentProcessor
+
+
+class ThreadExecutor(ThreadPoolExecutor):
+    """Stands in for the spawn process pool, so patched task functions apply."""
+
+    def __init__(self, max_workers, mp_context=None):
+        super().__init__(max_workers=max_workers)
+
+
+@pytest.fixture
+def parse_with_threads(monkeypatch):
+    def fake_task(file_path, filename, page_range):
+        if "broken" in filename:
+            raise ValueError("unreadable")
+        with open(file_path) as f:
+            return [f.read()]
+
+    monkeypatch.setattr(qa, "ProcessPoolExecutor", ThreadExecutor)
+    monkeypatch.setattr(qa, "_process_file_task", fake_task)
+
+
+def materialize(directory, names, on_disk):
+    for name in names:
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(f"text of {name}")
+        on_disk.append(len(os.listdir(directory)))
+        yield path, name
+
+
+def test_files_are_parsed_as_they_arrive_and_removed(tmp_path, parse_with_threads):
+    names = [f"doc{index}.txt" for index in range(8)]
+    on_disk = []
+    processor = DocumentProcessor(str(tmp_path))
+
+    results = processor.process_files_parallel(
+        materialize(str(tmp_path), names, on_disk), max_workers=2, remove_files=True
+    )
+
+    assert results == {name: [f"text of {name}"] for name in names}
+    assert max(on_disk) <= 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_files_are_kept_without_remove_files(tmp_path, parse_with_threads):
+    names = ["a.txt", "b.txt", "c.txt"]
+    processor = DocumentProcessor(str(tmp_path))
+
+    processor.process_files_parallel(materialize(str(tmp_path), names, []), max_workers=2)
+
+    assert sorted(os.listdir(tmp_path)) == names
+
+
+def test_failed_file_is_none_and_still_removed(tmp_path, parse_with_threads):
+    names = ["good.txt", "broken.txt", "other.txt"]
+    processor = DocumentProcessor(str(tmp_path))
+
+    results = processor.process_files_parallel(
+        materialize(str(tmp_path), names, []), max_workers=2, remove_files=True
+    )
+
+    assert results["broken.txt"] is None
+    assert results["other.txt"] == ["text of other.txt"]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,78 @@
+"""Tests for near-duplicate question matching in SemanticAnswerCache."""
+
+import pytest
+
+from qa import SemanticAnswerCache, normalize_question, question_similarity
+
+
+def make_cache(threshold=0.85):
+    return SemanticAnswerCache(lambda: "v1", threshold=threshold, max_entries=100, ttl=3600)
+
+
+def answer(text):
+    return {"answer": text, "sources": [], "conversation_type": "general"}
+
+
+def tokens(question):
+    return normalize_question(question)[0].split(" ")
+
+
+def test_normalization_expands_contractions_and_drops_filler():
+    assert normalize_question("What's a neural network?")[0] == "what is neural network"
+    assert normalize_question("Why didn't it work")[0] == "why did not it work"
+
+
+def test_rephrased_question_hits():
+    cache = make_cache()
+    cache.store("What is a neural network?", answer("A network of neurons."))
+    hit = cache.lookup("what is neural network")
+    assert hit is not None
+    assert hit["answer"] == "A network of neurons."
+
+
+def test_added_word_hits_above_threshold():
+    cache = make_cache(threshold=0.8)
+    cache.store("how does gradient descent work in neural networks", answer("Steps downhill."))
+    assert cache.lookup("how does gradient descent work in deep neural networks") is not None
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("convert fahrenheit to celsius", "convert celsius to fahrenheit"),
+        ("Is Python faster than Java?", "Is Java faster than Python?"),
+        (
+            "why does gradient descent work for convex functions",
+            "why does gradient descent not work for convex functions",
+        ),
+        (
+            "why does gradient descent work for convex functions",
+            "why doesn't gradient descent work for convex functions",
+        ),
+        ("explain unit 3", "explain unit 4"),
+    ],
+)
+def test_different_questions_miss(stored, asked):
+    cache = make_cache(threshold=0.5)
+    cache.store(stored, answer("cached"))
+    assert cache.lookup(asked) is None
+
+
+def test_similarity_rejects_reordering_and_negation():
+    assert question_similarity(tokens("is python faster than java"), tokens("is java faster than python")) == 0.0
+    assert question_similarity(tokens("does it work"), tokens("does it not work")) == 0.0
+    assert question_similarity(tokens("does it work"), tokens("does it work")) == 1.0
+
+
+def test_corpus_change_clears_cache():
+    version = {"value": "v1"}
+    cache = SemanticAnswerCache(lambda: version["value"], threshold=0.85, max_entries=10, ttl=3600)
+    cache.store("what is overfitting", answer("Memorising."))
+    version["value"] = "v2"
+    assert cache.lookup("what is overfitting") is None
+
+
+def test_error_answers_are_not_stored():
+    cache = make_cache()
+    cache.store("what is overfitting", answer("[Error] upstream failed"))
+    assert cache.lookup("what is overfitting") is None
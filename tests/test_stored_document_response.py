@@ -0,0 +1,116 @@
+"""Tests for ETag, 304, Range and If-Range handling in stored_document_response."""
+
+from datetime import datetime
+
+import pytest
+
+import app as app_module
+
+CONTENT = bytes(range(256)) * 4
+UPLOAD_DATE = datetime(2024, 5, 1, 12, 0, 0)
+CONTENT_HASH = "abc123"
+
+
+@pytest.fixture
+def streamed(monkeypatch):
+    """Replace the database reads with slices of CONTENT; records each call."""
+    calls = []
+
+    def fake_iter(doc_id, start, end, content_hash=None):
+        calls.append((doc_id, start, end, content_hash))
+        yield CONTENT[start:end]
+
+    monkeypatch.setattr(app_module, "iter_stored_document", fake_iter)
+    return calls
+
+
+def respond(headers=None, content_hash=CONTENT_HASH):
+    doc = (7, "deck.pdf", "application/pdf", len(CONTENT), UPLOAD_DATE, content_hash)
+    with app_module.app.test_request_context(headers=headers or {}):
+        response = app_module.stored_document_response(doc, "deck.pdf", as_attachment=False)
+    body = b"".join(response.response) if response.status_code in (200, 206) else b""
+    return response, body
+
+
+def test_whole_file_without_range(streamed):
+    response, body = respond()
+
+    assert response.status_code == 200
+    assert body == CONTENT
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert streamed == [(7, 0, len(CONTENT), CONTENT_HASH)]
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [("bytes=0-99", 0, 100), ("bytes=1000-", 1000, 1024), ("bytes=-24", 1000, 1024)],
+)
+def test_range_returns_partial_content(streamed, header, start, end):
+    response, body = respond({"Range": header})
+
+    assert response.status_code == 206
+    assert body == CONTENT[start:end]
+    assert response.headers["Content-Range"] == f"bytes {start}-{end - 1}/{len(CONTENT)}"
+    assert response.headers["Content-Length"] == str(end - start)
+
+
+def test_unsatisfiable_range_returns_416(streamed):
+    response, _ = respond({"Range": "bytes=5000-6000"})
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+    assert streamed == []
+
+
+def test_if_range_with_current_etag_honours_range(streamed):
+    response, body = respond({"Range": "bytes=0-9", "If-Range": f'"{CONTENT_HASH}"'})
+
+    assert response.status_code == 206
+    assert body == CONTENT[:10]
+
+
+def test_if_range_with_stale_etag_sends_whole_file(streamed):
+    response, body = respond({"Range": "bytes=0-9", "If-Range": '"old-hash"'})
+
+    assert response.status_code == 200
+    assert body == CONTENT
+
+
+def test_if_range_with_date_compares_upload_date(streamed):
+    current, _ = respond({"Range": "bytes=0-9", "If-Range": "Wed, 01 May 2024 12:00:00 GMT"})
+    stale, _ = respond({"Range": "bytes=0-9", "If-Range": "Tue, 30 Apr 2024 12:00:00 GMT"})
+
+    assert current.status_code == 206
+    assert stale.status_code == 200
+
+
+def test_content_hash_is_the_strong_etag(streamed):
+    response, _ = respond()
+
+    assert response.headers["ETag"] == f'"{CONTENT_HASH}"'
+    assert response.last_modified == UPLOAD_DATE.replace(tzinfo=response.last_modified.tzinfo)
+
+
+def test_matching_if_none_match_returns_304_without_reading_content(streamed):
+    response, _ = respond({"If-None-Match": f'"{CONTENT_HASH}"'})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == f'"{CONTENT_HASH}"'
+    assert streamed == []
+
+
+def test_stale_if_none_match_sends_the_file(streamed):
+    response, body = respond({"If-None-Match": '"old-hash"'})
+
+    assert response.status_code == 200
+    assert body == CONTENT
+
+
+def test_rows_without_a_hash_have_no_etag(streamed):
+    response, body = respond({"If-None-Match": '"abc123"'}, content_hash=None)
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert body == CONTENT
+    assert streamed == [(7, 0, len(CONTENT), None)]